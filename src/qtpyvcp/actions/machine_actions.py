@@ -200,7 +200,7 @@ def issue_mdi(command, reset=True):
         # some commands might take less than `cycle_time` (50ms) to complete,
         # so status would not even notice that the interp_state had changed and the
         # reset mode method would not be called.
-        STATUS.old['interp_state'] = -1
+        STATUS.forceUpdate('interp_state')
 
     if setTaskMode(linuxcnc.MODE_MDI):
         # issue multiple MDI commands separated by ';'
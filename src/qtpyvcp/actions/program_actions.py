@@ -49,11 +49,9 @@ def reload():
 
         program.reload
     """
-    stat = linuxcnc.stat()
-    stat.poll()
-    fname = stat.file
+    fname = STAT.file
     if os.path.exists(fname):
-        load(stat.file, add_to_recents=False)
+        load(fname, add_to_recents=False)
 
 reload.ok = lambda *args, **kwargs: True
 reload.bindOk = lambda *args, **kwargs: True
@@ -22,6 +22,9 @@ class QPin(QObject):
         name (str) : The name of the HAL pin to create.
         typ (str) : The type of the HAL pin, one of `BOOL`, `FLOAT`, `U32` or `S32`.
         dir (str) : the direction of the HAL pin, one of `IN` or `OUT`.
+        cycle_time (int) : How often to check the pin for changes, in ms.
+        scheduler (PinScheduler) : Shared scheduler to poll the pin from. If
+            not given the pin runs its own timer.
 
     Properties:
         value (float | int | bool) : The the current value of the HAL pin.
@@ -30,15 +33,24 @@ class QPin(QObject):
 
     valueChanged = Signal(object)
 
-    def __init__(self, comp, name, typ, dir, cycle_time=100):
+    def __init__(self, comp, name, typ, dir, cycle_time=100, scheduler=None):
         super(QPin, self).__init__()
 
         self._pin = _hal.component.newpin(comp, name, typ, dir)
         self._val = self._pin.get()
 
-        self.startTimer(cycle_time)
+        if dir == _hal.HAL_OUT:
+            # only we can change the value of an OUT pin, nothing to poll
+            pass
+        elif scheduler is not None:
+            scheduler.addPin(self, cycle_time)
+        else:
+            self.startTimer(cycle_time)
 
     def timerEvent(self, timer):
+        self.poll()
+
+    def poll(self):
         tmp = self._pin.get()
         if tmp != self._val:
             self._val = tmp
@@ -55,6 +67,45 @@ class QPin(QObject):
         self.valueChanged.emit(val)
 
 
+class PinScheduler(QObject):
+    """PinScheduler
+
+    Polls all the pins of a component from one timer per rate class,
+    instead of every pin running a timer of its own.
+
+    Rate classes are just poll cycle times in ms, the ``SLOW`` (10 Hz),
+    ``NORMAL`` (30 Hz) and ``FAST`` (100 Hz) constants are provided for
+    convenience, but any cycle time can be used.
+    """
+
+    SLOW = 100
+    NORMAL = 33
+    FAST = 10
+
+    def __init__(self):
+        super(PinScheduler, self).__init__()
+
+        self._timers = {}
+        self._pins = {}
+
+    def addPin(self, pin, cycle_time=SLOW):
+        """Add a pin to be polled every `cycle_time` ms."""
+        pins = self._pins.get(cycle_time)
+        if pins is None:
+            pins = self._pins[cycle_time] = []
+
+            timer = QTimer(self)
+            timer.timeout.connect(lambda: self._poll(pins))
+            timer.start(cycle_time)
+            self._timers[cycle_time] = timer
+
+        pins.append(pin)
+
+    def _poll(self, pins):
+        for pin in pins:
+            pin.poll()
+
+
 class QComponent(QObject):
     """QComponent"""
     def __init__(self, comp_name):
@@ -80,15 +131,26 @@ class QComponent(QObject):
 
         self._comp = _hal.component(comp_name)
         self._pins = {}
+        self._scheduler = PinScheduler()
+
+    def addPin(self, name, type, direction, cycle_time=PinScheduler.SLOW):
+        """Add a HAL pin to the component.
 
-    def addPin(self, name, type, direction):
+        Args:
+            name (str) : The name of the HAL pin to create.
+            type (str) : The type of the HAL pin, one of `float`, `s32`, `u32` or `bit`.
+            direction (str) : the direction of the HAL pin, one of `in`, `out` or `io`.
+            cycle_time (int) : How often to check the pin for changes, in ms.
+                Pins with the same cycle time are polled together.
+        """
 
         pin_type = self.type_map.get(type.lower())
         pin_dir = self.dir_map.get(direction.lower())
 
         LOG.debug("Adding HAL pin: %s.%s (%s %s)", self.name, name, type, direction)
 
-        pin = QPin(self._comp, name, pin_type, pin_dir)
+        pin = QPin(self._comp, name, pin_type, pin_dir,
+                   cycle_time=cycle_time, scheduler=self._scheduler)
         self._pins[name] = pin
         return pin
 
@@ -1,6 +1,7 @@
+import time
 import inspect
 
-from qtpy.QtCore import QObject, Signal
+from qtpy.QtCore import QObject, QTimer, Signal
 from qtpyvcp.utilities.logger import getLogger, logLevelFromName
 
 LOG = getLogger(__name__)
@@ -52,6 +53,9 @@ class Plugin(QObject):
         pass
 
 
+_NOT_EMITTED = object()
+
+
 def isDataChan(obj):
     return isinstance(obj, DataChannel)
 
@@ -119,6 +123,10 @@ class DataChannel(QObject):
 
     signal = Signal(object)
 
+    # bumped whenever a slot is connected to or disconnected from any
+    # channel, lets plugins cheaply tell when to re-check subscriptions
+    connection_serial = 0
+
     def __init__(self, fget=None, fset=None, fstr=None, data=None, settable=False,
                  doc = None):
         super(DataChannel, self).__init__()
@@ -132,18 +140,44 @@ class DataChannel(QObject):
         self.settable = settable
         self.instance = None
 
+        # number of slots connected to the channel signal, and an optional
+        # function called to bring the value up to date when it is read
+        # while the channel has no subscribers (so is not being polled)
+        self.subscribers = 0
+        self.fupdate = None
+
+        # emission policy, see setPolicy()
+        self._dedup = False
+        self._min_interval = 0.0
+        self._trailing = False
+        self._last_emitted = _NOT_EMITTED
+        self._last_emit_time = 0.0
+        self._pending_value = None
+        self._pending_timer = None
+
+        # formatted values for notify() slots with args, shared by all
+        # the slots and cleared on every emission
+        self._formatted = None
+        # set while connecting slots of the channel itself, which don't
+        # count as subscribers
+        self._internal_connect = False
+
         if doc is None and fget is not None:
             doc = fget.__doc__
         self.__doc__ = doc
 
     def getValue(self, *args, **kwargs):
         """Channel data getter method."""
+        if self.fupdate is not None and not self.subscribers:
+            self.fupdate()
         if self.fget is None:
             return self.value
         return self.fget(self.instance, self, *args, **kwargs)
 
     def getString(self, *args, **kwargs):
         """Channel data getter method."""
+        if self.fupdate is not None and not self.subscribers:
+            self.fupdate()
         if self.fstr is None:
             return str(self.value)
         return self.fstr(self.instance, self, *args, **kwargs)
@@ -152,10 +186,63 @@ class DataChannel(QObject):
         """Channel data setter method."""
         if self.fset is None:
             self.value = value
-            self.signal.emit(value)
+            self.emit(value)
         else:
             self.fset(self.instance, self, value)
 
+    def setPolicy(self, dedup=False, max_rate=None, trailing=False):
+        """Set the emission policy of the channel.
+
+        Args:
+            dedup (bool) : Don't emit values equal to the last emitted value.
+            max_rate (float) : Max number of emissions per second. Values set
+                in between are coalesced, and the latest one is emitted at
+                the end of the interval so the last value is never lost.
+            trailing (bool) : Only emit on the trailing edge of the interval,
+                instead of emitting the first value right away. Only used
+                together with `max_rate`.
+        """
+        self._dedup = dedup
+        self._min_interval = 1.0 / max_rate if max_rate else 0.0
+        self._trailing = trailing and bool(max_rate)
+
+        if self._min_interval and self._pending_timer is None:
+            self._pending_timer = QTimer(self)
+            self._pending_timer.setSingleShot(True)
+            self._pending_timer.timeout.connect(self._emitPending)
+
+    def emit(self, value):
+        """Emit value changed, according to the emission policy."""
+        if self._min_interval:
+            if self._pending_timer.isActive():
+                self._pending_value = value
+                return
+
+            wait = self._min_interval
+            if not self._trailing:
+                wait -= time.monotonic() - self._last_emit_time
+                if wait <= 0:
+                    self._emit(value)
+                    return
+
+            self._pending_value = value
+            self._pending_timer.start(int(wait * 1000))
+            return
+
+        self._emit(value)
+
+    def _emitPending(self):
+        value = self._pending_value
+        self._pending_value = None
+        self._emit(value)
+
+    def _emit(self, value):
+        if self._dedup and value == self._last_emitted:
+            return
+        self._last_emitted = value
+        self._last_emit_time = time.monotonic()
+        self.signal.emit(value)
+
     def getter(self, fget):
         def inner(*args, **kwargs):
             fget(*args, **kwargs)
@@ -181,15 +268,56 @@ class DataChannel(QObject):
         # print('Connecting %s to slot %s' % (self._signal, slot))
         if len(args) == 0 and len(kwargs) == 0:
             self.signal.connect(slot)
+            return
+
+        if self._formatted is None:
+            # slots are called in the order they were connected, so this
+            # clears the shared values before any of the formatting slots
+            self._formatted = {}
+            self._internal_connect = True
+            try:
+                self.signal.connect(self._clearFormatted)
+            finally:
+                self._internal_connect = False
+
+        if args and args[0] in ['string', 'str']:
+            fmt = lambda: self.getString(*args[1:], **kwargs)
         else:
-            if args[0] in ['string', 'str']:
-                self.signal.connect(lambda: slot(self.getString(*args[1:], **kwargs)))
-            else:
-                self.signal.connect(lambda: slot(self.getValue(*args, **kwargs)))
+            fmt = lambda: self.getValue(*args, **kwargs)
+
+        try:
+            key = (args, tuple(sorted(kwargs.items())))
+            hash(key)
+        except TypeError:
+            self.signal.connect(lambda: slot(fmt()))
+        else:
+            self.signal.connect(lambda: slot(self._formattedValue(key, fmt)))
+
+    def _clearFormatted(self):
+        self._formatted.clear()
+
+    def _formattedValue(self, key, fmt):
+        try:
+            return self._formatted[key]
+        except KeyError:
+            value = self._formatted[key] = fmt()
+            return value
 
     # fixme
     onValueChanged = notify
 
+    def connectNotify(self, signal):
+        super(DataChannel, self).connectNotify(signal)
+        if self._internal_connect:
+            return
+        self.subscribers += 1
+        DataChannel.connection_serial += 1
+
+    def disconnectNotify(self, signal):
+        super(DataChannel, self).disconnectNotify(signal)
+        self.subscribers = max(self.subscribers - 1, 0)
+        DataChannel.connection_serial += 1
+
     def __get__(self, instance, owner):
         self.instance = instance
         return self
@@ -15,19 +15,24 @@ YAML configuration:
       gcode_properties:
         provider: qtpyvcp.plugins.gcode_properties:GCodeProperties
 
+The run time estimate uses the per axis MAX_VELOCITY and MAX_ACCELERATION
+from the INI. The path deviation allowed at corners can be set in machine
+units with the ``blend_tolerance`` kwarg.
+
 """
 import os
+import time
 import pprint
-import shutil
-import gcode
 import linuxcnc
 
+import numpy as np
+
 from qtpyvcp.utilities.logger import getLogger
 from qtpyvcp.plugins import getPlugin
 from qtpyvcp.utilities.info import Info
 from qtpyvcp.plugins import DataPlugin, DataChannel
 
-from qtpyvcp.widgets.display_widgets.vtk_backplot.base_canon import BaseCanon
+from qtpyvcp.widgets.display_widgets.vtk_backplot.parse_cache import GCodeParseCache
 
 LOG = getLogger(__name__)
 STATUS = getPlugin('status')
@@ -40,11 +45,121 @@ MAX_ANGULAR_VELOCITY = bool(INIFILE.find("TRAJ", "MAX_ANGULAR_VELOCITY"))
 
 MACHINE_UNITS = 2 if INFO.getIsMachineMetric() else 1
 
+AXES = 'XYZABCUVW'
+ROTARY_AXES = 'ABC'
+
+# acceleration used for axes without a MAX_ACCELERATION in the INI
+UNLIMITED_ACCELERATION = 1e6
+
+
+def estimate_run_time(result, max_velocity, max_acceleration,
+                      max_linear_velocity=np.inf, blend_tolerance=0.002):
+    """Estimate how long each segment of a program takes to run.
+
+    Every move gets a trapezoidal velocity profile, limited by the
+    programmed feed (or the max velocity for rapids), the per axis velocity
+    and acceleration limits, and at the ends by the velocity allowed at the
+    corner with the next move. The corner velocity comes from the blend
+    tolerance (junction deviation), and the machine comes to a stop between
+    rapids and feeds, at tool changes, dwells and at gaps in the path.
+    The velocities at the corners are then limited in a forward and a
+    backward pass, so the machine can accelerate and decelerate between
+    them over the length of the moves.
+
+    Args:
+        result (ParseResult) : The parsed program.
+        max_velocity (array) : Max velocity of the 9 axes in internal units
+            (inches or degrees) per second.
+        max_acceleration (array) : Max acceleration of the 9 axes in
+            internal units per second squared.
+        max_linear_velocity (float) : Max trajectory velocity in inches per
+            second.
+        blend_tolerance (float) : Allowed path deviation at corners, in inches.
+
+    Returns:
+        numpy.ndarray : The time of every segment in seconds, zero for
+            segments that are not moves. Dwells are not included.
+    """
+    times = np.zeros(len(result))
+
+    segments = result.segments
+    delta = segments[:, 1] - segments[:, 0]
+    length = np.sqrt(np.einsum('ij,ij->i', delta[:, :3], delta[:, :3]))
+    # same as motion, moves without XYZ motion use the UVW then ABC length
+    for axes in (slice(6, 9), slice(3, 6)):
+        no_length = length == 0
+        if no_length.any():
+            length[no_length] = np.linalg.norm(delta[no_length, axes], axis=1)
+
+    moves = result.mask('traverse', 'feed', 'arcfeed') & (length > 0)
+    motion = np.flatnonzero(moves)
+    if len(motion) == 0:
+        return times
+
+    traverse = result.mask('traverse')
+    feed = result.feedrates
+    tools = result.tools
+    if len(motion) < len(moves):
+        segments = segments[motion]
+        delta = delta[motion]
+        length = length[motion]
+        traverse = traverse[motion]
+        feed = feed[motion]
+        tools = tools[motion]
+
+    # the fastest the path can go without any axis going over its limits
+    distance = np.abs(delta)
+    with np.errstate(divide='ignore'):
+        velocity = length / (distance / max_velocity).max(axis=1)
+        accel = length / (distance / max_acceleration).max(axis=1)
+
+    requested = np.where(traverse | (feed <= 0), np.inf, feed)
+    velocity = np.minimum(np.minimum(velocity, requested), max_linear_velocity)
+    accel = np.minimum(accel, UNLIMITED_ACCELERATION)
+
+    # velocity at the start and end of the moves, stop unless blended
+    corner = np.zeros(len(motion) + 1)
+
+    blend = np.all(segments[:-1, 1] == segments[1:, 0], axis=1)
+    blend &= traverse[:-1] == traverse[1:]
+    blend &= tools[:-1] == tools[1:]
+
+    if len(result.dwells):
+        dwell_moves = np.searchsorted(motion, result.dwells[:, 0].astype(int))
+        blend[dwell_moves[(dwell_moves > 0) & (dwell_moves < len(motion))] - 1] = False
+
+    direction = delta[:, :3] / length[:, None]
+    cos_theta = -np.einsum('ij,ij->i', direction[:-1], direction[1:])
+    sin_half = np.sqrt(np.clip(0.5 * (1 - cos_theta), 0, 1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        junction = np.minimum(accel[:-1], accel[1:]) * blend_tolerance * sin_half / (1 - sin_half)
+    junction = np.where(sin_half >= 1, np.inf, junction)
+
+    corner[1:-1] = np.where(blend, np.minimum(np.minimum(velocity[:-1], velocity[1:]) ** 2, junction), 0)
+
+    # limit the corner velocities (squared) so the machine can get from one
+    # to the next, v1**2 <= v0**2 + 2*a*d, with prefix/suffix minimums
+    reach = np.concatenate(([0.0], np.cumsum(2 * accel * length)))
+    corner = reach + np.minimum.accumulate(corner - reach)
+    corner = np.minimum.accumulate((corner + reach)[::-1])[::-1] - reach
+    corner = np.maximum(corner, 0)
+
+    v0, v1 = corner[:-1], corner[1:]
+    peak = np.minimum(velocity ** 2, (2 * accel * length + v0 + v1) / 2)
+    peak = np.maximum(peak, np.maximum(v0, v1))
+    cruise = length - (2 * peak - v0 - v1) / (2 * accel)
+
+    peak = np.sqrt(peak)
+    times[motion] = ((2 * peak - np.sqrt(v0) - np.sqrt(v1)) / accel
+                     + np.maximum(cruise, 0) / peak)
+
+    return times
+
 
 class GCodeProperties(DataPlugin):
     """GCodeProperties Plugin"""
 
-    def __init__(self):
+    def __init__(self, blend_tolerance=None):
         super(GCodeProperties, self).__init__()
 
         inifile = os.getenv("INI_FILE_NAME")
@@ -52,14 +167,18 @@ class GCodeProperties(DataPlugin):
         self.ini = linuxcnc.ini(os.getenv("INI_FILE_NAME"))
         self.config_dir = os.path.dirname(inifile)
 
-        self.canon = None
+        self.max_velocity, self.max_acceleration = self._axisLimits()
+        self.max_linear_velocity = self._toInternal(INFO.maxVelocity() / 60)
+        self.blend_tolerance = self._toInternal(
+            blend_tolerance if blend_tolerance is not None
+            else (0.05 if MACHINE_UNITS == 2 else 0.002))
+
+        self.parse_cache = GCodeParseCache(inifile)
+        self.result = None
+        self.parse_cache.parseFinished.connect(self._parse_finished)
         self.stat.file.notify(self._file_event)
         self.loaded_file = None
 
-        temp = self.ini.find("RS274NGC", "PARAMETER_FILE") or "linuxcnc.var"
-        self.parameter_file = os.path.join(self.config_dir, temp)
-        self.temp_parameter_file = os.path.join(self.parameter_file + '.temp')
-
     @DataChannel
     def file_name(self, chan):
         """The current file name.
@@ -221,31 +340,57 @@ class GCodeProperties(DataPlugin):
 
     @DataChannel
     def file_time(self, chan):
-        """The current file run time.
+        """The estimated run time of the current file.
 
         Args:
-            format (str) : Format spec. Defaults to ``%I:%M:%S %p``.
+            format (str) : Format spec. Defaults to ``%H:%M:%S``.
                 See http://strftime.org for supported formats.
 
         Returns:
-            The run time of the loaded file as a formatted string. Default HH:MM:SS AM
+            The estimated run time in seconds, or as a formatted string.
+            Default HH:MM:SS
 
         Channel syntax::
 
-            gcode_properties:time
-            gcode_properties:time?string
-            gcode_properties:time?string&format=%S
+            gcode_properties:file_time
+            gcode_properties:file_time?string
+            gcode_properties:file_time?string&format=%M:%S
 
         """
 
         if not self.loaded_file:
-            chan.value(0)
+            chan.value = 0.0
 
         return chan.value
 
     @file_time.tostring
-    def file_time(self, chan, format="%I:%M:%S %p"):
-        return chan.value.strftime(format)
+    def file_time(self, chan, format="%H:%M:%S"):
+        return time.strftime(format, time.gmtime(chan.value or 0))
+
+    @DataChannel
+    def file_tool_times(self, chan):
+        """The estimated run time of each tool in the current file.
+
+        Args:
+            None
+
+        Returns:
+            Dict of tool number to estimated run time in seconds.
+
+        Channel syntax::
+
+            gcode_properties:file_tool_times
+
+        """
+
+        if not self.loaded_file:
+            chan.value = dict()
+
+        return chan.value
+
+    @file_tool_times.tostring
+    def file_tool_times(self, chan):
+        return chan.value
 
     @DataChannel
     def file_rapid_distance(self, chan):
@@ -372,25 +517,61 @@ class GCodeProperties(DataPlugin):
 
     @DataChannel
     def file_feed(self, chan):
-        """The current file run distance.
+        """The average effective feed of the current file.
 
         Args:
             None
 
         Returns:
-            The distance the machine will run with the loaded file
+            The cutting distance divided by the estimated cutting time, in
+            machine units per minute.
 
         Channel syntax::
 
-            gcode_properties:feed
+            gcode_properties:file_feed
 
         """
+
+        if not self.loaded_file:
+            chan.value = 0.0
+
         return chan.value
 
     @file_feed.tostring
     def file_feed(self, chan):
         return chan.value
 
+    @DataChannel
+    def file_extents(self, chan):
+        """The XYZ extents of the current file.
+
+        Args:
+            None
+
+        Returns:
+            A dict with the ``min`` and ``max`` XYZ extents of the whole
+            path, the ``feed`` and ``traverse`` (min, max) extents of the
+            feed and rapid moves, and the (min, max) extents per tool under
+            ``tools``, all in machine units.
+
+        Channel syntax::
+
+            gcode_properties:file_extents
+
+        """
+
+        if not self.loaded_file:
+            chan.value = dict()
+
+        return chan.value
+
+    @file_extents.tostring
+    def file_extents(self, chan):
+        if 'min' not in chan.value:
+            return ""
+        return ", ".join("{} {:.3f} to {:.3f}".format(axis, a, b) for axis, a, b
+                         in zip('XYZ', chan.value['min'], chan.value['max']))
+
     def initialise(self):
         pass
 
@@ -405,42 +586,30 @@ class GCodeProperties(DataPlugin):
 
         self.loaded_file = file_path
 
-        self.canon = PropertiesCanon()
-
-        if os.path.exists(self.parameter_file):
-            shutil.copy(self.parameter_file, self.temp_parameter_file)
-
-        self.canon.parameter_file = self.temp_parameter_file
+        # the program is parsed off the GUI thread only once and shared
+        # with the backplot, the properties are filled in when it is done
+        self.parse_cache.parseAsync(self.loaded_file)
 
-        # Some initialization g-code to set the units and optional user code
-        unitcode = "G%d" % (20 + (self.stat.linear_units == 1))
-        initcode = self.ini.find("RS274NGC", "RS274NGC_STARTUP_CODE") or ""
+    def _parse_finished(self, result):
+        """" This function gets the parse result of the loaded file """
 
-        # THIS IS WHERE IT ALL HAPPENS: load_preview will execute the code,
-        # call back to the canon with motion commands, and record a history
-        # of all the movements.
-        try:
-            result, seq = gcode.parse(self.loaded_file, self.canon, unitcode, initcode)
+        if result.filename != self.loaded_file:
+            return
 
-            if result > gcode.MIN_ERROR:
-                msg = gcode.strerror(result)
-                LOG.debug(f"Error in {self.loaded_file} line {seq - 1}\n{msg}")
-        except Exception as e:
-            LOG.debug(f"Error {e}")
+        self.result = result
 
-        # clean up temp var file and the backup
-        os.unlink(self.temp_parameter_file)
-        os.unlink(self.temp_parameter_file + '.bak')
+        if self.result.error is not None:
+            LOG.debug(self.result.error)
 
         file_name = self.loaded_file
         file_size = os.stat(self.loaded_file).st_size
-        file_lines = self.canon.num_lines
-        tools = self.canon.tools
-        tool_calls = self.canon.tool_calls
+        file_lines = self.result.num_lines
+        tools = self.result.tool_list
+        tool_calls = self.result.tool_calls
 
-        g0 = sum(self.dist(l[0][:3], l[1][:3]) for l in self.canon.traverse)
-        g1 = (sum(self.dist(l[0][:3], l[1][:3]) for l in self.canon.feed) +
-            sum(self.dist(l[0][:3], l[1][:3]) for l in self.canon.arcfeed))
+        lengths = self.result.segment_lengths()
+        g0 = float(lengths[self.result.mask('traverse')].sum())
+        g1 = float(lengths[self.result.mask('feed', 'arcfeed')].sum())
 
         self.file_name.setValue(file_name)
         self.file_size.setValue(file_size)
@@ -452,18 +621,111 @@ class GCodeProperties(DataPlugin):
         self.file_rapid_distance.setValue(g0)
         self.file_feed_distance.setValue(g1)
 
-        self.file_work_planes.setValue(self.canon.work_planes)
-        self.file_rigid_taps.setValue(self.canon.rigid_taps)
-        self.file_offsets.setValue(self.canon.g5x_offset_dict)
+        self.file_work_planes.setValue(self.result.work_planes)
+        self.file_rigid_taps.setValue(self.result.rigid_taps)
+        self.file_offsets.setValue(self.result.g5x_offsets)
+
+        self.calc_extents()
+        self.calc_time(lengths)
+
+    def calc_extents(self):
+        """Program extents, from the extents recorded during the parse."""
+
+        conv = 25.4 if MACHINE_UNITS == 2 else 1.0
+
+        def extents(**kwargs):
+            min_extents, max_extents = self.result.get_extents(**kwargs)
+            if min_extents[0] > max_extents[0]:
+                return None
+            return [v * conv for v in min_extents], [v * conv for v in max_extents]
+
+        overall = extents()
+        if overall is None:
+            self.file_extents.setValue(dict())
+            return
+
+        tools = {tool: extents(tools=[tool]) for tool in sorted({row[1] for row in self.result.extents})}
+
+        self.file_extents.setValue(dict(min=overall[0],
+                                        max=overall[1],
+                                        feed=extents(line_types=['feed', 'arcfeed']),
+                                        traverse=extents(line_types=['traverse']),
+                                        tools=tools))
+
+    def calc_time(self, lengths):
+        """Estimate the run time, the time per tool and the average feed."""
+
+        times = estimate_run_time(self.result, self.max_velocity, self.max_acceleration,
+                                  self.max_linear_velocity, self.blend_tolerance)
+
+        tools = self.result.tools
+        tool_times = dict()
+        if len(tools):
+            tool_numbers, tool_index = np.unique(tools, return_inverse=True)
+            per_tool = np.bincount(tool_index, weights=times, minlength=len(tool_numbers))
+
+            # dwells count towards the tool in the spindle at the time
+            dwells = self.result.dwells
+            if len(dwells):
+                dwell_index = tool_index[np.clip(dwells[:, 0].astype(int), 0, len(tools) - 1)]
+                per_tool += np.bincount(dwell_index, weights=dwells[:, 1], minlength=len(tool_numbers))
+
+            tool_times = {int(tool): float(t) for tool, t in zip(tool_numbers, per_tool)}
+
+        total = float(times.sum() + self.result.dwells[:, 1].sum())
+
+        cutting = self.result.mask('feed', 'arcfeed')
+        cutting_time = times[cutting].sum()
+        feed = 0.0
+        if cutting_time > 0:
+            feed = float(lengths[cutting].sum() / cutting_time) * 60
+            if MACHINE_UNITS == 2:
+                feed *= 25.4
+
+        LOG.debug("Estimated run time %.1f seconds", total)
+
+        self.file_time.setValue(total)
+        self.file_tool_times.setValue(tool_times)
+        self.file_feed.setValue(feed)
+
+    def _axisLimits(self):
+        """Per axis max velocity and acceleration from the INI, in internal units."""
+
+        max_velocity = np.full(len(AXES), np.inf)
+        max_acceleration = np.full(len(AXES), np.inf)
+
+        for i, axis in enumerate(AXES):
+            section = "AXIS_{}".format(axis)
+            velocity = self.ini.find(section, "MAX_VELOCITY")
+            acceleration = self.ini.find(section, "MAX_ACCELERATION")
+
+            if axis in ROTARY_AXES:
+                conv = 1.0
+            else:
+                conv = self._toInternal(1.0)
+
+            if velocity is not None:
+                max_velocity[i] = float(velocity) * conv
+            if acceleration is not None:
+                max_acceleration[i] = float(acceleration) * conv
+
+        return max_velocity, max_acceleration
+
+    def _toInternal(self, value):
+        """Convert a linear value from machine units to inches."""
+        if MACHINE_UNITS == 2:
+            return value / 25.4
+        return value
 
     def calc_distance(self):
 
         mf = 100.0
 
-        g0 = sum(self.dist(l[0][:3], l[1][:3]) for l in self.canon.traverse)
+        lengths = self.result.segment_lengths()
+
+        g0 = float(lengths[self.result.mask('traverse')].sum())
 
-        g1 = (sum(self.dist(l[0][:3], l[1][:3]) for l in self.canon.feed) +
-            sum(self.dist(l[0][:3], l[1][:3]) for l in self.canon.arcfeed))
+        g1 = float(lengths[self.result.mask('feed', 'arcfeed')].sum())
 
         # gt = (sum(self.dist(l[0][:3], l[1][:3])/min(mf, l[1][0]) for l in self.canon.feed) +
         #     sum(self.dist(l[0][:3], l[1][:3])/min(mf, l[1][0])  for l in self.canon.arcfeed) +
@@ -502,204 +764,3 @@ class GCodeProperties(DataPlugin):
             unit = s.linear_units
         lu = (unit or 1) * 25.4
         return v * lu
-
-
-class PropertiesCanon(BaseCanon):
-
-    def __init__(self):
-        self.num_lines = 0
-        self.tool_calls = 0
-
-        # traverse list - [line number, [start position], [end position], [tlo x, tlo y, tlo z]]
-        self.traverse = []
-
-        # feed list - [line number, [start position], [end position], feedrate, [tlo x, tlo y, tlo z]]
-        self.feed = []
-
-        # arcfeed list - [line number, [start position], [end position], feedrate, [tlo x, tlo y, tlo z]]
-        self.arcfeed = []
-
-        # dwell list - [line number, color, pos x, pos y, pos z, plane]
-        self.dwells = []
-
-        self.work_planes = []
-
-        self.rigid_taps = []
-
-        self.feedrate = 1
-        self.dwell_time = 0
-
-        self.seq_num = -1
-        self.last_pos = (0,) * 9
-
-        self.first_move = True
-        self.in_arc = False
-        self.suppress = 0
-
-        self.plane = 1
-
-        self.arcdivision = 64
-
-        # extents
-        self.min_extents = [9e99, 9e99, 9e99]
-        self.max_extents = [-9e99, -9e99, -9e99]
-        self.min_extents_notool = [9e99, 9e99, 9e99]
-        self.max_extents_notool = [-9e99, -9e99, -9e99]
-
-        # tool length offsets
-        self.tlo_x = 0.0
-        self.tlo_y = 0.0
-        self.tlo_z = 0.0
-        self.tlo_a = 0.0
-        self.tlo_b = 0.0
-        self.tlo_c = 0.0
-        self.tlo_u = 0.0
-        self.tlo_v = 0.0
-        self.tlo_w = 0.0
-        self.tools = list()
-        self.tool_offsets = (0.0,) * 9
-
-        # G92/G52 offsets
-        self.g92_offset_x = 0.0
-        self.g92_offset_y = 0.0
-        self.g92_offset_z = 0.0
-        self.g92_offset_a = 0.0
-        self.g92_offset_b = 0.0
-        self.g92_offset_c = 0.0
-        self.g92_offset_u = 0.0
-        self.g92_offset_v = 0.0
-        self.g92_offset_w = 0.0
-
-        # g5x offsets
-        self.g5x_offset_x = 0.0
-        self.g5x_offset_y = 0.0
-        self.g5x_offset_z = 0.0
-        self.g5x_offset_a = 0.0
-        self.g5x_offset_b = 0.0
-        self.g5x_offset_c = 0.0
-        self.g5x_offset_u = 0.0
-        self.g5x_offset_v = 0.0
-        self.g5x_offset_w = 0.0
-
-        self.g5x_offset_dict = dict()
-
-        # XY rotation (degrees)
-        self.rotation_xy = 0
-        self.rotation_cos = 1
-        self.rotation_sin = 0
-
-    def set_g5x_offset(self, offset, x, y, z, a, b, c, u, v, w):
-        try:
-            self.g5x_offset_dict[str(offset)] = (x, y, z, a, b, c, u, v, w)
-        except Exception as e:
-            LOG.debug(f"straight_traverse: {e}")
-
-    def set_g92_offset(self, x, y, z, a, b, c, u, v, w):
-
-        self.g92_offset_x = x
-        self.g92_offset_y = y
-        self.g92_offset_z = z
-        self.g92_offset_a = z
-        self.g92_offset_b = b
-        self.g92_offset_c = c
-        self.g92_offset_u = u
-        self.g92_offset_v = v
-        self.g92_offset_w = w
-
-    def set_plane(self, plane):
-        self.work_planes.append(plane)
-
-    def set_feed_rate(self, arg):
-        pass
-        # print(("set feed rate", arg))
-
-    def comment(self, comment):
-        pass
-        # print(("#", comment))
-
-    def straight_traverse(self, x, y, z, a, b, c, u, v, w):
-        try:
-            if self.suppress > 0:
-                 return
-
-            pos = self.rotate_and_translate(x, y, z, a, b, c, u, v, w)
-            if not self.first_move:
-                self.traverse.append([self.last_pos, pos])
-
-            self.last_pos = pos
-        except Exception as e:
-            LOG.debug(f"straight_traverse: {e}")
-
-    def straight_feed(self, x, y, z, a, b, c, u, v, w):
-        try:
-            if self.suppress > 0:
-                return
-
-            self.first_move = False
-            pos = self.rotate_and_translate(x, y, z, a, b, c, u, v, w)
-
-            self.feed.append([self.last_pos, pos])
-            self.last_pos = pos
-        except Exception as e:
-            LOG.debug(f"straight_feed: {e}")
-
-    def dwell(self, arg):
-        if arg < .1:
-            print(("dwell %f ms" % (1000 * arg)))
-        else:
-            print(("dwell %f seconds" % arg))
-
-    def arc_feed(self, end_x, end_y, center_x, center_y, rot, end_z, a, b, c, u, v, w):
-        try:
-            if self.suppress > 0:
-                return
-
-            self.first_move = False
-            self.in_arc = True
-            try:
-                # this self.lo goes straight into the c code, cannot be changed
-                self.lo = tuple(self.last_pos)
-                segs = gcode.arc_to_segments(self, end_x, end_y, center_x, center_y,
-                                             rot, end_z, a, b, c, u, v, w, self.arcdivision)
-                self.straight_arcsegments(segs)
-            finally:
-                self.in_arc = False
-        except Exception as e:
-            LOG.debug(f"straight_feed: {e}")
-
-    def get_axis_mask(self):
-        return 7  # XYZ
-
-    def rigid_tap(self, x, y, z):
-        try:
-            if self.suppress > 0:
-                return
-
-            self.rigid_taps.append((x, y, z))
-
-            self.first_move = False
-            pos = self.rotate_and_translate(x, y, z, 0, 0, 0, 0, 0, 0)[:3]
-            pos += self.last_pos[3:]
-
-            self.feed.append([self.last_pos, pos])
-
-        except Exception as e:
-            LOG.debug(f"straight_feed: {e}")
-
-    def change_tool(self, tool):
-        if tool != -1:
-            self.tool_calls += 1
-            self.tools.append(tool)
-
-    def next_line(self, st):
-        self.num_lines += 1
-
-        # state attributes
-        # 'block', 'cutter_side', 'distance_mode', 'feed_mode', 'feed_rate',
-        # 'flood', 'gcodes', 'mcodes', 'mist', 'motion_mode', 'origin', 'units',
-        # 'overrides', 'path_mode', 'plane', 'retract_mode', 'sequence_number',
-        # 'speed', 'spindle', 'stopping', 'tool_length_offset', 'toolchange',
-        # print(("state", st))
-        # print(("seq", st.sequence_number))
-        # print(("MCODES", st.mcodes))
-        # print(("TOOLCHANGE", st.toolchange))
@@ -36,6 +36,9 @@ ToDO:
 
 import math
 
+from functools import partial
+from operator import mul
+
 from qtpyvcp.utilities.info import Info
 from qtpyvcp.utilities.logger import getLogger
 from qtpyvcp.plugins import DataPlugin, DataChannel, getPlugin
@@ -73,6 +76,18 @@ class Position(DataPlugin):
 
         self._current_format = self._imperial_format
 
+        # [channel, inputs function, calc function, last inputs], the values
+        # are only recalculated when their inputs change, and only kept up
+        # to date for channels with subscribers. The others are calculated
+        # when read.
+        self._calcs = (
+            [self.rel, self._relInputs, self._calcRel, None],
+            [self.abs, self._absInputs, self._calcAbs, None],
+            [self.dtg, self._dtgInputs, self._calcDtg, None],
+        )
+        for calc in self._calcs:
+            calc[0].fupdate = partial(self._refresh, calc, False)
+
         self._update()
 
         # all these should cause the positions to update
@@ -134,6 +149,9 @@ class Position(DataPlugin):
         else:
             self._current_format = self._imperial_format
 
+        # emit even if the values did not change, for the new format
+        for calc in self._calcs:
+            calc[3] = None
         self._update()
 
     @DataChannel
@@ -245,36 +263,68 @@ class Position(DataPlugin):
             # STATUS.joint_position.signal.connect(self._update)
 
     def _update(self):
+        """Update the position channels that have subscribers."""
+        for calc in self._calcs:
+            if calc[0].subscribers:
+                self._refresh(calc, True)
+
+    def _refresh(self, calc, emit):
+        chan, inputs_func, calc_func, inputs = calc
+        new_inputs = inputs_func()
+        if new_inputs == inputs:
+            return
+        calc[3] = new_inputs
+
+        value = calc_func(*new_inputs)
+        if emit:
+            chan.setValue(value)
+        else:
+            chan.value = value
 
+    def _position(self):
         if self._report_actual_pos:
-            pos = STAT.actual_position
+            return STAT.actual_position
+        return STAT.position
+
+    def _convertUnits(self):
+        return self._use_program_units and STAT.program_units != MACHINE_UNITS
+
+    def _absInputs(self):
+        return self._position(), self._convertUnits()
+
+    def _relInputs(self):
+        return (self._position(), STAT.g5x_offset, STAT.g92_offset,
+                STAT.tool_offset, STAT.rotation_xy, self._convertUnits())
+
+    def _dtgInputs(self):
+        return STAT.dtg, self._convertUnits()
+
+    def _calcAbs(self, pos, convert):
+        if convert:
+            return tuple(map(mul, pos, CONVERSION_FACTORS))
+        return tuple(pos)
+
+    def _calcRel(self, pos, g5x_offset, g92_offset, tool_offset, rotation_xy, convert):
+        rel = [0.0] * 9
+        if rotation_xy == 0:
+            for axis in INFO.AXIS_NUMBER_LIST:
+                rel[axis] = pos[axis] - g5x_offset[axis] - tool_offset[axis] - g92_offset[axis]
         else:
-            pos = STAT.position
-
-        dtg = STAT.dtg
-        g5x_offset = STAT.g5x_offset
-        g92_offset = STAT.g92_offset
-        tool_offset = STAT.tool_offset
-
-        rel = [0] * 9
-        for axis in INFO.AXIS_NUMBER_LIST:
-            rel[axis] = pos[axis] - g5x_offset[axis] - tool_offset[axis]
-
-        if STAT.rotation_xy != 0:
-            t = math.radians(-STAT.rotation_xy)
-            xr = rel[0] * math.cos(t) - rel[1] * math.sin(t)
-            yr = rel[0] * math.sin(t) + rel[1] * math.cos(t)
-            rel[0] = xr
-            rel[1] = yr
-
-        for axis in INFO.AXIS_NUMBER_LIST:
-            rel[axis] -= g92_offset[axis]
-
-        if STAT.program_units != MACHINE_UNITS and self._use_program_units:
-            pos = [pos[anum] * CONVERSION_FACTORS[anum] for anum in range(9)]
-            rel = [rel[anum] * CONVERSION_FACTORS[anum] for anum in range(9)]
-            dtg = [dtg[anum] * CONVERSION_FACTORS[anum] for anum in range(9)]
-
-        self.rel.setValue(tuple(rel))
-        self.abs.setValue(tuple(pos))
-        self.dtg.setValue(tuple(dtg))
+            for axis in INFO.AXIS_NUMBER_LIST:
+                rel[axis] = pos[axis] - g5x_offset[axis] - tool_offset[axis]
+
+            t = math.radians(-rotation_xy)
+            cos, sin = math.cos(t), math.sin(t)
+            rel[0], rel[1] = rel[0] * cos - rel[1] * sin, rel[0] * sin + rel[1] * cos
+
+            for axis in INFO.AXIS_NUMBER_LIST:
+                rel[axis] -= g92_offset[axis]
+
+        if convert:
+            return tuple(map(mul, rel, CONVERSION_FACTORS))
+        return tuple(rel)
+
+    def _calcDtg(self, dtg, convert):
+        if convert:
+            return tuple(map(mul, dtg, CONVERSION_FACTORS))
+        return tuple(dtg)
@@ -1,27 +1,68 @@
 import os
 import linuxcnc
 
-from qtpy.QtCore import QTimer, QFileSystemWatcher
+from functools import partial
+from operator import attrgetter
+
+from qtpy.QtCore import QFileSystemWatcher
 
 from qtpyvcp.utilities.logger import getLogger
 from qtpyvcp.app.runtime_config import RuntimeConfig
 from qtpyvcp.plugins import DataPlugin, DataChannel
 
 from qtpyvcp.utilities.info import Info
+from qtpyvcp.utilities.stat_snapshot import StatSnapshot
 
 INFO = Info()
 LOG = getLogger(__name__)
-STAT = linuxcnc.stat()
+SNAPSHOT = StatSnapshot()
+STAT = SNAPSHOT.stat
 CMD = linuxcnc.command()
 
 
 IN_DESIGNER = os.getenv('DESIGNER', False)
 
+def itemGetter(items):
+    """Getter returning a tuple with the values of `items` of an object."""
+    if not items:
+        return lambda obj: ()
+    getter = attrgetter(*items)
+    if len(items) == 1:
+        return lambda obj: (getter(obj),)
+    return getter
+
+
 class Status(DataPlugin):
+    """Status plugin.
+
+    The status is polled at `cycle_time` normally. While the machine is
+    moving or the interpreter is busy (running a program, MDI, jogging) it
+    is polled at `fast_cycle_time`, and once the task is idle and nothing has
+    changed for `idle_cycles` cycles it drops to `idle_cycle_time`.
+
+    Args:
+        cycle_time (int) : The normal status poll cycle time, in ms.
+        fast_cycle_time (int) : The poll cycle time while in motion, in ms.
+        idle_cycle_time (int) : The poll cycle time while idle, in ms.
+        idle_cycles (int) : Number of unchanged cycles before the poll rate
+            drops to the idle rate.
+        channel_policies (dict) : Channel name => DataChannel.setPolicy()
+            kwargs. No policies are set by default, see the commented
+            example in the default config.
+    """
 
     stat = STAT
 
-    def __init__(self, cycle_time=100):
+    # Stat items fixed by the INI, which can't be changed by commands at
+    # runtime (unlike max_velocity or debug). These are only checked for
+    # changes every STATIC_UPDATE_CYCLES status cycles.
+    STATIC_ITEMS = ('angular_units', 'axes', 'axis_mask', 'ini_filename',
+                    'joints', 'kinematics_type', 'linear_units',
+                    'num_extrajoints', 'spindles')
+    STATIC_UPDATE_CYCLES = 10
+
+    def __init__(self, cycle_time=100, fast_cycle_time=None, idle_cycle_time=None,
+                 idle_cycles=20, channel_policies=None):
         super(Status, self).__init__()
 
 
@@ -48,11 +89,7 @@ class Status(DataPlugin):
         self.angular_jog_velocity = INFO.getJogVelocity()
 
         if not IN_DESIGNER:
-            try:
-                STAT.poll()
-            except Exception as e:
-                LOG.Error("Unable to poll status channel")
-                LOG.Debug(e)
+            SNAPSHOT.poll()
 
         excluded_items = ['axis', 'joint', 'spindle', 'poll']
 
@@ -69,26 +106,57 @@ class Status(DataPlugin):
                 self.channels[item] = chan
                 setattr(self, item, chan)
 
+        for item in self.old:
+            self.channels[item].fupdate = partial(self._updateItem, item)
+
+        for item, policy in (channel_policies or {}).items():
+            try:
+                self.channels[item].setPolicy(**policy)
+            except KeyError:
+                LOG.warning("Can't set emission policy, no status channel '%s'", item)
+
+        # the polled items are grouped in _groupItems() when the
+        # channel subscriptions change
+        self._item_groups = []
+        self._connection_serial = None
+        self._poll_joints = True
+        self._poll_spindles = True
+        self._cycle_count = 0
+        self._force_update = False
+
         # add joint status channels
+        self._joint_stat = None
         self.joint = tuple(JointStatus(jnum) for jnum in range(9))
         for joint in self.joint:
             for chan, obj in list(joint.channels.items()):
                 self.channels['joint.{}.{}'.format(joint.jnum, chan)] = obj
 
         # add spindle status channels
+        self._spindle_stat = None
         self.spindle = tuple(SpindleStatus(snum) for snum in range(8))
         for spindle in self.spindle:
             for chan, obj in list(spindle.channels.items()):
                 self.channels['spindle.{}.{}'.format(spindle.snum, chan)] = obj
 
+        for joint in self.joint:
+            for chan in joint.channels.values():
+                chan.fupdate = self._updateJoints
+        for spindle in self.spindle:
+            for chan in spindle.channels.values():
+                chan.fupdate = self._updateSpindles
+
         self.all_axes_homed.value = False
         self.homed.notify(self.all_axes_homed.setValue)
         self.enabled.notify(self.all_axes_homed.setValue)
 
-        # Set up the periodic update timer
-        self.timer = QTimer()
+        # the status is updated whenever the shared stat snapshot is polled
+        self.timer = SNAPSHOT.timer
         self._cycle_time = cycle_time
-        self.timer.timeout.connect(self._periodic)
+        self._fast_cycle_time = min(fast_cycle_time or cycle_time, cycle_time)
+        self._idle_cycle_time = max(idle_cycle_time or cycle_time, cycle_time)
+        self._idle_cycles = idle_cycles
+        self._unchanged_cycles = 0
+        SNAPSHOT.updated.connect(self._periodic)
 
         self.on.settable = True
         self.task_state.notify(lambda ts:
@@ -691,6 +759,83 @@ class Status(DataPlugin):
                 return False
         return True
 
+    def forceUpdate(self, item=None):
+        """Force a status item to be updated on the next status cycle.
+
+        The item's channel is set even if the value has not changed, this
+        is needed when a change might happen and be reverted within one
+        status cycle.
+
+        Args:
+            item (str) : The stat item to update, if None all the items
+                are checked for changes on the next cycle.
+        """
+        if item is not None:
+            self.old[item] = None
+        self._force_update = True
+
+    def _groupItems(self):
+        """Group the stat items by how often they need to be checked.
+
+        Only items with subscribed channels, or with setters that need to
+        run on changes, are checked every cycle. The static items and the
+        items nobody is listening to are checked every STATIC_UPDATE_CYCLES
+        cycles, and brought up to date whenever their value is read.
+
+        The items are compared as one tuple per group, and only checked
+        one by one if anything in the group changed.
+        """
+        self._connection_serial = DataChannel.connection_serial
+
+        polled_items = []
+        lazy_items = []
+        for item in self.old:
+            chan = self.channels[item]
+            if item not in self.STATIC_ITEMS \
+                    and (chan.subscribers or chan.fset is not None):
+                polled_items.append(item)
+            else:
+                lazy_items.append(item)
+
+        self._item_groups = [
+            [tuple(polled_items), itemGetter(polled_items), None, 1],
+            [tuple(lazy_items), itemGetter(lazy_items), None, self.STATIC_UPDATE_CYCLES],
+        ]
+
+        self._poll_joints = any(chan.subscribers for joint in self.joint
+                                for chan in joint.channels.values())
+        self._poll_spindles = any(chan.subscribers for spindle in self.spindle
+                                  for chan in spindle.channels.values())
+
+        LOG.debug("Polling %i of %i status items every cycle",
+                  len(polled_items), len(self.old))
+
+    def _updateItem(self, item):
+        """Update an item that is not polled from the last STAT poll."""
+        new_val = getattr(STAT, item)
+        if new_val != self.old[item]:
+            self.old[item] = new_val
+            self.channels[item].setValue(new_val)
+
+    def _updateJoints(self):
+        # the stat joint dicts are rebuilt on every access so only get them once
+        joint_stat = STAT.joint
+        if joint_stat == self._joint_stat:
+            return False
+        self._joint_stat = joint_stat
+        for joint in self.joint:
+            joint._update(joint_stat[joint.jnum])
+        return True
+
+    def _updateSpindles(self):
+        spindle_stat = STAT.spindle
+        if spindle_stat == self._spindle_stat:
+            return False
+        self._spindle_stat = spindle_stat
+        for spindle in self.spindle:
+            spindle._update(spindle_stat[spindle.snum])
+        return True
+
     def forceUpdateStaticChannelMembers(self):
         """Static items need a force update to operate properly with the
         gui rules.  This needs to be done with consideration to the
@@ -710,9 +855,10 @@ class Status(DataPlugin):
             self.file_watcher.addPath(self.file.value)
         self.file_watcher.fileChanged.connect(self.updateFile)
 
-        LOG.debug("Starting periodic updates with %ims cycle time",
-                  self._cycle_time)
-        self.timer.start(self._cycle_time)
+        LOG.debug("Starting periodic updates with %ims cycle time "
+                  "(%ims in motion, %ims when idle)", self._cycle_time,
+                  self._fast_cycle_time, self._idle_cycle_time)
+        SNAPSHOT.start(self._cycle_time)
 
         self.forceUpdateStaticChannelMembers()
 
@@ -730,30 +876,63 @@ class Status(DataPlugin):
 
         # s = time.time()
 
-        try:
-            STAT.poll()
-        except Exception:
-            LOG.warning("Status polling failed, is LinuxCNC running?", exc_info=True)
-            self.timer.stop()
-            return
+        if DataChannel.connection_serial != self._connection_serial:
+            self._groupItems()
+
+        self._cycle_count += 1
+        force = self._force_update
+        self._force_update = False
+        slow_cycle = force or not self._cycle_count % self.STATIC_UPDATE_CYCLES
+        changed = False
 
         # status updates
-        for item, old_val in self.old.items():
-            new_val = getattr(STAT, item)
-            if new_val != old_val:
-                self.old[item] = new_val
-                self.channels[item].setValue(new_val)
+        for group in self._item_groups:
+            items, getter, values, cycles = group
+            if not force and self._cycle_count % cycles:
+                continue
 
-        # joint status updates
-        for joint in self.joint:
-            joint._update()
+            new_values = getter(STAT)
+            if new_values == values and not force:
+                continue
+            group[2] = new_values
+            changed = True
 
-        # spindle status updates
-        for spindle in self.spindle:
-            spindle._update()
+            for item, new_val in zip(items, new_values):
+                if new_val != self.old[item]:
+                    self.old[item] = new_val
+                    self.channels[item].setValue(new_val)
+
+        # joint and spindle status updates
+        if self._poll_joints or slow_cycle:
+            changed |= self._updateJoints()
+
+        if self._poll_spindles or slow_cycle:
+            changed |= self._updateSpindles()
+
+        self._adaptCycleTime(changed)
 
         # print(time.time() - s)
 
+    def _adaptCycleTime(self, changed):
+        """Pick the poll rate for the next cycle from the machine activity."""
+        if STAT.interp_state != linuxcnc.INTERP_IDLE or not STAT.inpos:
+            # running a program or MDI, or jogging
+            self._unchanged_cycles = 0
+            cycle_time = self._fast_cycle_time
+        elif changed:
+            self._unchanged_cycles = 0
+            cycle_time = self._cycle_time
+        else:
+            self._unchanged_cycles += 1
+            if self._unchanged_cycles < self._idle_cycles:
+                cycle_time = self._cycle_time
+            else:
+                cycle_time = self._idle_cycle_time
+
+        if cycle_time != self.timer.interval():
+            LOG.debug("Changing status cycle time to %ims", cycle_time)
+            self.timer.setInterval(cycle_time)
+
 
 class JointStatus(DataPlugin):
     def __init__(self, jnum):
@@ -767,14 +946,18 @@ class JointStatus(DataPlugin):
             self.channels[key] = chan
             setattr(self, key, chan)
 
-    def _update(self):
+    def _update(self, jstat=None):
         """Periodic joint item updates."""
 
-        jstat = list(STAT.joint[self.jnum].items())
-        changed_items = tuple(set(jstat) - set(self.jstat.items()))
-        for item in changed_items:
-            LOG.debug('JOINT_{0} {1}: {2}'.format(self.jnum, item[0], item[1]))
-            self.channels[item[0]].setValue(item[1])
+        if jstat is None:
+            jstat = STAT.joint[self.jnum]
+        if jstat == self.jstat:
+            return
+
+        for key, value in jstat.items():
+            if self.jstat.get(key) != value:
+                LOG.debug('JOINT_%s %s: %s', self.jnum, key, value)
+                self.channels[key].setValue(value)
 
         self.jstat.update(jstat)
 
@@ -791,13 +974,17 @@ class SpindleStatus(DataPlugin):
             self.channels[key] = chan
             setattr(self, key, chan)
 
-    def _update(self):
+    def _update(self, sstat=None):
         """Periodic spindle item updates."""
 
-        sstat = list(STAT.spindle[self.snum].items())
-        changed_items = tuple(set(sstat) - set(self.sstat.items()))
-        for item in changed_items:
-            LOG.debug('Spindle_{0} {1}: {2}'.format(self.snum, item[0], item[1]))
-            self.channels[item[0]].setValue(item[1])
+        if sstat is None:
+            sstat = STAT.spindle[self.snum]
+        if sstat == self.sstat:
+            return
+
+        for key, value in sstat.items():
+            if self.sstat.get(key) != value:
+                LOG.debug('Spindle_%s %s: %s', self.snum, key, value)
+                self.channels[key].setValue(value)
 
         self.sstat.update(sstat)
@@ -21,6 +21,7 @@ import os
 import sys
 import re
 import math
+import time
 import logging
 from enum import Enum, auto
 from typing import List, Dict, Tuple, Union
@@ -161,6 +162,82 @@ class Commands(Enum):
 
 
 
+# Token mapping for line commands. The tokens are matched against the
+# start of the line in the order given here, the first match wins. Each
+# token maps to the line type and the name of the CodeLine parser method.
+TOKENS = {
+    'G0':(Commands.MOVE_LINEAR, 'parse_linear'),
+    'G10':(Commands.PASSTHROUGH, 'parse_passthrough'),
+    'G1':(Commands.MOVE_LINEAR, 'parse_linear'),
+    'G20':(Commands.UNITS, 'set_inches'),
+    'G21':(Commands.UNITS, 'set_mms'),
+    'G2':(Commands.MOVE_ARC, 'parse_arc'),
+    'G3':(Commands.MOVE_ARC, 'parse_arc'),
+    #'M3$0':Commands.BEGIN_CUT,
+    #'M5$0':Commands.END_CUT,
+    #'M3$1':Commands.BEGIN_SCRIBE,
+    #'M5$1':Commands.END_SCRIBE,
+    #'M3$2':Commands.BEGIN_SPOT,
+    #'M5$2':Commands.END_SPOT,
+    #'M5$-1':Commands.END_ALL,
+    #'M190':(Commands.SELECT_PROCESS, 'placeholder'),
+    #'M66P3L3':(Commands.WAIT_PROCESS, 'placeholder'),
+    #'F#<_hal[plasmac.cut-feed-rate]>':Commands.FEEDRATE_MATERIAL,
+    #'M62P1':Commands.ENABLE_IGNORE_ARC_OK_SYNCH,
+    #'M64P1':Commands.ENABLE_IGNORE_ARC_OK_IMMED,
+    #'M63P1':Commands.DISABLE_IGNORE_ARC_OK_SYNCH,
+    #'M65P1':Commands.DISABLE_IGNORE_ARC_OK_IMMED,
+    #'M62P2':Commands.DISABLE_THC_SYNCH,
+    #'M64P2':Commands.DISABLE_THC_IMMED,
+    #'M63P2':Commands.ENABLE_THC_SYNCH,
+    #'M65P2':Commands.ENABLE_THC_IMMED,
+    #'M62P3':Commands.DISABLE_TORCH_SYNCH,
+    #'M64P3':Commands.DISABLE_TORCH_IMMED,
+    #'M63P3':Commands.ENABLE_TORCH_SYNCH,
+    #'M65P3':Commands.ENABLE_TORCH_IMMED,
+    #'M67E3':Commands.FEED_VEL_PERCENT_SYNCH,
+    #'M68E3':Commands.FEED_VEL_PERCENT_IMMED,
+    'G41':(Commands.CUTTER_COMP_LEFT, 'cutter_comp_error'),
+    'G42':(Commands.CUTTER_COMP_RIGHT, 'cutter_comp_error'),
+    'G41.1':(Commands.CUTTER_COMP_LEFT, 'cutter_comp_error'),
+    'G42.1':(Commands.CUTTER_COMP_RIGHT, 'cutter_comp_error'),
+    'G40':(Commands.CUTTER_COMP_OFF, 'placeholder'),
+    'G64':(Commands.PATH_BLENDING, 'parse_passthrough'),
+    'M52':(Commands.ADAPTIVE_FEED, 'parse_passthrough'),
+    'M2':(Commands.PROGRAM_END, 'parse_passthrough'),
+    'M30':(Commands.PROGRAM_END, 'parse_passthrough'),
+    'M3':(Commands.SPINDLE_ON, 'parse_spindle_on'),
+    'M5':(Commands.SPINDLE_OFF, 'parse_spindle_off'),
+    'M190':(Commands.MATERIAL_CHANGE, 'parse_passthrough'),
+    'M66':(Commands.DIGITAL_IN, 'parse_passthrough'),
+    'G90':(Commands.ABSOLUTE, 'parse_passthrough'),
+    'G91':(Commands.RELATIVE, 'parse_passthrough'),
+    'G91.1':(Commands.ARC_RELATIVE, 'parse_passthrough'),
+    'G90.1':(Commands.ARC_ABSOLUTE, 'parse_passthrough'),
+    'F#':(Commands.FEEDRATE_MATERIAL, 'parse_passthrough'),
+    'F':(Commands.FEEDRATE_LINE, 'parse_feedrate'),
+    '#<holes>':(Commands.HOLE_MODE, 'placeholder'),
+    '#<h_diameter>':(Commands.HOLE_DIAM, 'placeholder'),
+    '#<h_velocity>':(Commands.HOLE_VEL, 'placeholder'),
+    '#<oclength>':(Commands.HOLE_OVERCUT, 'placeholder'),
+    '#<pierce-only>':(Commands.PIERCE_MODE, 'placeholder'),
+    #'#<keep-z-motion>':Commands.KEEP_Z,
+    ';':(Commands.COMMENT, 'parse_comment'),
+    '(':(Commands.COMMENT, 'parse_comment'),
+    'T':(Commands.TOOLCHANGE, 'parse_toolchange'),
+    #'(o=':Commands.MAGIC_MATERIAL
+}
+
+# all tokens in one pattern, alternatives are tried in order
+TOKEN_RE = re.compile('|'.join(re.escape(token) for token in TOKENS))
+MULTI_CODE_RE = re.compile(r"G\d+|T\s*\d+|M\d+")
+TOOL_COMBO_RE = re.compile(r"T\s*\d+|M6")
+COMMENT_RE = re.compile(r";|\(")
+XY_WORD_RE = re.compile(r"([XY])([\d\+\.-]*)")
+ARC_WORD_RE = re.compile(r"([XYIJP])([\d\+\.-]*)")
+SPINDLE_RE = re.compile(r"\$\d+")
+
+
 class CodeLine:
 # Class to represent a single line of gcode
 
@@ -184,71 +261,6 @@ class CodeLine:
         self.hole_builder = None
         self.pierce_builder = None
 
-
-        # token mapping for line commands
-        tokens = {
-            'G0':(Commands.MOVE_LINEAR, self.parse_linear),
-            'G10':(Commands.PASSTHROUGH, self.parse_passthrough),
-            'G1':(Commands.MOVE_LINEAR, self.parse_linear),
-            'G20':(Commands.UNITS, self.set_inches),
-            'G21':(Commands.UNITS, self.set_mms),
-            'G2':(Commands.MOVE_ARC, self.parse_arc),
-            'G3':(Commands.MOVE_ARC, self.parse_arc),
-            #'M3$0':Commands.BEGIN_CUT,
-            #'M5$0':Commands.END_CUT,
-            #'M3$1':Commands.BEGIN_SCRIBE,
-            #'M5$1':Commands.END_SCRIBE,
-            #'M3$2':Commands.BEGIN_SPOT,
-            #'M5$2':Commands.END_SPOT,
-            #'M5$-1':Commands.END_ALL,
-            #'M190':(Commands.SELECT_PROCESS, self.placeholder),
-            #'M66P3L3':(Commands.WAIT_PROCESS, self.placeholder),
-            #'F#<_hal[plasmac.cut-feed-rate]>':Commands.FEEDRATE_MATERIAL,
-            #'M62P1':Commands.ENABLE_IGNORE_ARC_OK_SYNCH,
-            #'M64P1':Commands.ENABLE_IGNORE_ARC_OK_IMMED,
-            #'M63P1':Commands.DISABLE_IGNORE_ARC_OK_SYNCH,
-            #'M65P1':Commands.DISABLE_IGNORE_ARC_OK_IMMED,
-            #'M62P2':Commands.DISABLE_THC_SYNCH,
-            #'M64P2':Commands.DISABLE_THC_IMMED,
-            #'M63P2':Commands.ENABLE_THC_SYNCH,
-            #'M65P2':Commands.ENABLE_THC_IMMED,
-            #'M62P3':Commands.DISABLE_TORCH_SYNCH,
-            #'M64P3':Commands.DISABLE_TORCH_IMMED,
-            #'M63P3':Commands.ENABLE_TORCH_SYNCH,
-            #'M65P3':Commands.ENABLE_TORCH_IMMED,
-            #'M67E3':Commands.FEED_VEL_PERCENT_SYNCH,
-            #'M68E3':Commands.FEED_VEL_PERCENT_IMMED,
-            'G41':(Commands.CUTTER_COMP_LEFT, self.cutter_comp_error),
-            'G42':(Commands.CUTTER_COMP_RIGHT, self.cutter_comp_error),
-            'G41.1':(Commands.CUTTER_COMP_LEFT, self.cutter_comp_error),
-            'G42.1':(Commands.CUTTER_COMP_RIGHT, self.cutter_comp_error),
-            'G40':(Commands.CUTTER_COMP_OFF, self.placeholder),
-            'G64':(Commands.PATH_BLENDING, self.parse_passthrough),
-            'M52':(Commands.ADAPTIVE_FEED, self.parse_passthrough),
-            'M2':(Commands.PROGRAM_END, self.parse_passthrough),
-            'M30':(Commands.PROGRAM_END, self.parse_passthrough),
-            'M3':(Commands.SPINDLE_ON, self.parse_spindle_on),
-            'M5':(Commands.SPINDLE_OFF, self.parse_spindle_off),
-            'M190':(Commands.MATERIAL_CHANGE, self.parse_passthrough),
-            'M66':(Commands.DIGITAL_IN, self.parse_passthrough),
-            'G90':(Commands.ABSOLUTE, self.parse_passthrough),
-            'G91':(Commands.RELATIVE, self.parse_passthrough),
-            'G91.1':(Commands.ARC_RELATIVE, self.parse_passthrough),
-            'G90.1':(Commands.ARC_ABSOLUTE, self.parse_passthrough),
-            'F#':(Commands.FEEDRATE_MATERIAL, self.parse_passthrough),
-            'F':(Commands.FEEDRATE_LINE, self.parse_feedrate),
-            '#<holes>':(Commands.HOLE_MODE, self.placeholder),
-            '#<h_diameter>':(Commands.HOLE_DIAM, self.placeholder),
-            '#<h_velocity>':(Commands.HOLE_VEL, self.placeholder),
-            '#<oclength>':(Commands.HOLE_OVERCUT, self.placeholder),
-            '#<pierce-only>':(Commands.PIERCE_MODE, self.placeholder),
-            #'#<keep-z-motion>':Commands.KEEP_Z,
-            ';':(Commands.COMMENT, self.parse_comment),
-            '(':(Commands.COMMENT, self.parse_comment),
-            'T':(Commands.TOOLCHANGE, self.parse_toolchange)
-            #'(o=':Commands.MAGIC_MATERIAL
-            }
-
         # a line could have multiple Gcodes on it. This is typical of the
         # preamble set by many CAM packages.  The processor should not need
         # to change any of this. It should be 'correct'.  So all we need
@@ -256,7 +268,8 @@ class CodeLine:
         # [1] Recognise it is there
         # [2] Scan for any illegal codes, set any error codes if needed
         # [3] Mark line for pass through
-        multi_codes = re.findall(r"G\d+|T\s*\d+|M\d+", line.upper().strip())
+        upper = line.upper()
+        multi_codes = MULTI_CODE_RE.findall(upper.strip())
         if len(multi_codes) > 1:
             LOG.debug(f'Codeline: Multi codes on line detected: {line}')
             # we have multiple codes on the line
@@ -273,37 +286,27 @@ class CodeLine:
                 if code == 'G91':
                     self._parent.set_active_g_modal('G91')
             # look for Tx M6 combo
-            f = re.findall("T\s*\d+|M6", line.upper().strip())
+            f = TOOL_COMBO_RE.findall(upper.strip())
             if len(f) == 2:
                 # we have a tool change combo. Assume in form Tx M6
                 self.parse_toolchange(combo=True)
         else:
             # not a multi code on single line situation so process line
             # to set line type
-            LOG.debug(f'Codeline: Non-Multi code: Scan tokens on line. {line}')
-            for k in tokens:
-                # do regex searches to find exact matches of the token patterns
-                pattern = r"^"+k + r"{1}"
-                if k == '(':
-                    # deal with escaping the '(' which is special char in regex
-                    pattern = r"^\({1}"
-                r = re.search(pattern, line.upper())
-                if r != None:
-                    # since r is NOT None we must have found something
-                    self.type = tokens[k][0]
-                    self.token = k
-                    # call the parser method bound to this key
-                    tokens[k][1]()
-                    # check for an inline comment if the entire line is not a comment
-                    if self.type is not Commands.COMMENT:
-                        self.parse_inline_comment()
-                    # break out of the loop, we found a match
-                    break
-                else:
-                    # nothing of interest just mark the line for pass through processing
-                    self.type = Commands.PASSTHROUGH
+            match = TOKEN_RE.match(upper)
+            if match is not None:
+                # since we have a match we must have found something
+                self.token = match.group()
+                self.type, parser = TOKENS[self.token]
+                # call the parser method bound to this key
+                getattr(self, parser)()
+                # check for an inline comment if the entire line is not a comment
+                if self.type is not Commands.COMMENT:
+                    self.parse_inline_comment()
+            else:
+                # nothing of interest just mark the line for pass through processing
+                self.type = Commands.PASSTHROUGH
             if self.type is Commands.PASSTHROUGH:
-                LOG.debug('Codeline: Command type = PASSTHROUGH: Do further checks, e.g. XY line/')
                 # If the result was seen as 'OTHER' do some further checks
                 # As soon as we shift off being type OTHER, exit the method
                 # 1. is it an XY line
@@ -312,7 +315,7 @@ class CodeLine:
 
 
     def strip_inline_comment(self, line):
-        s = re.split(";|\(", line, 1)
+        s = COMMENT_RE.split(line, 1)
         try:
             return s[0].strip()
         except:
@@ -330,13 +333,10 @@ class CodeLine:
 
     def parse_inline_comment(self):
         # look for possible inline comment
-        s = re.split(";|\(",self.raw[1:],1)
-        robj = re.search(";|\(",self.raw[1:])
+        robj = COMMENT_RE.search(self.raw, 1)
         if robj != None:
-            # found an inline comment. get the char token for the comment
-            i = robj.start() + 1
-            found_c = self.raw[i]
-            self.comment = found_c + s[1]
+            # found an inline comment. take it along with its char token
+            self.comment = self.raw[robj.start():]
         else:
             # no comment found to empty the char token var
             found_c = ''
@@ -358,22 +358,18 @@ class CodeLine:
         self.command = ('G',int(self.token[1:]))
         # split the raw line at the token and then look for X/Y existence
         line = self.raw.upper().split(self.token,1)[1].strip()
-        tokens = re.finditer(r"X[\d\+\.-]*|Y[\d\+\.-]*", line)
-        for token in tokens:
-            params = re.findall(r"X|Y|[\d\+\.-]+", token.group())
-            # this is now a list which can be added to the params dictionary
-            if len(params) == 2:
-                self.params[params[0]] = float(params[1])
+        for word, value in XY_WORD_RE.findall(line):
+            # add the word to the params dictionary if it has a value
+            if value:
+                self.params[word] = float(value)
 
 
     def parse_XY_line(self):
         line = self.raw.upper().strip()
-        tokens = re.finditer(r"X[\d\+\.-]*|Y[\d\+\.-]*", line)
-        for token in tokens:
-            params = re.findall(r"X|Y|[\d\+\.-]+", token.group())
-            # this is now a list which can be added to the params dictionary
-            if len(params) == 2:
-                self.params[params[0]] = float(params[1])
+        for word, value in XY_WORD_RE.findall(line):
+            # add the word to the params dictionary if it has a value
+            if value:
+                self.params[word] = float(value)
             # if we are in the loop then we found X/Y instances so mark the line type
             self.type = Commands.XY
 
@@ -383,19 +379,17 @@ class CodeLine:
         self.command = ('G',int(self.token[1:]))
         # split the raw line at the token and then look for X/Y/I/J/P existence
         line = self.strip_inline_comment(self.raw).upper().split(self.token,1)[1].strip()
-        tokens = re.finditer(r"X[\d\+\.-]*|Y[\d\+\.-]*|I[\d\+\.-]*|J[\d\+\.-]*|P[\d\+\.-]*", line)
-        for token in tokens:
-            params = re.findall(r"X|Y|I|J|P|[\d\+\.-]+", token.group())
-            # this is now a list which can be added to the params dictionary
-            if len(params) == 2:
-                self.params[params[0]] = float(params[1])
+        for word, value in ARC_WORD_RE.findall(line):
+            # add the word to the params dictionary if it has a value
+            if value:
+                self.params[word] = float(value)
 
     def parse_spindle_on(self):
         self.type = Commands.SPINDLE_ON
         self.command = ('M', int(self.token[1:]))
         # split the raw line at the token
         line = self.strip_inline_comment(self.raw).upper().split(self.token,1)[1].strip()
-        params = re.findall('\$\d+', line)
+        params = SPINDLE_RE.findall(line)
         if len(params) == 1:
             self.params['$'] = int(params[0][1:])
         elif len(params) == 0:
@@ -407,7 +401,7 @@ class CodeLine:
         self.command = ('M', int(self.token[1:]))
         # split the raw line at the token
         line = self.strip_inline_comment(self.raw).upper().split(self.token,1)[1].strip()
-        params = re.findall('\$\d+', line)
+        params = SPINDLE_RE.findall(line)
         if len(params) == 1:
             self.params['$'] = int(params[0][1:])
         elif len(params) == 0:
@@ -425,7 +419,7 @@ class CodeLine:
         # Param: combo - if True then line has both Tx and M6
         line = self.strip_inline_comment(self.raw)
         if combo:
-            f = re.findall(r"T\s*\d+|M6", line.upper().strip())
+            f = TOOL_COMBO_RE.findall(line.upper().strip())
             # assume is in format Tx M6
             tool = int(re.split('T', f[0], 1)[1])
             self.type = Commands.PASSTHROUGH
@@ -1010,235 +1004,203 @@ class PreProcessor:
         marking_delay = hal.get_value('qtpyvcp.spot-delay.out')
         
         
-        # old school loop so we can easily peek forward or back of the current
-        # record being processed.
-        i = 0
-        while i < len(self._parsed):
-            line = self._parsed[i]
-            if len(line.command) == 2:
-                if line.command[0] == 'G' and line.command[1] == 3:
-                    # this could be a hole, test for it.
-                    # NB: Only circles that are defined as cww are deemed to be
-                    # a hole.  cw (G2) cuts are deemed as an outer edge not inner.
-                                        
-                    #[1] find the last X and Y position while grp 1 was either G0 or G1
-                    j = i-1
-                    for j in range(j, -1, -1):
-                        prev = self._parsed[j]
-                        # is there an X or Y in the line
-                        if 'X' in prev.params.keys() and prev.active_g_modal_groups[1] in ('G0','G1','G2','G3'):
-                            lastx = prev.params['X']
-                            break
-                    j = i-1
-                    for j in range(j, -1, -1):
-                        prev = self._parsed[j]
-                        # is there an X or Y in the line
-                        if 'Y' in prev.params.keys() and prev.active_g_modal_groups[1] in ('G0','G1','G2','G3'):
-                            lasty = prev.params['Y']
-                            break
-                    endx = line.params['X'] if 'X' in line.params.keys() else lastx
-                    endy = line.params['Y'] if 'Y' in line.params.keys() else lasty
-                    if endx == lastx and endy == lasty:
-                        line.is_hole = True
-                    else:
-                        line.is_hole = False
-
-                    # if line is a hole then prepare to replace
-                    # with "smart" holes IF it is within the upper params of a
-                    # hole definition.  Nomally <= 5 * thickness
-                    if line.is_hole:
-                        line.hole_builder = HoleBuilder()
-                        arc_i = line.params['I']
-                        arc_j = line.params['J']
-                        centre_x = endx + arc_i
-                        centre_y = endy + arc_j
-                        radius = line.hole_builder.line_length(centre_x, centre_y,endx, endy)
-                        diameter = 2 * math.fabs(radius)
-                        circumferance = diameter * math.pi
-                        
-                        # see if can find hidef data for this hole scenario
+        # Single forward sweep over the parsed lines. Rather than scanning
+        # back for the last X/Y position and the M3 that started the cut for
+        # every hole, that state is tracked as we go. Removing the rest of
+        # the cut up to the M5 is deferred to the following lines.
+        hidef_hole = None
+        lastx = lasty = None
+
+        # start of the run of G0 lines ending at the current line
+        g0_run_start = None
+        # last line that started the torch, and where removal of the cut
+        # that follows it would start (including the rapid to the pierce)
+        last_m3 = -1
+        m3_cut_start = 0
+        # last line with no motion mode set, a scan back stops there
+        last_no_motion = -1
+        # range of lines already marked by a previous hole
+        removed_lo = removed_hi = -1
+        remove_to_m5 = False
+
+        def remove_cut(i):
+            # mark the lines of the cut before the hole, back to and
+            # including the M3 and the rapid move to the pierce
+            nonlocal removed_lo, removed_hi, remove_to_m5
+            if last_no_motion > last_m3:
+                start = last_no_motion
+            elif last_m3 >= 0:
+                start = m3_cut_start
+            else:
+                start = 0
+            first = start
+            if removed_lo <= start <= removed_hi + 1:
+                first = max(start, removed_hi + 1)
+            for j in range(first, i):
+                self._parsed[j].type = Commands.REMOVE
+            removed_lo, removed_hi = start, i - 1
+            # and everything after the hole up to the M5
+            remove_to_m5 = True
+
+        for i, line in enumerate(self._parsed):
+            if remove_to_m5:
+                # mark all lines for removal until find M5
+                line.type = Commands.REMOVE
+                if line.token.startswith('M5'):
+                    remove_to_m5 = False
+
+            if len(line.command) == 2 and line.command[0] == 'G' and line.command[1] == 3:
+                # this could be a hole, test for it.
+                # NB: Only circles that are defined as cww are deemed to be
+                # a hole.  cw (G2) cuts are deemed as an outer edge not inner.
+                endx = line.params['X'] if 'X' in line.params.keys() else lastx
+                endy = line.params['Y'] if 'Y' in line.params.keys() else lasty
+                if lastx is not None and lasty is not None and \
+                        endx == lastx and endy == lasty:
+                    line.is_hole = True
+                else:
+                    line.is_hole = False
+
+                # if line is a hole then prepare to replace
+                # with "smart" holes IF it is within the upper params of a
+                # hole definition.  Nomally <= 5 * thickness
+                if line.is_hole:
+                    line.hole_builder = HoleBuilder()
+                    arc_i = line.params['I']
+                    arc_j = line.params['J']
+                    centre_x = endx + arc_i
+                    centre_y = endy + arc_j
+                    radius = line.hole_builder.line_length(centre_x, centre_y,endx, endy)
+                    diameter = 2 * math.fabs(radius)
+                    circumferance = diameter * math.pi
+
+                    # see if can find hidef data for this hole scenario, the
+                    # data only depends on the active process so look it up once
+                    if hidef_hole is None:
                         hidef_data = PLASMADB.hidef_holes(self.active_machineid, self.active_materialid, self.active_thicknessid)
-                        hidef = False
-                        if len(hidef_data) > 0:
-                            # leadinradius
-                            # kerf
-                            # cutheight
-                            # speed1
-                            # speed2
-                            # speed2dist
-                            # offdistance
-                            # overcut
-                            hidef_hole = HiDefHole(hidef_data)
-                            hidef_leadin = hidef_hole.leadin_radius(diameter)
-                            hidef_kerf = hidef_hole.kerf(diameter)
-                            hidef_cutheight = hidef_hole.cut_height(diameter)
-                            hidef_speed1 = hidef_hole.speed1(diameter)
-                            hidef_speed2 = hidef_hole.speed2(diameter)
-                            hidef_speed2dist = hidef_hole.speed2_distance(diameter)
-                            hidef_offdistance = hidef_hole.plasma_off_distance(diameter)
-                            hidef_overcut = hidef_hole.overcut(diameter)
-                            if None not in (hidef_leadin, hidef_kerf, \
-                                            hidef_cutheight, hidef_speed1, \
-                                            hidef_speed2, hidef_speed2dist, \
-                                            hidef_offdistance, hidef_overcut):
-                                hidef = True
-                        
-                        if diameter < small_hole_size and small_hole_detect:
-                            # removde the hole and replace with a pulse
-                            line.hole_builder.\
-                                plasma_mark(line, centre_x, centre_y, marking_delay)
-                            # scan forward and back to mark the M3 and M5 as Coammands.REMOVE
-                            j = i-1
-                            found_m3 = False
-                            for j in range(j, -1, -1):
-                                prev = self._parsed[j]
-                                # mark for removal any lines until find the M3
-                                if prev.token.startswith('M3'):
-                                    found_m3 = True
-                                    prev.type = Commands.REMOVE
-                                if not found_m3:
-                                    prev.type = Commands.REMOVE
-                                try:
-                                    if prev.active_g_modal_groups[1] != 'G0' and found_m3:
-                                        break
-                                    elif prev.active_g_modal_groups[1] == 'G0':
-                                        prev.type = Commands.REMOVE
-                                except KeyError:
-                                    # access to the dictionary index failed,
-                                    # so no longer in a g0 mode
-                                    break
-                            j = i+1
-                            for j in range(j, len(self._parsed)):
-                                next = self._parsed[j]
-                                # mark all lines for removal until find M5
-                                next.type = Commands.REMOVE
-                                if next.token.startswith('M5'):
-                                    next.type = Commands.REMOVE
-                                    break
-                        elif hidef:
-                            arc1_distance = circumferance - hidef_speed2dist - hidef_offdistance
-                            arc2_from_zero = arc1_distance + hidef_speed2dist
-                            arc3_from_zero = arc2_from_zero + hidef_overcut - circumferance
-                            line.hole_builder.\
-                                plasma_hole(line, centre_x, centre_y, diameter, \
-                                            hidef_kerf, hidef_leadin, \
-                                            [arc1_distance, \
-                                             arc2_from_zero, \
-                                             arc3_from_zero], hidef)
-                            
-                            # scan forward and back to mark the M3 and M5 as Coammands.REMOVE
-                            j = i-1
-                            found_m3 = False
-                            for j in range(j, -1, -1):
-                                prev = self._parsed[j]
-                                # mark for removal any lines until find the M3
-                                if prev.token.startswith('M3'):
-                                    found_m3 = True
-                                    prev.type = Commands.REMOVE
-                                if not found_m3:
-                                    prev.type = Commands.REMOVE
-                                try:
-                                    if prev.active_g_modal_groups[1] != 'G0' and found_m3:
-                                        break
-                                    elif prev.active_g_modal_groups[1] == 'G0':
-                                        prev.type = Commands.REMOVE
-                                except KeyError:
-                                    # access to the dictionary index failed,
-                                    # so no longer in a g0 mode
-                                    break
-                            j = i+1
-                            for j in range(j, len(self._parsed)):
-                                next = self._parsed[j]
-                                # mark all lines for removal until find M5
-                                next.type = Commands.REMOVE
-                                if next.token.startswith('M5'):
-                                    next.type = Commands.REMOVE
-                                    break
-                            
-                        elif (diameter <= self.active_thickness * thickness_ratio) or \
-                           (diameter <= max_hole_size):
-                            # Only build the hole of within a certain size of
-                            # Params:
-                            # x:              Hole Centre X position
-                            # y:              Hole Centre y position
-                            # d:              Hole diameter
-                            # kerf:           Kerf width for cut
-                            # leadin_radius:  Radius for the lead in arc
-                            # splits[]:       List of length segments. Segments will support different speeds. +ve is left of 12 o'clock
-                            #                 -ve is right of 12 o'clock
-                            #                 and starting positions of the circle. Including overburn
-                            if leadin_radius == 0:
-                                this_hole_leadin_radius = radius-(radius/4)-(kerf_width/2)
-                            else:
-                                this_hole_leadin_radius = leadin_radius
-                                
-                            arc1_distance = circumferance - arc2_distance - torch_off_distance_before_zero
-                            arc2_from_zero = arc1_distance + arc2_distance
-                            arc3_from_zero = arc2_from_zero + arc3_distance - circumferance
-                            line.hole_builder.\
-                                plasma_hole(line, centre_x, centre_y, diameter, \
-                                            kerf_width, this_hole_leadin_radius, \
-                                            [arc1_distance, \
-                                             arc2_from_zero, \
-                                             arc3_from_zero])
-                            
-                            # scan forward and back to mark the M3 and M5 as Coammands.REMOVE
-                            j = i-1
-                            found_m3 = False
-                            for j in range(j, -1, -1):
-                                prev = self._parsed[j]
-                                # mark for removal any lines until find the M3
-                                if prev.token.startswith('M3'):
-                                    found_m3 = True
-                                    prev.type = Commands.REMOVE
-                                if not found_m3:
-                                    prev.type = Commands.REMOVE
-                                try:
-                                    if prev.active_g_modal_groups[1] != 'G0' and found_m3:
-                                        break
-                                    elif prev.active_g_modal_groups[1] == 'G0':
-                                        prev.type = Commands.REMOVE
-                                except KeyError:
-                                    # access to the dictionary index failed,
-                                    # so no longer in a g0 mode
-                                    break
-                            j = i+1
-                            for j in range(j, len(self._parsed)):
-                                next = self._parsed[j]
-                                # mark all lines for removal until find M5
-                                next.type = Commands.REMOVE
-                                if next.token.startswith('M5'):
-                                    next.type = Commands.REMOVE
-                                    break
+                        hidef_hole = HiDefHole(hidef_data) if len(hidef_data) > 0 else False
+                    hidef = False
+                    if hidef_hole:
+                        # leadinradius
+                        # kerf
+                        # cutheight
+                        # speed1
+                        # speed2
+                        # speed2dist
+                        # offdistance
+                        # overcut
+                        hidef_leadin = hidef_hole.leadin_radius(diameter)
+                        hidef_kerf = hidef_hole.kerf(diameter)
+                        hidef_cutheight = hidef_hole.cut_height(diameter)
+                        hidef_speed1 = hidef_hole.speed1(diameter)
+                        hidef_speed2 = hidef_hole.speed2(diameter)
+                        hidef_speed2dist = hidef_hole.speed2_distance(diameter)
+                        hidef_offdistance = hidef_hole.plasma_off_distance(diameter)
+                        hidef_overcut = hidef_hole.overcut(diameter)
+                        if None not in (hidef_leadin, hidef_kerf, \
+                                        hidef_cutheight, hidef_speed1, \
+                                        hidef_speed2, hidef_speed2dist, \
+                                        hidef_offdistance, hidef_overcut):
+                            hidef = True
+
+                    if diameter < small_hole_size and small_hole_detect:
+                        # removde the hole and replace with a pulse
+                        line.hole_builder.\
+                            plasma_mark(line, centre_x, centre_y, marking_delay)
+                        # mark the M3 and M5 and all between as Coammands.REMOVE
+                        remove_cut(i)
+                    elif hidef:
+                        arc1_distance = circumferance - hidef_speed2dist - hidef_offdistance
+                        arc2_from_zero = arc1_distance + hidef_speed2dist
+                        arc3_from_zero = arc2_from_zero + hidef_overcut - circumferance
+                        line.hole_builder.\
+                            plasma_hole(line, centre_x, centre_y, diameter, \
+                                        hidef_kerf, hidef_leadin, \
+                                        [arc1_distance, \
+                                         arc2_from_zero, \
+                                         arc3_from_zero], hidef)
+
+                        # mark the M3 and M5 and all between as Coammands.REMOVE
+                        remove_cut(i)
+
+                    elif (diameter <= self.active_thickness * thickness_ratio) or \
+                       (diameter <= max_hole_size):
+                        # Only build the hole of within a certain size of
+                        # Params:
+                        # x:              Hole Centre X position
+                        # y:              Hole Centre y position
+                        # d:              Hole diameter
+                        # kerf:           Kerf width for cut
+                        # leadin_radius:  Radius for the lead in arc
+                        # splits[]:       List of length segments. Segments will support different speeds. +ve is left of 12 o'clock
+                        #                 -ve is right of 12 o'clock
+                        #                 and starting positions of the circle. Including overburn
+                        if leadin_radius == 0:
+                            this_hole_leadin_radius = radius-(radius/4)-(kerf_width/2)
                         else:
-                            line.is_hole = False
-                            line.hole_builder = None
-            i += 1
+                            this_hole_leadin_radius = leadin_radius
+
+                        arc1_distance = circumferance - arc2_distance - torch_off_distance_before_zero
+                        arc2_from_zero = arc1_distance + arc2_distance
+                        arc3_from_zero = arc2_from_zero + arc3_distance - circumferance
+                        line.hole_builder.\
+                            plasma_hole(line, centre_x, centre_y, diameter, \
+                                        kerf_width, this_hole_leadin_radius, \
+                                        [arc1_distance, \
+                                         arc2_from_zero, \
+                                         arc3_from_zero])
+
+                        # mark the M3 and M5 and all between as Coammands.REMOVE
+                        remove_cut(i)
+                    else:
+                        line.is_hole = False
+                        line.hole_builder = None
+
+            # update the tracked state with this line
+            motion = line.active_g_modal_groups.get(1)
+            if motion in ('G0','G1','G2','G3'):
+                if 'X' in line.params.keys():
+                    lastx = line.params['X']
+                if 'Y' in line.params.keys():
+                    lasty = line.params['Y']
+
+            if motion == 'G0':
+                if g0_run_start is None:
+                    g0_run_start = i
+            else:
+                g0_run_start = None
+
+            if motion is None:
+                last_no_motion = i
+
+            if line.token.startswith('M3'):
+                last_m3 = i
+                if motion == 'G0':
+                    # the rapid to the pierce, and the M3 before it if any
+                    m3_cut_start = g0_run_start
+                    if m3_cut_start > 0 and self._parsed[m3_cut_start - 1].token.startswith('M3'):
+                        m3_cut_start -= 1
+                else:
+                    m3_cut_start = i
 
     def flag_pierce(self):
-        # old school loop so we can easily peek forward or back of the current
-        # record being processed.
-        i = 0
-        while i < len(self._parsed):
-            line = self._parsed[i]
+        remove_to_m5 = False
+        for line in self._parsed:
+            if remove_to_m5:
+                # mark all lines for removal until find M5
+                line.type = Commands.REMOVE
+                if line.token.startswith('M5'):
+                    remove_to_m5 = False
+
             if len(line.command) == 2:
                 if line.command[0] == 'M' and line.command[1] == 3:
                     # this is a torce start so must be a pierce.
                     line.is_pierce = True
                     line.pierce_builder = PierceBuilder()
-                            
-                    # scan forward to find the M5 and remove all the 
-                    # stuff in the moddle using Coammands.REMOVE
-                    # Aadd in a wiggle for the pierce 
-                    j = i+1
-                    for j in range(j, len(self._parsed)):
-                        next = self._parsed[j]
-                        # mark all lines for removal until find M5
-                        next.type = Commands.REMOVE
-                        if next.token.startswith('M5'):
-                            next.type = Commands.REMOVE
-                            break
-            i += 1
+
+                    # remove all the stuff up to the M5 using Coammands.REMOVE
+                    # Aadd in a wiggle for the pierce
+                    remove_to_m5 = True
         
 
     def parse(self):
@@ -1249,7 +1211,6 @@ class PreProcessor:
         for line in self._orig_gcode:
             self._line_num += 1
             self._line = line.strip()
-            LOG.debug('Parse: Build gcode line.')
             l = CodeLine(self._line, parent=self)
             try:
                 gcode = f'{l.command[0]}{l.command[1]}'
@@ -1345,8 +1306,11 @@ def main():
     # Start cycling through each line of the file and processing it
     LOG.debug('Build preprocessor object and process gcode')
     p = PreProcessor(inCode)
+    start = time.perf_counter()
     p.parse()
-    LOG.debug('Parsing done.')
+    elapsed = time.perf_counter() - start
+    LOG.info(f'Parsing done. {p._line_num} lines in {elapsed:.3f}s '
+             f'({p._line_num / max(elapsed, 1e-9):.0f} lines/sec)')
 
     # Holes flag
     try:
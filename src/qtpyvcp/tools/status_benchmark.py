@@ -0,0 +1,572 @@
+#!/usr/bin/env python3
+
+"""Status Benchmark - measure the cost of the status polling hot path
+
+    Replays machine state traces through a simulated linuxcnc.stat and
+    polls the shared stat snapshot once per trace frame, which runs
+    Status._periodic as the status timer would.
+    For every trace it reports the per cycle latency percentiles and the
+    memory allocated per cycle, once with no channels subscribed and once
+    with a slot connected to every channel, like a VCP showing everything.
+    The number of channel signals emitted is counted in the latter case.
+
+    The built in traces are idle, jog, run and probe. Traces recorded
+    from a running machine with --record can be replayed by passing the
+    file name as the trace.
+
+    LinuxCNC does not need to be running, but the linuxcnc python module
+    must be importable (source rip-environment for a RIP build).
+
+Usage:
+  status_benchmark [--trace=<trace>]... [--cycles=<n>] [--top=<n>]
+  status_benchmark --record=<file> [--cycles=<n>] [--cycle-time=<ms>]
+  status_benchmark (-h | --help)
+
+Options:
+  --trace=<trace>     Built in trace name or a recorded trace file.
+                      Can be given more than once. [default: idle jog run probe]
+  --cycles=<n>        Number of status cycles to run or record. [default: 1000]
+  --top=<n>           Number of busiest channels to list. [default: 5]
+  --record=<file>     Record a trace from the running LinuxCNC to file.
+  --cycle-time=<ms>   Poll interval when recording. [default: 100]
+  -h --help           Show this help and exit.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import types
+import tracemalloc
+
+from collections import Counter
+from functools import partial
+
+from docopt import docopt
+
+STAT_DEFAULTS = {
+    'acceleration': 20.0,
+    'active_queue': 0,
+    'actual_position': (0.0,) * 9,
+    'adaptive_feed_enabled': False,
+    'ain': (0.0,) * 64,
+    'angular_units': 1.0,
+    'aout': (0.0,) * 64,
+    'axes': 3,
+    'axis_mask': 7,
+    'block_delete': False,
+    'call_level': 0,
+    'command': '',
+    'current_line': 0,
+    'current_vel': 0.0,
+    'cycle_time': 0.001,
+    'debug': 0,
+    'delay_left': 0.0,
+    'din': (0,) * 64,
+    'distance_to_go': 0.0,
+    'dout': (0,) * 64,
+    'dtg': (0.0,) * 9,
+    'echo_serial_number': 0,
+    'enabled': True,
+    'estop': 0,
+    'exec_state': 1,
+    'feed_hold_enabled': True,
+    'feed_override_enabled': True,
+    'feedrate': 1.0,
+    'file': '',
+    'flood': 0,
+    'g5x_index': 1,
+    'g5x_offset': (0.0,) * 9,
+    'g92_offset': (0.0,) * 9,
+    'gcodes': (0, 800, -1, 170, 400, -1, 200, 900, 940, 540, 490, 990, 640, -1, 970, 911, 80),
+    'homed': (1, 1, 1) + (0,) * 13,
+    'id': 0,
+    'ini_filename': '',
+    'inpos': True,
+    'input_timeout': False,
+    'interp_state': 1,
+    'interpreter_errcode': 0,
+    'joint_actual_position': (0.0,) * 9,
+    'joint_position': (0.0,) * 9,
+    'joints': 3,
+    'kinematics_type': 1,
+    'limit': (0,) * 16,
+    'linear_units': 1.0,
+    'lube': 0,
+    'lube_level': 0,
+    'max_acceleration': 20.0,
+    'max_velocity': 25.0,
+    'mcodes': (0, -1, 5, -1, 9, -1, 48, -1, 53, -1),
+    'mist': 0,
+    'motion_line': 0,
+    'motion_mode': 1,
+    'motion_type': 0,
+    'num_extrajoints': 0,
+    'optional_stop': False,
+    'paused': False,
+    'pocket_prepped': -1,
+    'position': (0.0,) * 9,
+    'probe_tripped': False,
+    'probe_val': 0,
+    'probed_position': (0.0,) * 9,
+    'probing': False,
+    'program_units': 2,
+    'queue': 0,
+    'queue_full': False,
+    'rapidrate': 1.0,
+    'read_line': 0,
+    'rotation_xy': 0.0,
+    'settings': (0.0, 0.0, 0.0, 0.0, 0.0),
+    'spindles': 1,
+    'state': 1,
+    'task_mode': 1,
+    'task_paused': 0,
+    'task_state': 4,
+    'tool_from_pocket': 0,
+    'tool_in_spindle': 0,
+    'tool_offset': (0.0,) * 9,
+    'tool_table': ((-1, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0),),
+    'velocity': 0.0,
+}
+
+JOINT_DEFAULTS = {
+    'jointType': 1,
+    'units': 1.0,
+    'backlash': 0.0,
+    'min_position_limit': -1000.0,
+    'max_position_limit': 1000.0,
+    'max_ferror': 1.0,
+    'min_ferror': 0.5,
+    'ferror_current': 0.0,
+    'ferror_highmark': 0.0,
+    'output': 0.0,
+    'input': 0.0,
+    'velocity': 0.0,
+    'inpos': 1,
+    'homing': 0,
+    'homed': 1,
+    'fault': 0,
+    'enabled': 1,
+    'min_soft_limit': 0,
+    'max_soft_limit': 0,
+    'min_hard_limit': 0,
+    'max_hard_limit': 0,
+    'override_limits': 0,
+}
+
+SPINDLE_DEFAULTS = {
+    'speed': 0.0,
+    'override': 1.0,
+    'override_enabled': True,
+    'homed': False,
+    'orient_state': 0,
+    'orient_fault': 0,
+    'enabled': 0,
+    'brake': 1,
+    'direction': 0,
+    'increasing': 0,
+}
+
+AXIS_DEFAULTS = {
+    'velocity': 0.0,
+    'min_position_limit': -1000.0,
+    'max_position_limit': 1000.0,
+}
+
+NUM_JOINTS = 16
+NUM_SPINDLES = 8
+NUM_AXES = 9
+
+
+class FakeStat(object):
+    """Scriptable stand in for ``linuxcnc.stat``.
+
+    Every call to `poll()` applies the next frame of the loaded trace. A
+    frame is a dict of changed values, keyed by the stat attribute name,
+    or ``joint.<n>.<key>``, ``spindle.<n>.<key>`` and ``axis.<n>.<key>``
+    for the joint, spindle and axis dicts. Like the real stat object the
+    joint, spindle and axis attributes return new dicts on every access.
+    """
+
+    def __init__(self):
+        self._frames = []
+        self._index = 0
+        self.load([])
+
+    def load(self, frames):
+        """Reset to the default state and load a trace."""
+        self.__dict__.update(STAT_DEFAULTS)
+        self._joints = [dict(JOINT_DEFAULTS) for _ in range(NUM_JOINTS)]
+        self._spindles = [dict(SPINDLE_DEFAULTS) for _ in range(NUM_SPINDLES)]
+        self._axes = [dict(AXIS_DEFAULTS) for _ in range(NUM_AXES)]
+        self._items = {'joint': self._joints, 'spindle': self._spindles, 'axis': self._axes}
+
+        self._frames = frames
+        self._index = 0
+
+    def poll(self):
+        if not self._frames:
+            return
+
+        frame = self._frames[self._index % len(self._frames)]
+        self._index += 1
+
+        for key, value in frame.items():
+            if isinstance(value, list):
+                value = _to_tuple(value)
+
+            name, sep, rest = key.partition('.')
+            if sep:
+                num, sep, item = rest.partition('.')
+                self._items[name][int(num)][item] = value
+            else:
+                setattr(self, key, value)
+
+    @property
+    def joint(self):
+        return tuple(dict(joint) for joint in self._joints)
+
+    @property
+    def spindle(self):
+        return tuple(dict(spindle) for spindle in self._spindles)
+
+    @property
+    def axis(self):
+        return tuple(dict(axis) for axis in self._axes)
+
+    def __dir__(self):
+        return sorted(list(STAT_DEFAULTS) + ['axis', 'joint', 'spindle', 'poll'])
+
+
+class FakeCommand(object):
+    """Stand in for ``linuxcnc.command`` that ignores all commands."""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def _to_tuple(value):
+    if isinstance(value, list):
+        return tuple(_to_tuple(v) for v in value)
+    return value
+
+
+def _stat_values(stat):
+    """Flatten the state of a stat object to a frame dict."""
+    values = {}
+    for name in STAT_DEFAULTS:
+        values[name] = getattr(stat, name, None)
+    for name, count in (('joint', NUM_JOINTS), ('spindle', NUM_SPINDLES), ('axis', NUM_AXES)):
+        for num, item in enumerate(getattr(stat, name)[:count]):
+            for key, value in item.items():
+                values['{}.{}.{}'.format(name, num, key)] = value
+    return values
+
+
+#
+# Built in traces
+#
+
+def idle_trace(cycles):
+    """Machine on and homed, sitting there."""
+    return [{} for _ in range(cycles)]
+
+
+def jog_trace(cycles):
+    """Jogging X back and forth at 10 units/s."""
+    frames = []
+    pos = 0.0
+    vel = 10.0
+    for i in range(cycles):
+        if i % 100 == 0:
+            vel = -vel
+        pos += vel * 0.1
+        position = (pos, 0.0, 0.0) + (0.0,) * 6
+        frames.append({
+            'position': position,
+            'actual_position': position,
+            'joint_position': position,
+            'joint_actual_position': position,
+            'current_vel': abs(vel),
+            'inpos': False,
+            'motion_type': 0,
+            'echo_serial_number': i,
+            'joint.0.output': pos,
+            'joint.0.input': pos,
+            'joint.0.velocity': vel,
+            'joint.0.inpos': 0,
+            'joint.0.ferror_current': 0.0001 * (i % 7),
+            'axis.0.velocity': vel,
+        })
+    return frames
+
+
+def run_trace(cycles):
+    """Running a program, circular moves with the spindle on."""
+    frames = []
+    for i in range(cycles):
+        angle = i * 0.05
+        position = (math.cos(angle) * 50, math.sin(angle) * 50, -1.0) + (0.0,) * 6
+        frame = {
+            'task_mode': 2,
+            'interp_state': 2 if i % 10 else 4,
+            'exec_state': 2 if i % 10 else 3,
+            'motion_type': 2,
+            'queue': 10 + i % 5,
+            'active_queue': 1 + i % 3,
+            'current_line': i // 4,
+            'motion_line': i // 4,
+            'read_line': i // 4 + 10,
+            'position': position,
+            'actual_position': position,
+            'joint_position': position,
+            'joint_actual_position': position,
+            'distance_to_go': 5.0 - (i % 20) * 0.25,
+            'dtg': (1.0 - (i % 20) * 0.05, 0.5, 0.0) + (0.0,) * 6,
+            'current_vel': 16.0 + (i % 4) * 0.1,
+            'inpos': False,
+            'settings': (float(i // 4), 1000.0, 12000.0, 0.0, 0.0),
+            'spindle.0.speed': 12000.0,
+            'spindle.0.enabled': 1,
+            'spindle.0.direction': 1,
+        }
+        for jnum in range(3):
+            frame['joint.{}.output'.format(jnum)] = position[jnum]
+            frame['joint.{}.input'.format(jnum)] = position[jnum]
+            frame['joint.{}.velocity'.format(jnum)] = math.cos(angle + jnum) * 16.0
+            frame['joint.{}.ferror_current'.format(jnum)] = 0.0001 * ((i + jnum) % 5)
+        if i % 100 == 0:
+            frame['gcodes'] = (i, 800 + i % 2 * 10) + STAT_DEFAULTS['gcodes'][2:]
+        frames.append(frame)
+    return frames
+
+
+def probe_trace(cycles):
+    """Repeated Z probing moves, tripping at the bottom of each."""
+    frames = []
+    z = 0.0
+    for i in range(cycles):
+        step = i % 50
+        tripped = step == 49
+        z = -step * 0.2
+        position = (10.0, 10.0, z) + (0.0,) * 6
+        frame = {
+            'task_mode': 3,
+            'motion_type': 5,
+            'probing': not tripped,
+            'probe_val': int(tripped),
+            'probe_tripped': tripped,
+            'position': position,
+            'actual_position': position,
+            'joint_position': position,
+            'joint_actual_position': position,
+            'current_vel': 0.0 if tripped else 2.0,
+            'inpos': tripped,
+            'joint.2.output': z,
+            'joint.2.input': z,
+            'joint.2.velocity': 0.0 if tripped else -2.0,
+        }
+        if tripped:
+            frame['probed_position'] = position
+        frames.append(frame)
+    return frames
+
+
+TRACES = {
+    'idle': idle_trace,
+    'jog': jog_trace,
+    'run': run_trace,
+    'probe': probe_trace,
+}
+
+
+def load_trace(name, cycles):
+    """Get a built in trace or load a recorded one from file."""
+    if name in TRACES:
+        return name, TRACES[name](cycles)
+
+    with open(name, 'r') as fh:
+        data = json.load(fh)
+    return data.get('name', os.path.basename(name)), data['frames']
+
+
+def record_trace(filename, cycles, cycle_time):
+    """Record the stat changes of the running LinuxCNC to a trace file."""
+    import linuxcnc
+
+    stat = linuxcnc.stat()
+    stat.poll()
+    old = _stat_values(stat)
+    frames = [old]
+
+    for _ in range(cycles):
+        time.sleep(cycle_time / 1000.0)
+        stat.poll()
+        new = _stat_values(stat)
+        frames.append({key: value for key, value in new.items() if old.get(key) != value})
+        old = new
+
+    name = os.path.splitext(os.path.basename(filename))[0]
+    with open(filename, 'w') as fh:
+        json.dump({'name': name, 'frames': frames}, fh)
+
+    print("Recorded {} cycles to {}".format(cycles, filename))
+
+
+#
+# Benchmark
+#
+
+def install_fake_linuxcnc(stat):
+    """Make ``linuxcnc.stat()`` return the fake stat object.
+
+    Must be called before any qtpyvcp module that polls status is imported.
+    """
+    import linuxcnc
+
+    fake = types.ModuleType('linuxcnc')
+    fake.__dict__.update(linuxcnc.__dict__)
+    fake.stat = lambda: stat
+    fake.command = FakeCommand
+    sys.modules['linuxcnc'] = fake
+
+
+def percentile(values, pct):
+    """Percentile of a sorted list."""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[index]
+
+
+def status_channels(status):
+    """All the channels of the status, including the joint and spindle ones."""
+    for name, chan in status.channels.items():
+        yield name, chan
+    for items, prefix in ((status.joint, 'joint'), (status.spindle, 'spindle')):
+        for index, item in enumerate(items):
+            for name, chan in item.channels.items():
+                yield '{}[{}].{}'.format(prefix, index, name), chan
+
+
+def run_trace_benchmark(status, stat, frames, top=5, subscribed=False):
+    """Replay a trace through ``Status._periodic`` and collect the numbers.
+
+    Args:
+        subscribed (bool) : If True a slot is connected to every channel for
+            the whole run, like a VCP showing everything, and the signals are
+            counted. Otherwise nothing is subscribed and only the channels
+            that need to be polled regardless are checked every cycle.
+    """
+    from qtpyvcp.utilities.stat_snapshot import StatSnapshot
+
+    # polling the snapshot runs Status._periodic through its updated signal
+    periodic = StatSnapshot().poll
+
+    counts = Counter()
+    slots = []
+    if subscribed:
+        for name, chan in status_channels(status):
+            slot = partial(_count_signal, counts, name)
+            chan.signal.connect(slot)
+            slots.append((chan, slot))
+
+    def replay():
+        # the first frame brings the status in sync and regroups the polled
+        # items for the current subscriptions, it is not measured
+        stat.load(frames)
+        periodic()
+        counts.clear()
+    cycles = max(len(frames) - 1, 0)
+
+    # latency
+    replay()
+    latency = []
+    for _ in range(cycles):
+        start = time.perf_counter()
+        periodic()
+        latency.append((time.perf_counter() - start) * 1e6)
+    latency.sort()
+
+    # allocations, the signals are counted over this second replay
+    replay()
+
+    peak_bytes = 0
+    net_bytes = 0
+    tracemalloc.start()
+    for _ in range(cycles):
+        before = tracemalloc.get_traced_memory()[0]
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        periodic()
+        current, peak = tracemalloc.get_traced_memory()
+        peak_bytes += max(peak, current) - before
+        net_bytes += current - before
+    tracemalloc.stop()
+
+    for chan, slot in slots:
+        chan.signal.disconnect(slot)
+
+    cycles = cycles or 1
+    return {
+        'cycles': len(latency),
+        'mean': sum(latency) / cycles,
+        'p50': percentile(latency, 50),
+        'p90': percentile(latency, 90),
+        'p99': percentile(latency, 99),
+        'max': latency[-1] if latency else 0.0,
+        'alloc': peak_bytes / cycles,
+        'retained': net_bytes / cycles,
+        'signals': sum(counts.values()) / cycles if subscribed else None,
+        'top': counts.most_common(top),
+    }
+
+
+def _count_signal(counts, name, *args):
+    counts[name] += 1
+
+
+def print_results(name, results):
+    signals = results['signals']
+    signals = '{:7.2f}/cycle'.format(signals) if signals is not None else '{:>7}'.format('-')
+    print("{name:<16} {cycles:>6} cycles  mean {mean:8.1f} us  p50 {p50:8.1f}  p90 {p90:8.1f}  "
+          "p99 {p99:8.1f}  max {max:8.1f}  alloc {alloc:9.0f} B/cycle  "
+          "retained {retained:7.0f} B/cycle  signals {signals}"
+          .format(**dict(results, name=name, signals=signals)))
+    for chan, count in results['top']:
+        print("{:>26} {:>8}  {}".format('', count, chan))
+
+
+def main():
+    raw_args = docopt(__doc__)
+
+    cycles = int(raw_args['--cycles'])
+
+    if raw_args['--record']:
+        record_trace(raw_args['--record'], cycles, float(raw_args['--cycle-time']))
+        return
+
+    traces = []
+    for arg in raw_args['--trace']:
+        traces.extend(arg.split())
+
+    stat = FakeStat()
+    install_fake_linuxcnc(stat)
+
+    from qtpy.QtCore import QCoreApplication
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+
+    from qtpyvcp.plugins.status import Status
+    status = Status()
+
+    for trace in traces:
+        name, frames = load_trace(trace, cycles + 1)
+        for subscribed, case in ((False, 'no subs'), (True, 'all subs')):
+            results = run_trace_benchmark(status, stat, frames, int(raw_args['--top']),
+                                          subscribed=subscribed)
+            print_results('{} ({})'.format(name, case), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -18,8 +18,11 @@
 #   You should have received a copy of the GNU General Public License
 #   along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import linuxcnc, time, threading, subprocess, os, json
-from qtpy.QtCore import QObject, QTimer, Signal
+import linuxcnc, time, threading, os, json
+import hal
+from qtpy.QtCore import QObject, Signal
+
+from qtpyvcp.utilities.stat_snapshot import StatSnapshot
 
 # Setup logging
 try:
@@ -106,11 +109,7 @@ class StatusItem(QObject):
             self.valueChanged.disconnect()
 
     def getValue(self):
-        try:
-            self.stat.poll() # get fresh data
-        except Exception as e:
-            log.exception(e)
-            return
+        # read from the shared snapshot, which is kept fresh by the poll timer
         val = getattr(self.stat, self.attr_name)
         if self.index is not None:
             val = val[self.index]
@@ -138,29 +137,23 @@ class StatusItem(QObject):
 
 
 class StatusPoller(QObject):
-    """docstring for StatusPoller"""
-
-    stat = linuxcnc.stat()
-    timer = QTimer()
+    """Updates the StatusItems from the shared stat snapshot."""
 
     def __init__(self):
         super(StatusPoller, self).__init__()
 
         self.status_items = {}
 
-        # Start the timer
-        self._cycle_time = 75
-        self.timer.timeout.connect(self._poll)
-        self.timer.start(self._cycle_time)
+        # the status plugin normally drives the shared snapshot, only
+        # start polling here if nothing else has
+        self.snapshot = StatSnapshot()
+        self.stat = self.snapshot.stat
+        self.timer = self.snapshot.timer
+        self.snapshot.updated.connect(self._poll)
+        self.snapshot.start()
 
     def _poll(self):
         # s = time.time()
-        try:
-            self.stat.poll()
-        except Exception as e:
-            log.warning("Status polling failed, is LinuxCNC running?", exc_info=e)
-            self.timer.stop()
-            return
         for status_item in list(self.status_items.values()):
             try:
                 status_item.update()
@@ -257,12 +250,12 @@ class HALPin(QObject):
             self.valueChanged[self.type].disconnect()
 
     def getValue(self):
-        data = subprocess.check_output(['halcmd', '-s', 'show', 'pin', self.pin_name]).split()
-        return self.convertType(data[3])
+        return self.convertType(hal.get_value(self.pin_name))
 
     def setValue(self, value):
         if self.settable:
-            return subprocess.call(['halcmd', 'setp', self.pin_name, str(value)])
+            hal.set_p(self.pin_name, str(value))
+            return 0
         raise TypeError("setValue failed, HAL pin '{}' is read only".format(self.pin_name))
 
     def getSettable(self):
@@ -279,13 +272,27 @@ class HALPin(QObject):
         return self.log_change
 
     def convertType(self, value):
-        if self.type == bool:
+        if self.type == bool and isinstance(value, str):
             return value.lower() in ['true', '1']
         return self.type(value)
 
 
 class HALPoller(QObject):
     """docstring for StatusPoller"""
+
+    TYPE_NAMES = {
+        hal.HAL_FLOAT: 'float',
+        hal.HAL_S32: 's32',
+        hal.HAL_U32: 'u32',
+        hal.HAL_BIT: 'bit',
+    }
+
+    DIR_NAMES = {
+        hal.HAL_IN: 'IN',
+        hal.HAL_OUT: 'OUT',
+        hal.HAL_IO: 'I/O',
+    }
+
     def __init__(self):
         super(HALPoller, self).__init__()
 
@@ -294,17 +301,17 @@ class HALPoller(QObject):
 
         self.status_items = {}
         self.pin_dict = {}
-        self.sig_dict = {}
 
-        # Create a thread for checking the HAL pins and sigs
+        # Create a thread for checking the HAL pins
         self.hal_mutex = threading.Lock()
         self.hal_thread = threading.Thread(target=self.hal_poll_thread)
         self.hal_thread.daemon = True
         self.hal_thread.start()
 
 
-    # halcmd can take 200ms or more to run, so run poll updates in a thread so as not to slow the server
-    # requests for hal pins and sigs will read the results from the most recent update
+    # the watched pins are read straight from HAL shared memory, so run the
+    # poll updates in a thread so as not to slow the GUI, requests for hal
+    # pins will read the results from the most recent update
     def hal_poll_thread(self):
 
         while True:
@@ -318,7 +325,6 @@ class HALPoller(QObject):
                         log.debug("LinuxCNC has stopped.")
                     self.linuxcnc_is_alive = False
                     self.pin_dict = {}
-                    self.sig_dict = {}
                 finally:
                     self.hal_mutex.release()
                 time.sleep(self.cycle_time/1000.0)
@@ -328,39 +334,21 @@ class HALPoller(QObject):
                     log.debug("LinuxCNC has started.")
                 self.linuxcnc_is_alive = True
 
-            self.p = subprocess.Popen( ['halcmd', '-s', 'show', 'pin'] , stderr=subprocess.PIPE, stdout=subprocess.PIPE )
-            rawtuple = self.p.communicate()
-            if len(rawtuple[0]) <= 0:
-                time.sleep(self.cycle_time/1000.0)
-                continue
-            raw = rawtuple[0].split('\n')
-
-            pins = [ [a for a in [x.strip() for x in line.split(' ')] if a != ''] for line in raw ]
+            pin_dict = self.readPins(list(self.status_items.keys()))
 
             # UPDATE THE DICTIONARY OF PIN INFO
             # Acquire the mutex so we don't step on other threads
             self.hal_mutex.acquire()
             try:
-                pin_dict = {}
-                sig_dict = {}
-
-                for p in pins:
-                    if len(p) > 5:
-                        # if there is a signal listed on this pin, make sure
-                        # that signal is in our signal dictionary
-                        sig_dict[ p[6] ] = p[3]
-                    if len(p) >= 5:
-                        pin_dict[ p[4] ] = p[3]
+                changed_items = [item for item in pin_dict.items()
+                                 if self.pin_dict.get(item[0]) != item[1]]
+                self.pin_dict = pin_dict
             finally:
                 self.hal_mutex.release()
 
-            changed_items = set(pin_dict.items()) - set(self.pin_dict.items())
             # for item in changed_items:
             #     print('HAL pin Changed: {} => {}'.format(item[0], item[1]))
 
-            self.pin_dict = pin_dict
-            self.sig_dict = sig_dict
-
             for changed_item in changed_items:
                 if changed_item[0] in self.status_items:
                     self.status_items[changed_item[0]].update(changed_item[1])
@@ -371,21 +359,43 @@ class HALPoller(QObject):
             # before starting the next check, sleep a little so we don't use all the CPU
             time.sleep(self.cycle_time/1000.0)
 
+    def readPins(self, pin_names):
+        """Read the values of many HAL pins in one go.
+
+        Args:
+            pin_names (list) : The names of the HAL pins to read.
+
+        Returns:
+            dict : pin name => value, pins that could not be read are left out.
+        """
+        get_value = hal.get_value
+        values = {}
+        for pin_name in pin_names:
+            try:
+                values[pin_name] = get_value(pin_name)
+            except Exception as e:
+                log.debug("Failed to read HAL pin '{}': {}".format(pin_name, e))
+        return values
+
     def getHALPin(self, pin_name):
         si = self.status_items.get(pin_name)
         if si is None:
-            raw = subprocess.check_output(['halcmd', '-s', 'show', 'pin', pin_name]).strip()
-            if len(raw.split('\n')) > 1: # more than one pin name matches
-                raise ValueError("HAL pin red<{}> does not exist".format(pin_name))
-            pin_data = raw.split()
-            if len(pin_data) == 0: # no pin names match
+            try:
+                pins = hal.get_info_pins()
+            except Exception as e:
+                raise ValueError("HAL pin red<{}> does not exist: {}".format(pin_name, e))
+
+            matches = [pin for pin in pins if pin['NAME'].startswith(pin_name)]
+            exact = [pin for pin in matches if pin['NAME'] == pin_name]
+            if not exact:
+                if len(matches) == 1: # name is not complete, but only one pin could match
+                    raise ValueError("HAL pin red<{}> does not exist, did you mean green<{}>?".format(pin_name, matches[0]['NAME']))
                 raise ValueError("HAL pin red<{}> does not exist".format(pin_name))
-                return
-            if pin_name != pin_data[4]: # name is not complete, but only one pin could match
-                raise ValueError("HAL pin red<{}> does not exist, did you mean green<{}>?".format(pin_name, pin_data[4]))
-            pin_type = pin_data[1].strip()
-            pin_direction = pin_data[2].strip()
-            pin_value = pin_data[3].strip()
+
+            pin_data = exact[0]
+            pin_type = self.TYPE_NAMES.get(pin_data['TYPE'])
+            pin_direction = self.DIR_NAMES.get(pin_data['DIRECTION'])
+            pin_value = pin_data['VALUE']
             log.debug("Adding new HALStatusItem for pin '{}'".format(pin_name))
             si = HALPin(pin_name, pin_type, pin_direction, pin_value)
             self.status_items[pin_name] = si
@@ -0,0 +1,101 @@
+"""Shared LinuxCNC status snapshot.
+
+Every ``linuxcnc.stat.poll()`` is an NML round trip to the task, so rather
+than each consumer polling its own stat object there is one shared stat
+object, polled by one timer. Consumers read the values of the last poll from
+``StatSnapshot().stat`` and connect to the ``updated`` signal to be told when
+there is a new snapshot.
+
+Usage::
+
+    from qtpyvcp.utilities.stat_snapshot import StatSnapshot
+
+    SNAPSHOT = StatSnapshot()
+    STAT = SNAPSHOT.stat
+
+    SNAPSHOT.updated.connect(lambda: print(STAT.position))
+    SNAPSHOT.start(75)
+"""
+
+import time
+
+import linuxcnc
+
+from qtpy.QtCore import QObject, QTimer, Signal
+
+from qtpyvcp.utilities.logger import getLogger
+
+LOG = getLogger(__name__)
+
+
+class StatSnapshot(object):
+    """Ensures only one instance of _StatSnapshot exists per python interpretor.
+    """
+    _instance = None
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = _StatSnapshot()
+        return cls._instance
+
+
+class _StatSnapshot(QObject):
+    """Shared stat object polled on a single timer.
+
+    Attributes:
+        stat (linuxcnc.stat) : The shared stat object, holds the values
+            of the last poll.
+        timestamp (float) : ``time.monotonic()`` of the last successful poll.
+        serial (int) : Number of successful polls so far.
+        timer (QTimer) : The poll timer.
+    """
+
+    updated = Signal()
+
+    DEFAULT_CYCLE_TIME = 75
+
+    def __init__(self):
+        super(_StatSnapshot, self).__init__()
+
+        self.stat = linuxcnc.stat()
+        self.timestamp = 0.0
+        self.serial = 0
+
+        self.timer = QTimer()
+        self.timer.setInterval(self.DEFAULT_CYCLE_TIME)
+        self.timer.timeout.connect(self.poll)
+
+    def start(self, cycle_time=None):
+        """Start polling, if not already running.
+
+        Args:
+            cycle_time (int, optional) : The poll cycle time in ms, if given
+                also changes the cycle time of an already running timer.
+        """
+        if cycle_time is not None and cycle_time != self.timer.interval():
+            self.timer.setInterval(cycle_time)
+        if not self.timer.isActive():
+            LOG.debug("Starting status polling with %ims cycle time",
+                      self.timer.interval())
+            self.timer.start()
+
+    def age(self):
+        """Time in seconds since the last successful poll."""
+        return time.monotonic() - self.timestamp
+
+    def poll(self):
+        """Take a new snapshot and notify the consumers.
+
+        Returns:
+            bool : True if the poll succeeded.
+        """
+        try:
+            self.stat.poll()
+        except Exception:
+            LOG.warning("Status polling failed, is LinuxCNC running?", exc_info=True)
+            self.timer.stop()
+            return False
+
+        self.timestamp = time.monotonic()
+        self.serial += 1
+        self.updated.emit()
+        return True
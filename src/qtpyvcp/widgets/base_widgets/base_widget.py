@@ -9,7 +9,7 @@ all other QtPyVCP widgets are based.
 import os
 import json
 
-from qtpy.QtCore import Property, Slot
+from qtpy.QtCore import Property, Slot, QTimer
 from qtpy.QtWidgets import QPushButton
 
 from qtpyvcp.plugins import getPlugin
@@ -28,6 +28,72 @@ class ChanList(list):
         return super(ChanList, self).__getitem__(index)()
 
 
+class RuleEvaluator(object):
+    """Rule expression evaluator.
+
+    Evaluates a rule expression and passes the result to the widget
+    property setter. The compiled expression is shared between all rules
+    with the same expression text, and the setter is only called when the
+    result differs from the last value any rule of the widget passed to
+    the same setter.
+
+    Args:
+        widget (VCPBaseWidget) : The widget the rule applies to.
+        setter (str) : Name of the widget method to pass the result to.
+        expression (str) : The rule expression.
+        channels (ChanList) : The channel values available as ``ch``.
+        coalesce (bool) : If True, evaluation is deferred to the next event
+            loop iteration so that all the triggers emitted during one status
+            cycle only result in a single evaluation.
+    """
+
+    _code_cache = {}
+    _unset = object()
+
+    def __init__(self, widget, setter, expression, channels, coalesce=False):
+        self.setter = getattr(widget, setter)
+        self.setter_name = setter
+        self.code = self.compile(expression)
+        self.env = {'ch': channels, 'widget': widget}
+        self.coalesce = coalesce
+
+        # last values per setter, shared by all the rules of the widget
+        # as several rules can drive the same property
+        try:
+            self._last_values = widget._rule_values
+        except AttributeError:
+            self._last_values = widget._rule_values = {}
+        self._pending = False
+
+    @classmethod
+    def compile(cls, expression):
+        """Compile an expression, reusing the code if already compiled."""
+        code = cls._code_cache.get(expression)
+        if code is None:
+            code = compile(expression, '<rule>', 'eval')
+            cls._code_cache[expression] = code
+        return code
+
+    def __call__(self, *args):
+        if not self.coalesce:
+            self.evaluate()
+        elif not self._pending:
+            self._pending = True
+            QTimer.singleShot(0, self._evaluatePending)
+
+    def _evaluatePending(self):
+        self._pending = False
+        self.evaluate()
+
+    def evaluate(self):
+        """Evaluate the expression and update the widget if changed."""
+        value = eval(self.code, self.env)
+        last_value = self._last_values.get(self.setter_name, self._unset)
+        if value != last_value or type(value) is not type(last_value):
+            self._last_values[self.setter_name] = value
+            self.setter(value)
+
+
 class VCPPrimitiveWidget(object):
     """VCPPrimitiveWidget.
 
@@ -53,6 +119,10 @@ class VCPBaseWidget(VCPPrimitiveWidget):
     """
     IN_DESIGNER = os.getenv('DESIGNER') != None
 
+    # defer rule evaluation so each status cycle only evaluates a rule once,
+    # can also be set per rule with the "coalesce" key
+    COALESCE_RULES = False
+
     DEFAULT_RULE_PROPERTY = 'None'
     RULE_PROPERTIES = {
         'None': ['None', None],
@@ -187,14 +257,12 @@ class VCPBaseWidget(VCPPrimitiveWidget):
                 self._data_channels = ch
                 continue
 
-            eval_env = {'ch': ch, 'widget': self}
-            eval_exp = 'lambda: widget.{}({})'.format(
-                            prop[0], rule['expression']).encode('utf-8')
-            exp = eval(eval_exp, eval_env)
+            exp = RuleEvaluator(self, prop[0], rule['expression'], ch,
+                                coalesce=rule.get('coalesce', self.COALESCE_RULES))
 
             # initial call to update
             try:
-                exp()
+                exp.evaluate()
             except:
                 LOG.exception('Error calling rules expression:')
                 continue
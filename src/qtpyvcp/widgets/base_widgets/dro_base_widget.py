@@ -5,8 +5,9 @@ DROBaseWidget
 """
 
 from enum import IntEnum
+from functools import partial
 
-from qtpy.QtCore import Slot, Property
+from qtpy.QtCore import Slot, Property, QObject, QTimer, QEvent
 
 from qtpyvcp.plugins import getPlugin
 from qtpyvcp.utilities.settings import getSetting
@@ -43,6 +44,101 @@ class LatheMode(IntEnum):
     Diameter = 2  # Always show diameter
 
 
+class DROUpdateManager(object):
+    """Ensures only one instance of _DROUpdateManager exists per python interpretor.
+    """
+    _instance = None
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = _DROUpdateManager()
+        return cls._instance
+
+
+class _DROUpdateManager(QObject):
+    """Batched DRO updates.
+
+    The abs, rel and dtg position channels all emit in the same status
+    cycle, so rather than every DRO formatting and setting its text on
+    every emission the DROs are registered here, and updated in one pass
+    once control gets back to the event loop. Hidden DROs are skipped,
+    and updated when they are shown.
+
+    DROs provide ``positionChannel()``, the name of the position plugin
+    channel they show, and ``updateValue(pos=None)``.
+    """
+
+    def __init__(self):
+        super(_DROUpdateManager, self).__init__()
+
+        self.pos = getPlugin('position')
+
+        self._widgets = []
+        self._channels = set()
+        self._changed = set()
+        self._stale = set()
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._update)
+
+    def addWidget(self, widget):
+        """Register a DRO to be updated when its position changes."""
+        self._subscribe(widget.positionChannel())
+
+        self._widgets.append(widget)
+        widget.installEventFilter(self)
+        widget.destroyed.connect(partial(self._removeWidget, widget))
+
+    def refTypeChanged(self, widget):
+        """Follow a DRO that switched to another position channel."""
+        if widget not in self._widgets:
+            return
+
+        self._subscribe(widget.positionChannel())
+        widget.updateValue()
+
+    def _subscribe(self, channel):
+        if channel not in self._channels:
+            self._channels.add(channel)
+            getattr(self.pos, channel).notify(partial(self._positionChanged, channel))
+
+    def _removeWidget(self, widget, *args):
+        self._widgets.remove(widget)
+        self._stale.discard(widget)
+
+    def _positionChanged(self, channel, *args):
+        self._changed.add(channel)
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def _update(self):
+        changed = self._changed
+        self._changed = set()
+
+        positions = {}
+        for widget in self._widgets:
+            channel = widget.positionChannel()
+            if channel not in changed:
+                continue
+
+            if not widget.isVisible():
+                self._stale.add(widget)
+                continue
+
+            pos = positions.get(channel)
+            if pos is None:
+                pos = positions[channel] = getattr(self.pos, channel).getValue()
+
+            widget.updateValue(pos)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Show and obj in self._stale:
+            self._stale.discard(obj)
+            obj.updateValue()
+        return False
+
+
 class DROBaseWidget(VCPWidget):
     """DROBaseWidget
 
@@ -75,6 +171,7 @@ class DROBaseWidget(VCPWidget):
         self._is_lathe = INFO.getIsLathe()
         self._g7_active = False
         self._lathe_mode = LatheMode.Auto  # latheDiameterMode
+        self._scale = 1
 
         self._fmt = self._in_fmt
         self._input_type = 'number:float'
@@ -108,7 +205,7 @@ class DROBaseWidget(VCPWidget):
         self.updateValue()
 
     def initialize(self):
-        getattr(self.pos, self._ref_typ.name).notify(self.updateValue)
+        DROUpdateManager().addWidget(self)
         self.updateValue()
 
         if self._is_lathe:
@@ -131,23 +228,34 @@ class DROBaseWidget(VCPWidget):
                 pass
 
     def updateDiameterMode(self, gcodes):
-        self._g7_active = 'G7' in gcodes
-        self.updateValue()
+        g7_active = 'G7' in gcodes
+        if g7_active != self._g7_active:
+            self._g7_active = g7_active
+            self.updateScale()
+            self.updateValue()
+
+    def updateScale(self):
+        """Update the scale applied to the position for the lathe mode."""
+        if self._is_lathe and self._anum == Axis.X and \
+                (self._lathe_mode == LatheMode.Diameter or
+                 (self._lathe_mode == LatheMode.Auto and self._g7_active)):
+            self._scale = 2
+        else:
+            self._scale = 1
+
+    def positionChannel(self):
+        """Name of the position plugin channel shown by the DRO."""
+        return self._ref_typ.name
 
     def updateValue(self, pos=None):
         """Update the displayed position."""
         if pos is None:
-            pos = getattr(self.pos, self._ref_typ.name).getValue()
-
-        if self._is_lathe and self._anum == Axis.X:
-            if self._lathe_mode == LatheMode.Diameter or \
-                    (self._lathe_mode == LatheMode.Auto and self._g7_active):
-                self.setText(self._fmt % (pos[self._anum] * 2))
-            else:
-                self.setText(self._fmt % pos[self._anum])
+            pos = getattr(self.pos, self.positionChannel()).getValue()
 
-        else:
-            self.setText(self._fmt % pos[self._anum])
+        # only touch the widget if the displayed text changed
+        text = self._fmt % (pos[self._anum] * self._scale)
+        if text != self.text():
+            self.setText(text)
 
     @Property(int)
     def referenceType(self):
@@ -156,6 +264,7 @@ class DROBaseWidget(VCPWidget):
     @referenceType.setter
     def referenceType(self, ref_type):
         self._ref_typ = RefType(ref_type)
+        DROUpdateManager().refTypeChanged(self)
         self.updateValue()
 
     @Property(int)
@@ -168,6 +277,7 @@ class DROBaseWidget(VCPWidget):
         if axis in [3, 4, 5]:
             self._angular_axis = True
             self._fmt = self._deg_fmt
+        self.updateScale()
         self.updateValue()
 
     @Property(str)
@@ -260,6 +370,7 @@ class DROBaseWidget(VCPWidget):
     @latheMode.setter
     def latheMode(self, mode):
         self._lathe_mode = LatheMode(mode)
+        self.updateScale()
         self.updateValue()
 
     @Property(str)
@@ -29,6 +29,7 @@ STATUS = getPlugin('status')
 POSITION = getPlugin('position')
 
 from qtpyvcp.widgets import VCPWidget
+from qtpyvcp.widgets.base_widgets.dro_base_widget import DROUpdateManager
 
 from qtpyvcp.utilities import logger
 
@@ -88,7 +89,17 @@ class DROWidget(QLabel, VCPWidget, Axis, RefType, Units):
         STATUS.program_units.notify(self.onUnitsChanged, 'string')
 
     def update(self, pos):
-        self.setText(self._format % pos[self._axis_number])
+        text = self._format % pos[self._axis_number]
+        if text != self.text():
+            self.setText(text)
+
+    def positionChannel(self):
+        return RefType.toString(self._ref_typ)
+
+    def updateValue(self, pos=None):
+        if pos is None:
+            pos = getattr(POSITION, self.positionChannel()).getValue()
+        self.update(pos)
 
     def onUnitsChanged(self, units):
         if units == 'in':
@@ -98,7 +109,7 @@ class DROWidget(QLabel, VCPWidget, Axis, RefType, Units):
         self.update(getattr(POSITION, RefType.toString(self._ref_typ)).getValue())
 
     def initialize(self):
-        getattr(POSITION, RefType.toString(self._ref_typ)).notify(self.update)
+        DROUpdateManager().addWidget(self)
 
     # ==========================================================================
     # Designer property Getters/Setters
@@ -112,6 +123,7 @@ class DROWidget(QLabel, VCPWidget, Axis, RefType, Units):
     def referenceType(self, ref_typ):
         new_ref_typ = RefType.toString(ref_typ)
         self._ref_typ = ref_typ
+        DROUpdateManager().refTypeChanged(self)
         self.update(getattr(POSITION, new_ref_typ).getValue())
 
     @Property(Axis)
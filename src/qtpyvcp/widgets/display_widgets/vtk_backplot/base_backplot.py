@@ -1,9 +1,9 @@
-import gcode
 import linuxcnc
 import os
-import shutil
 
 from qtpyvcp.plugins import getPlugin
+from qtpyvcp.utilities.stat_snapshot import StatSnapshot
+from .parse_cache import GCodeParseCache
 
 IN_DESIGNER = os.getenv('DESIGNER', False)
 NOTIFICATIONS = getPlugin('notifications')
@@ -17,8 +17,10 @@ class BaseBackPlot(object):
             raise ValueError("Invalid INI file: %s", inifile)
 
         self.canon = None
+        self.parse_cache = GCodeParseCache(inifile)
+        self.parse_result = None
 
-        self.stat = linuxcnc.stat()
+        self.stat = StatSnapshot().stat
         self.ini = linuxcnc.ini(inifile)
         self.config_dir = os.path.dirname(inifile)
 
@@ -43,46 +45,50 @@ class BaseBackPlot(object):
 
         filename = filename or self.last_filename
         if filename is None:
-            self.stat.poll()
             filename = self.stat.file
 
+        self.parse_result = None
+
         if filename is None or not os.path.isfile(filename):
             self.canon = None
             self.notification.notification_dispatcher.setNotify("3D plot", "Can't load backplot, invalid file: {}".format(filename))
             # raise ValueError("Can't load backplot, invalid file: {}".format(filename))
+            return
 
         self.last_filename = filename
 
-        if os.path.exists(self.parameter_file):
-            shutil.copy(self.parameter_file, self.temp_parameter_file)
+        # the parse cache runs the interpreter with the canon motion callbacks
+        # (straight_feed, straight_traverse, arc_feed, rigid_tap, etc.) in a
+        # worker process, only if this program has not been parsed before
+        # with the same settings. The path arrives in parse_batch and the
+        # complete result in parse_finished.
+        self.parse_cache.parseAsync(filename)
 
-        self.canon.parameter_file = self.temp_parameter_file
+    def parse_batch(self, batch):
+        """Called with each batch of segments while the program is parsed.
 
-        # Some initialization g-code to set the units and optional user code
-        unitcode = "G%d" % (20 + (self.stat.linear_units == 1))
-        initcode = self.ini.find("RS274NGC", "RS274NGC_STARTUP_CODE") or ""
+        Returns:
+            bool : True if the batch belongs to the program being loaded.
+        """
+        return self.canon is not None and batch.filename == self.last_filename
 
-        # THIS IS WHERE IT ALL HAPPENS: load_preview will execute the code,
-        # call back to the canon with motion commands, and record a history
-        # of all the movements.
+    def parse_finished(self, result):
+        """Called with the complete parse result of a program.
 
-        try:
-            result, seq = gcode.parse(filename, self.canon, unitcode, initcode)
+        Returns:
+            bool : True if the result belongs to the program being loaded.
+        """
+        if self.canon is None or self.parse_result is not None \
+                or result.filename != self.last_filename:
+            return False
 
-            if result > gcode.MIN_ERROR:
-                msg = gcode.strerror(result)
-                fname = os.path.basename(filename)
-                self.notification.notification_dispatcher.setNotify("3D plot", "Error in {} line {}\n{}".format(fname, seq - 1, msg))
-                # raise SyntaxError("Error in %s line %i: %s" % (fname, seq - 1, msg))
+        self.parse_result = result
 
-        except KeyboardInterrupt:
-            # probably raised by an (AXIS, stop) comment in the G-code file
-            # abort generating the backplot
-            pass
+        if result.error is not None:
+            self.notification.notification_dispatcher.setNotify("3D plot", result.error)
+            # raise SyntaxError(result.error)
 
-        # clean up temp var file and the backup
-        os.unlink(self.temp_parameter_file)
-        os.unlink(self.temp_parameter_file + '.bak')
+        return True
 
 
 if __name__ == "__main__":
@@ -19,9 +19,16 @@ import gcode
 import linuxcnc
 import math
 
+import numpy as np
+
 from qtpyvcp.utilities import logger
 LOG = logger.getLogger(__name__)
 
+# default max chord error of arc tessellation, in canon units (inches),
+# the parse cache sets it in machine units from [DISPLAY] ARC_TOLERANCE
+ARC_TOLERANCE = 0.0002
+
+
 class BaseCanon(object):
     def __init__(self):
 
@@ -36,7 +43,10 @@ class BaseCanon(object):
         self.suppress = 0
 
         self.plane = 1
+        # max number of segments per half circle of an arc
         self.arcdivision = 64
+        # arcs are split in as few segments as keep within this chord error
+        self.arc_tolerance = ARC_TOLERANCE
 
         # extents
         self.min_extents = [9e99, 9e99, 9e99]
@@ -138,6 +148,34 @@ class BaseCanon(object):
 
         return [x, y, z, a, b, c, u, v, w]
 
+    def rotate_and_translate_points(self, points):
+        """Vectorized :meth:`rotate_and_translate` for a block of points.
+
+        Args:
+            points (ndarray) : (N, 9) float array of positions.
+
+        Returns:
+            ndarray : (N, 9) new array with the G92 offset, XY rotation and
+                G5x offset applied, the same values the scalar version gives.
+        """
+        points = points + (self.g92_offset_x, self.g92_offset_y, self.g92_offset_z,
+                           self.g92_offset_a, self.g92_offset_b, self.g92_offset_c,
+                           self.g92_offset_u, self.g92_offset_v, self.g92_offset_w)
+
+        if self.rotation_xy:
+            x = points[:, 0]
+            y = points[:, 1]
+            rotx = x * self.rotation_cos - y * self.rotation_sin
+            roty = x * self.rotation_sin + y * self.rotation_cos
+            points[:, 0] = rotx
+            points[:, 1] = roty
+
+        points += (self.g5x_offset_x, self.g5x_offset_y, self.g5x_offset_z,
+                   self.g5x_offset_a, self.g5x_offset_b, self.g5x_offset_c,
+                   self.g5x_offset_u, self.g5x_offset_v, self.g5x_offset_w)
+
+        return points
+
     def set_g5x_offset(self, index, x, y, z, a, b, c, u, v, w):
         self.g5x_offset_x = x
         self.g5x_offset_y = y
@@ -234,12 +272,34 @@ class BaseCanon(object):
         try:
             # this self.lo goes straight into the c code, cannot be changed
             self.lo = tuple(self.last_pos)
+            divisions = self.arc_divisions(end_x - center_x, end_y - center_y)
             segs = gcode.arc_to_segments(self, end_x, end_y, center_x, center_y,
-                                         rot, end_z, a, b, c, u, v, w, self.arcdivision)
+                                         rot, end_z, a, b, c, u, v, w, divisions)
             self.straight_arcsegments(segs)
         finally:
             self.in_arc = False
 
+    def arc_divisions(self, dx, dy):
+        """Number of segments per half circle to tessellate an arc with.
+
+        Args:
+            dx, dy (float) : Position of the arc end relative to its center.
+
+        Returns:
+            int : The fewest segments that keep the chord error within
+                `arc_tolerance`, at most `arcdivision`.
+        """
+        if self.arc_tolerance <= 0:
+            return self.arcdivision
+
+        radius = math.hypot(dx, dy)
+        if radius <= self.arc_tolerance:
+            return 1
+
+        # the angle of a chord whose sagitta is the tolerance
+        step = 2 * math.acos(1 - self.arc_tolerance / radius)
+        return max(1, min(self.arcdivision, int(math.ceil(math.pi / step))))
+
     def straight_arcsegments(self, segs):
         self.first_move = False
         last_pos = self.last_pos
@@ -287,14 +347,20 @@ class BaseCanon(object):
 
 
 class StatCanon(BaseCanon):
-    def __init__(self, geometry='XYZ', random=False, stat=None):
+    def __init__(self, geometry='XYZ', random=False, stat=None, arc_tolerance=None):
         super(StatCanon, self).__init__()
 
         self.geometry = geometry
         self.random = random
 
-        self.stat = stat or linuxcnc.stat()
-        self.stat.poll()
+        if stat is None:
+            stat = linuxcnc.stat()
+            stat.poll()
+        self.stat = stat
+
+        if arc_tolerance is not None:
+            # given in machine units, linear_units is machine units per mm
+            self.arc_tolerance = arc_tolerance / (self.get_external_length_units() * 25.4)
 
         self.tools = list(self.stat.tool_table)
 
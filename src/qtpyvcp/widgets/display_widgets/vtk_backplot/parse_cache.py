@@ -0,0 +1,962 @@
+"""Shared G-code parse cache.
+
+The backplot and the gcode_properties plugin both need the canon motion
+primitives of the loaded program. Instead of each of them running the
+interpreter, the program is parsed once through a :class:`RecordingCanon`
+and the resulting primitives are kept in a :class:`ParseResult`, which is
+stored on disk in a compact binary (``.npz``) form.
+
+Results are keyed on the content of the program, the content of the
+parameter file, the unit/startup codes and the active offsets, so reopening
+an unchanged program is served from the cache without parsing it again.
+
+Parsing with :meth:`parseAsync` runs the interpreter in a worker process, so
+the GUI thread is never blocked. The path is streamed back in batches through
+the ``batchParsed`` signal while the parse is running, and the complete result
+is delivered through ``parseFinished``.
+"""
+
+import os
+import copy
+import json
+import shutil
+import hashlib
+import threading
+import multiprocessing
+from array import array
+from itertools import chain
+from collections import OrderedDict
+
+import numpy as np
+
+import gcode
+import linuxcnc
+
+from qtpy.QtCore import QObject, Signal
+
+from qtpyvcp.utilities import logger
+from qtpyvcp.utilities.stat_snapshot import StatSnapshot
+from qtpyvcp.widgets.display_widgets.vtk_backplot.base_canon import StatCanon
+
+LOG = logger.getLogger(__name__)
+
+# bump when the layout of the stored data changes
+CACHE_VERSION = 3
+
+CACHE_DIR = os.path.join(os.getenv('XDG_CACHE_HOME', os.path.expanduser('~/.cache')),
+                         'qtpyvcp', 'gcode')
+
+LINE_TYPES = ('traverse', 'feed', 'arcfeed', 'dwell', 'user')
+LINE_TYPE_CODES = {line_type: code for code, line_type in enumerate(LINE_TYPES)}
+
+TRAVERSE, FEED, ARCFEED, DWELL, USER = list(range(len(LINE_TYPES)))
+
+# number of segments streamed back to the GUI at a time
+BATCH_SIZE = 50000
+
+# multiprocessing context of the parse workers, see _mp_context()
+_MP_CONTEXT = None
+
+
+class ParseResult(object):
+    """Canon primitives of a parsed program.
+
+    Every segment of the path is a row in a set of parallel arrays:
+
+    * ``types`` (uint8) : index into ``LINE_TYPES``
+    * ``wcs`` (uint8) : work coordinate system index, 0 is G54
+    * ``tools`` (int32) : tool number in the spindle
+    * ``lines`` (int32) : program line number
+    * ``feedrates`` (float64) : programmed feed rate in units per second
+    * ``segments`` (float64) : (N, 2, 9) start and end positions
+
+    ``dwells`` is a (M, 2) array of segment index and dwell seconds.
+
+    ``extents`` holds the XYZ extents recorded during the parse, one
+    ``[type, tool, wcs, min_x, min_y, min_z, max_x, max_y, max_z]`` row per
+    combination of line type, tool and WCS found in the program, see
+    :meth:`get_extents`.
+    """
+
+    META_KEYS = ('filename', 'result', 'seq', 'error', 'num_lines',
+                 'tool_calls', 'tool_list', 'work_planes', 'rigid_taps',
+                 'g5x_offsets', 'wcs_order', 'foam', 'dwell_time',
+                 'extents')
+
+    def __init__(self, types, wcs, tools, lines, feedrates, segments, dwells, **meta):
+        self.types = types
+        self.wcs = wcs
+        self.tools = tools
+        self.lines = lines
+        self.feedrates = feedrates
+        self.segments = segments
+        self.dwells = dwells
+
+        self.filename = meta.get('filename')
+        self.result = meta.get('result', 0)
+        self.seq = meta.get('seq', 0)
+        self.error = meta.get('error')
+        self.num_lines = meta.get('num_lines', 0)
+        self.tool_calls = meta.get('tool_calls', 0)
+        self.tool_list = meta.get('tool_list', [])
+        self.work_planes = meta.get('work_planes', [])
+        self.rigid_taps = meta.get('rigid_taps', [])
+        self.g5x_offsets = meta.get('g5x_offsets', {})
+        self.wcs_order = meta.get('wcs_order', [])
+        self.foam = meta.get('foam', (0.0, 0.0))
+        self.dwell_time = meta.get('dwell_time', 0.0)
+        self.extents = meta.get('extents', [])
+        self.min_extents, self.max_extents = self.get_extents()
+
+    def __len__(self):
+        return len(self.types)
+
+    def mask(self, *line_types):
+        """Boolean mask selecting the segments of the given line types."""
+        return np.isin(self.types, [LINE_TYPE_CODES[line_type] for line_type in line_types])
+
+    def get_extents(self, line_types=None, tools=None, wcs=None):
+        """XYZ extents of (part of) the path.
+
+        Combines the extents recorded during the parse, so this never
+        looks at the segments.
+
+        Args:
+            line_types (list, optional) : Only include these line types.
+            tools (list, optional) : Only include these tool numbers.
+            wcs (list, optional) : Only include these WCS indexes.
+
+        Returns:
+            tuple : (min, max) XYZ lists, min is larger than max if no
+                segment matches.
+        """
+        codes = None
+        if line_types is not None:
+            codes = [LINE_TYPE_CODES[line_type] for line_type in line_types]
+
+        extent = [9e99, 9e99, 9e99, -9e99, -9e99, -9e99]
+        for row in self.extents:
+            if codes is not None and row[0] not in codes:
+                continue
+            if tools is not None and row[1] not in tools:
+                continue
+            if wcs is not None and row[2] not in wcs:
+                continue
+            _grow_extent(extent, *row[3:])
+
+        return extent[:3], extent[3:]
+
+    def batches(self, size):
+        """Split the result into batches like the ones streamed while parsing.
+
+        Args:
+            size (int) : Max number of segments per batch.
+
+        Yields:
+            ParseResult : Consecutive slices of the path, at least one
+                even if the path is empty.
+        """
+        meta = dict(filename=self.filename, wcs_order=self.wcs_order, foam=self.foam)
+
+        for start in range(0, max(len(self), 1), size):
+            end = start + size
+            dwells = self.dwells[(self.dwells[:, 0] >= start) & (self.dwells[:, 0] < end)]
+            yield ParseResult(self.types[start:end],
+                              self.wcs[start:end],
+                              self.tools[start:end],
+                              self.lines[start:end],
+                              self.feedrates[start:end],
+                              self.segments[start:end],
+                              dwells,
+                              **meta)
+
+    def segment_lengths(self):
+        """XYZ length of every segment."""
+        return np.linalg.norm(self.segments[:, 1, :3] - self.segments[:, 0, :3], axis=1)
+
+    def save(self, path):
+        meta = {key: getattr(self, key) for key in self.META_KEYS}
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as fh:
+            np.savez(fh,
+                     types=self.types,
+                     wcs=self.wcs,
+                     tools=self.tools,
+                     lines=self.lines,
+                     feedrates=self.feedrates,
+                     segments=self.segments,
+                     dwells=self.dwells,
+                     meta=np.array(json.dumps(meta)))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def concatenate(cls, batches, **meta):
+        """Join the batches streamed during a parse into one result."""
+        fields = ('types', 'wcs', 'tools', 'lines', 'feedrates', 'segments', 'dwells')
+        if batches:
+            arrays = [np.concatenate([getattr(batch, field) for batch in batches]) for field in fields]
+        else:
+            arrays = [np.empty(0, dtype=np.uint8),
+                      np.empty(0, dtype=np.uint8),
+                      np.empty(0, dtype=np.int32),
+                      np.empty(0, dtype=np.int32),
+                      np.empty(0, dtype=np.float64),
+                      np.empty((0, 2, 9), dtype=np.float64),
+                      np.empty((0, 2), dtype=np.float64)]
+
+        return cls(*arrays, **meta)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            return cls(data['types'],
+                       data['wcs'],
+                       data['tools'],
+                       data['lines'],
+                       data['feedrates'],
+                       data['segments'],
+                       data['dwells'],
+                       **meta)
+
+
+def _grow_extent(extent, min_x, min_y, min_z, max_x, max_y, max_z):
+    # grow a [min_x, min_y, min_z, max_x, max_y, max_z] extent in place
+    if min_x < extent[0]:
+        extent[0] = min_x
+    if min_y < extent[1]:
+        extent[1] = min_y
+    if min_z < extent[2]:
+        extent[2] = min_z
+    if max_x > extent[3]:
+        extent[3] = max_x
+    if max_y > extent[4]:
+        extent[4] = max_y
+    if max_z > extent[5]:
+        extent[5] = max_z
+
+
+class RecordingCanon(StatCanon):
+    """Canon that records the motion primitives into typed arrays.
+
+    Straight moves are buffered with their raw coordinates and put through
+    :meth:`rotate_and_translate_points` a block at a time. The buffer is
+    flushed whenever the position is needed, i.e. when ``last_pos`` is read
+    or set, the offsets or rotation change, or anything else is recorded.
+
+    The XYZ extents of the path are kept up to date as the segments are
+    recorded, per line type, tool and WCS.
+
+    Args:
+        batch_size (int) : If set, ``on_batch`` is called with a
+            :class:`ParseResult` every time this many segments were recorded.
+        on_batch (callable) : Receives the batches, see ``batch_size``.
+    """
+
+    # max number of straight moves buffered before they are transformed
+    MOVE_BUFFER_SIZE = 4096
+    # shorter blocks are cheaper to transform one move at a time
+    MIN_VECTOR_MOVES = 16
+
+    # class defaults, BaseCanon.__init__ sets last_pos before ours runs
+    _last_pos = (0,) * 9
+    _move_segments = ()
+
+    def __init__(self, *args, batch_size=0, on_batch=None, **kwargs):
+        super(RecordingCanon, self).__init__(*args, **kwargs)
+
+        self.batch_size = batch_size
+        self.on_batch = on_batch
+
+        # segments already handed out in batches
+        self._flushed = 0
+        self._clear_arrays()
+
+        # running extents, keyed on (line type, tool, wcs)
+        self._extents = dict()
+
+        self.active_wcs_index = max(self.stat.g5x_index - 1, 0)
+        self.wcs_order = list()
+
+        try:
+            self.current_tool = self.stat.tool_in_spindle
+        except AttributeError:
+            self.current_tool = -1
+
+        self.num_lines = 0
+        self.tool_calls = 0
+        self.tool_list = list()
+        self.work_planes = list()
+        self.rigid_taps = list()
+        self.g5x_offsets = dict()
+
+        self.foam_z = 0.0
+        self.foam_w = 0.0
+
+    def comment(self, comment):
+        LOG.debug("G-code Comment: {}".format(comment))
+        items = comment.lower().split(',', 1)
+        if len(items) > 0 and items[0] in ['axis', 'backplot']:
+            cmd = items[1].strip()
+            if cmd == "hide":
+                self.suppress += 1
+            elif cmd == "show":
+                self.suppress -= 1
+            elif cmd == 'stop':
+                LOG.info("Backplot generation aborted.")
+                raise KeyboardInterrupt
+            elif cmd.startswith("xy_z_pos"):
+                self.foam_z = float(cmd.split(',')[1])
+
+            elif cmd.startswith("uv_z_pos"):
+                self.foam_w = float(cmd.split(',')[1])
+
+    def message(self, msg):
+        LOG.debug("G-code Message: {}".format(msg))
+
+    def next_line(self, st):
+        super(RecordingCanon, self).next_line(st)
+        self.num_lines += 1
+
+    @property
+    def last_pos(self):
+        if self._move_segments:
+            self._flush_moves()
+        return self._last_pos
+
+    @last_pos.setter
+    def last_pos(self, pos):
+        if self._move_segments:
+            self._flush_moves()
+        self._last_pos = pos
+
+    def set_g92_offset(self, x, y, z, a, b, c, u, v, w):
+        self._flush_moves()
+        super(RecordingCanon, self).set_g92_offset(x, y, z, a, b, c, u, v, w)
+
+    def set_xy_rotation(self, rotation):
+        self._flush_moves()
+        super(RecordingCanon, self).set_xy_rotation(rotation)
+
+    def set_g5x_offset(self, index, x, y, z, a, b, c, u, v, w):
+        # the path is recorded relative to its WCS, the consumers
+        # apply the offsets themselves, so only keep track of the index
+        self.g5x_offsets[str(index)] = (x, y, z, a, b, c, u, v, w)
+
+        new_wcs = index - 1  # this index counts also G53 so we need to do -1
+        if new_wcs not in self.wcs_order:
+            self.wcs_order.append(new_wcs)
+
+        self.active_wcs_index = new_wcs
+
+    def set_plane(self, plane):
+        super(RecordingCanon, self).set_plane(plane)
+        self.work_planes.append(plane)
+
+    def change_tool(self, pocket):
+        super(RecordingCanon, self).change_tool(pocket)
+        if pocket != -1:
+            self.tool_calls += 1
+            self.tool_list.append(pocket)
+        try:
+            self.current_tool = int(self.tools[0][0])
+        except (IndexError, TypeError):
+            self.current_tool = -1
+
+    def rigid_tap(self, x, y, z):
+        if self.suppress > 0:
+            return
+
+        self.rigid_taps.append((x, y, z))
+        super(RecordingCanon, self).rigid_tap(x, y, z)
+
+    def dwell(self, arg):
+        if self.suppress > 0:
+            return
+
+        self._dwells.append(self._flushed + len(self._types))
+        self._dwells.append(arg)
+        super(RecordingCanon, self).dwell(arg)
+
+    def straight_traverse(self, x, y, z, a, b, c, u, v, w):
+        if self.suppress > 0:
+            return
+
+        # the first move only sets the start position
+        self._add_move(TRAVERSE, not self.first_move, (x, y, z, a, b, c, u, v, w))
+
+    def straight_feed(self, x, y, z, a, b, c, u, v, w):
+        if self.suppress > 0:
+            return
+
+        self.first_move = False
+        self._add_move(FEED, True, (x, y, z, a, b, c, u, v, w))
+
+    straight_probe = straight_feed
+
+    def _add_move(self, line_type, segment, pos):
+        # buffer the raw end position, the segment data that doesn't depend
+        # on the position is recorded right away
+        self._move_points.extend(pos)
+        self._move_segments.append(segment)
+
+        if segment:
+            if self.active_wcs_index not in self.wcs_order:
+                self.wcs_order.append(self.active_wcs_index)
+
+            self._types.append(line_type)
+            self._wcs.append(self.active_wcs_index)
+            self._tools.append(self.current_tool)
+            self._lines.append(self.seq_num)
+            self._feedrates.append(self.feedrate)
+
+            if self.batch_size and len(self._types) >= self.batch_size:
+                self.flush()
+                return
+
+        if len(self._move_segments) >= self.MOVE_BUFFER_SIZE:
+            self._flush_moves()
+
+    def _flush_moves(self):
+        # transform the buffered moves and record their start and end points
+        move_points = self._move_points
+        move_segments = self._move_segments
+        if not move_segments:
+            return
+
+        self._move_points = array('d')
+        self._move_segments = array('B')
+
+        if len(move_segments) < self.MIN_VECTOR_MOVES:
+            last_pos = self._last_pos
+            for i, segment in enumerate(move_segments):
+                pos = self.rotate_and_translate(*move_points[9 * i:9 * i + 9])
+                if segment:
+                    self._points.extend(last_pos)
+                    self._points.extend(pos)
+                last_pos = pos
+            self._last_pos = last_pos
+            self._extend_extents(sum(move_segments))
+            return
+
+        ends = self.rotate_and_translate_points(
+            np.frombuffer(move_points, dtype=np.float64).reshape(-1, 9))
+        segment = np.frombuffer(move_segments, dtype=np.uint8).astype(bool)
+
+        starts = np.empty_like(ends)
+        starts[0] = self._last_pos
+        starts[1:] = ends[:-1]
+
+        self._points.frombytes(np.stack((starts, ends), axis=1)[segment].tobytes())
+        self._last_pos = ends[-1].tolist()
+        self._extend_extents(int(segment.sum()))
+
+    def _add_extent(self, key, min_x, min_y, min_z, max_x, max_y, max_z):
+        extent = self._extents.get(key)
+        if extent is None:
+            self._extents[key] = [min_x, min_y, min_z, max_x, max_y, max_z]
+        else:
+            _grow_extent(extent, min_x, min_y, min_z, max_x, max_y, max_z)
+
+    def _extend_extents(self, count):
+        # grow the running extents by the last `count` recorded segments
+        if count == 0:
+            return
+
+        types = self._types[-count:]
+        tools = self._tools[-count:]
+        wcs = self._wcs[-count:]
+        points = self._points[-18 * count:]
+
+        if count < self.MIN_VECTOR_MOVES:
+            for i in range(count):
+                x0, y0, z0 = points[18 * i:18 * i + 3]
+                x1, y1, z1 = points[18 * i + 9:18 * i + 12]
+                self._add_extent((types[i], tools[i], wcs[i]),
+                                 min(x0, x1), min(y0, y1), min(z0, z1),
+                                 max(x0, x1), max(y0, y1), max(z0, z1))
+            return
+
+        xyz = np.frombuffer(points, dtype=np.float64).reshape(-1, 2, 9)[:, :, :3]
+        keys = np.stack((np.frombuffer(types, dtype=np.uint8),
+                         np.frombuffer(tools, dtype=np.int32),
+                         np.frombuffer(wcs, dtype=np.uint8)), axis=1)
+
+        if (keys == keys[0]).all():
+            groups = [(keys[0], xyz)]
+        else:
+            unique_keys, inverse = np.unique(keys, axis=0, return_inverse=True)
+            inverse = inverse.ravel()
+            groups = [(key, xyz[inverse == i]) for i, key in enumerate(unique_keys)]
+
+        for key, group in groups:
+            self._add_extent(tuple(key.tolist()),
+                             *group.min(axis=(0, 1)).tolist(),
+                             *group.max(axis=(0, 1)).tolist())
+
+    def calc_extents(self):
+        """Set the overall extents of the path recorded so far."""
+        self._flush_moves()
+        extent = [9e99, 9e99, 9e99, -9e99, -9e99, -9e99]
+        for row in self._extents.values():
+            _grow_extent(extent, *row)
+        self.min_extents, self.max_extents = extent[:3], extent[3:]
+
+    def add_path_point(self, line_type, start_point, end_point):
+        self._flush_moves()
+
+        if self.active_wcs_index not in self.wcs_order:
+            self.wcs_order.append(self.active_wcs_index)
+
+        code = LINE_TYPE_CODES[line_type]
+
+        self._types.append(code)
+        self._wcs.append(self.active_wcs_index)
+        self._tools.append(self.current_tool)
+        self._lines.append(self.seq_num)
+        self._feedrates.append(self.feedrate)
+        self._points.extend(start_point)
+        self._points.extend(end_point)
+
+        x0, y0, z0 = start_point[:3]
+        x1, y1, z1 = end_point[:3]
+        self._add_extent((code, self.current_tool, self.active_wcs_index),
+                         min(x0, x1), min(y0, y1), min(z0, z1),
+                         max(x0, x1), max(y0, y1), max(z0, z1))
+
+        if self.batch_size and len(self._types) >= self.batch_size:
+            self.flush()
+
+    def straight_arcsegments(self, segs):
+        # record the whole arc at once rather than a segment at a time
+        self.first_move = False
+
+        count = len(segs)
+        if count == 0:
+            return
+
+        if self.active_wcs_index not in self.wcs_order:
+            self.wcs_order.append(self.active_wcs_index)
+
+        starts = [self.last_pos]
+        starts.extend(segs[:-1])
+
+        self._types.extend(array('B', [ARCFEED]) * count)
+        self._wcs.extend(array('B', [self.active_wcs_index]) * count)
+        self._tools.extend(array('i', [self.current_tool]) * count)
+        self._lines.extend(array('i', [self.seq_num]) * count)
+        self._feedrates.extend(array('d', [self.feedrate]) * count)
+        self._points.extend(chain.from_iterable(chain.from_iterable(zip(starts, segs))))
+        self._extend_extents(count)
+
+        self.last_pos = segs[-1]
+
+        if self.batch_size and len(self._types) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Hand the segments recorded since the last batch to ``on_batch``."""
+        if self.on_batch is None or len(self._types) == 0:
+            return
+
+        batch = self._get_batch(foam=(self.foam_z, self.foam_w))
+        self._flushed += len(batch)
+        self._clear_arrays()
+        self.on_batch(batch)
+
+    def get_meta(self, **meta):
+        """Program wide data recorded along with the segments."""
+        self._flush_moves()
+        meta.update(num_lines=self.num_lines,
+                    tool_calls=self.tool_calls,
+                    tool_list=self.tool_list,
+                    work_planes=self.work_planes,
+                    rigid_taps=self.rigid_taps,
+                    g5x_offsets=self.g5x_offsets,
+                    wcs_order=self.wcs_order,
+                    foam=(self.foam_z, self.foam_w),
+                    dwell_time=self.dwell_time,
+                    extents=[list(key) + extent for key, extent in self._extents.items()])
+        return meta
+
+    def get_result(self, **meta):
+        """Build a :class:`ParseResult` from the recorded primitives."""
+        return self._get_batch(**self.get_meta(**meta))
+
+    def _get_batch(self, **meta):
+        self._flush_moves()
+        meta.setdefault('wcs_order', list(self.wcs_order))
+        return ParseResult(np.frombuffer(self._types, dtype=np.uint8).copy(),
+                           np.frombuffer(self._wcs, dtype=np.uint8).copy(),
+                           np.frombuffer(self._tools, dtype=np.int32).copy(),
+                           np.frombuffer(self._lines, dtype=np.int32).copy(),
+                           np.frombuffer(self._feedrates, dtype=np.float64).copy(),
+                           np.frombuffer(self._points, dtype=np.float64).reshape(-1, 2, 9).copy(),
+                           np.frombuffer(self._dwells, dtype=np.float64).reshape(-1, 2).copy(),
+                           **meta)
+
+    def _clear_arrays(self):
+        self._types = array('B')
+        self._wcs = array('B')
+        self._tools = array('i')
+        self._lines = array('i')
+        self._feedrates = array('d')
+        self._points = array('d')
+        self._dwells = array('d')
+        self._move_points = array('d')
+        self._move_segments = array('B')
+
+
+def run_parse(canon, filename, unitcode, initcode, parameter_file):
+    """Run the interpreter over a program, calling back into ``canon``.
+
+    Returns:
+        tuple : (result, seq, error message or None)
+    """
+    temp_parameter_file = parameter_file + '.temp'
+
+    if os.path.exists(parameter_file):
+        shutil.copy(parameter_file, temp_parameter_file)
+
+    canon.parameter_file = temp_parameter_file
+
+    result = 0
+    seq = 0
+    error = None
+
+    # THIS IS WHERE IT ALL HAPPENS: load_preview will execute the code,
+    # call back to the canon with motion commands, and record a history
+    # of all the movements.
+    try:
+        result, seq = gcode.parse(filename, canon, unitcode, initcode)
+
+        if result > gcode.MIN_ERROR:
+            msg = gcode.strerror(result)
+            fname = os.path.basename(filename)
+            error = "Error in {} line {}\n{}".format(fname, seq - 1, msg)
+
+    except KeyboardInterrupt:
+        # probably raised by an (AXIS, stop) comment in the G-code file
+        # abort generating the backplot
+        pass
+
+    # clean up temp var file and the backup
+    for temp_file in (temp_parameter_file, temp_parameter_file + '.bak'):
+        if os.path.exists(temp_file):
+            os.unlink(temp_file)
+
+    return result, seq, error
+
+
+def _mp_context():
+    """Get the multiprocessing context the parse workers are started from.
+
+    The parse runs in a child of a fork server, forking the multi-threaded
+    GUI process itself could leave the child stuck on a lock (logging, etc.)
+    held by another thread at the time of the fork. The context is only
+    set up on the first parse, so just importing this module doesn't change
+    the multiprocessing state of the application.
+    """
+    global _MP_CONTEXT
+    if _MP_CONTEXT is None:
+        context = multiprocessing.get_context('forkserver')
+        # only the modules the canon needs are loaded up front
+        context.set_forkserver_preload(['gcode', 'linuxcnc', 'numpy', StatCanon.__module__])
+        _MP_CONTEXT = context
+    return _MP_CONTEXT
+
+
+def _parse_process(conn, filename, unitcode, initcode, geometry, random, parameter_file,
+                   batch_size, arc_tolerance):
+    # runs in the worker process, streams the path back through conn
+    canon = RecordingCanon(geometry=geometry, random=random, arc_tolerance=arc_tolerance,
+                           batch_size=batch_size,
+                           on_batch=lambda batch: conn.send(('batch', batch)))
+    try:
+        result, seq, error = run_parse(canon, filename, unitcode, initcode, parameter_file)
+        canon.flush()
+        conn.send(('done', canon.get_meta(filename=filename, result=result, seq=seq, error=error)))
+    except Exception as e:
+        conn.send(('error', str(e)))
+    finally:
+        conn.close()
+
+
+class GCodeParseCache(object):
+    """Ensures only one parse cache exists per python interpreter.
+    """
+    _instance = None
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = _GCodeParseCache(*args, **kwargs)
+        return cls._instance
+
+
+class _GCodeParseCache(QObject):
+
+    parseStarted = Signal(str)
+    batchParsed = Signal(object)
+    parseFinished = Signal(object)
+
+    def __init__(self, inifile=None, cache_dir=CACHE_DIR, max_entries=16, batch_size=BATCH_SIZE):
+        super(_GCodeParseCache, self).__init__()
+
+        inifile = inifile or os.getenv("INI_FILE_NAME")
+
+        self.stat = StatSnapshot().stat
+        self.ini = linuxcnc.ini(inifile)
+        self.config_dir = os.path.dirname(inifile)
+
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+
+        temp = self.ini.find("EMCIO", "RANDOM_TOOLCHANGER")
+        self.random = int(temp or 0)
+
+        temp = self.ini.find("DISPLAY", "GEOMETRY") or 'XYZ'
+        self.geometry = temp.upper()
+
+        # max chord error of the arc segments, in machine units
+        temp = self.ini.find("DISPLAY", "ARC_TOLERANCE")
+        self.arc_tolerance = float(temp) if temp else None
+
+        temp = self.ini.find("RS274NGC", "PARAMETER_FILE") or "linuxcnc.var"
+        self.parameter_file = os.path.join(self.config_dir, temp)
+
+        # results of the last few programs, so all the consumers
+        # of the same load are served without touching the disk
+        self._memory = OrderedDict()
+        self._mutex = threading.Lock()
+
+        # the parse in flight, a newer request cancels it. The worker
+        # process is kept as (generation, process), all guarded by _mutex
+        self._generation = 0
+        self._pending = None
+        self._process = None
+
+    def parseAsync(self, filename):
+        """Parse a program without blocking the GUI thread.
+
+        The path is emitted in batches through ``batchParsed`` as it gets
+        parsed, followed by the complete result through ``parseFinished``.
+        Results served from the cache are only emitted through
+        ``parseFinished``. Requesting the program that is already being
+        parsed does nothing, unless the file or the settings changed since.
+        Any other request cancels the parse in flight.
+
+        Args:
+            filename (str) : Path of the G-code file.
+        """
+        unitcode, initcode, state = self._parseSettings()
+
+        # the content is hashed in the worker thread, the size and mtime
+        # are enough to tell the file was saved again in the meantime
+        try:
+            info = os.stat(filename)
+            request = (filename, info.st_mtime_ns, info.st_size, unitcode, initcode, state)
+        except OSError:
+            request = None
+
+        with self._mutex:
+            if request is not None and self._pending == request:
+                return
+
+            self._cancel()
+
+            self._generation += 1
+            self._pending = request
+            generation = self._generation
+
+        self.parseStarted.emit(filename)
+
+        thread = threading.Thread(target=self._parseThread,
+                                  args=(generation, filename, unitcode, initcode, state))
+        thread.daemon = True
+        thread.start()
+
+    def cacheKey(self, filename, unitcode, initcode, state):
+        sha = hashlib.sha1()
+        sha.update(str(CACHE_VERSION).encode())
+
+        with open(filename, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b''):
+                sha.update(chunk)
+
+        if os.path.exists(self.parameter_file):
+            with open(self.parameter_file, 'rb') as fh:
+                sha.update(fh.read())
+
+        sha.update(repr((unitcode, initcode) + state).encode())
+        return sha.hexdigest()
+
+    def clear(self):
+        with self._mutex:
+            self._memory.clear()
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.npz'):
+                    os.unlink(os.path.join(self.cache_dir, name))
+
+    def _parseSettings(self):
+        # Some initialization g-code to set the units and optional user code
+        unitcode = "G%d" % (20 + (self.stat.linear_units == 1))
+        initcode = self.ini.find("RS274NGC", "RS274NGC_STARTUP_CODE") or ""
+
+        state = (self.geometry, self.random, self.arc_tolerance,
+                 self.stat.g5x_index,
+                 tuple(self.stat.g5x_offset),
+                 tuple(self.stat.g92_offset),
+                 self.stat.rotation_xy,
+                 self.stat.tool_in_spindle,
+                 tuple(tuple(tool) for tool in self.stat.tool_table))
+
+        return unitcode, initcode, state
+
+    def _parseThread(self, generation, filename, unitcode, initcode, state):
+        try:
+            key = self.cacheKey(filename, unitcode, initcode, state)
+
+            result = self._lookup(key, filename)
+            if result is None:
+                result = self._parseInProcess(generation, filename, unitcode, initcode)
+                if result is None:
+                    # cancelled by a newer request, or the worker died
+                    self._finish(generation)
+                    return
+                self._store(key, result)
+
+        except Exception:
+            LOG.exception("Failed to parse {}".format(filename))
+            self._finish(generation)
+            return
+
+        if self._finish(generation):
+            self.parseFinished.emit(result)
+
+    def _finish(self, generation):
+        # clear the pending request if it is still the current one
+        with self._mutex:
+            if generation != self._generation:
+                return False
+            self._pending = None
+            return True
+
+    def _parseInProcess(self, generation, filename, unitcode, initcode):
+        if generation != self._generation:
+            return None
+
+        LOG.debug("Parsing {}".format(filename))
+
+        context = _mp_context()
+        conn, child_conn = context.Pipe(duplex=False)
+        process = context.Process(target=_parse_process,
+                                  args=(child_conn, filename, unitcode, initcode, self.geometry,
+                                        self.random, self.parameter_file, self.batch_size,
+                                        self.arc_tolerance))
+        process.daemon = True
+        process.start()
+        child_conn.close()
+
+        # a newer request may have come in while the process was starting,
+        # in which case _cancel() didn't know about it
+        with self._mutex:
+            current = generation == self._generation
+            if current:
+                self._process = (generation, process)
+
+        batches = []
+        try:
+            if not current:
+                return None
+
+            while True:
+                kind, data = conn.recv()
+
+                if generation != self._generation:
+                    return None
+
+                if kind == 'batch':
+                    data.filename = filename
+                    batches.append(data)
+                    self.batchParsed.emit(data)
+                elif kind == 'done':
+                    return ParseResult.concatenate(batches, **data)
+                else:
+                    raise RuntimeError(data)
+
+        except EOFError:
+            # the worker was terminated
+            return None
+
+        finally:
+            conn.close()
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+            with self._mutex:
+                if self._process is not None and self._process[1] is process:
+                    self._process = None
+
+    def _cancel(self):
+        # call with _mutex held, terminates the worker of the current request
+        if self._process is not None:
+            generation, process = self._process
+            if generation == self._generation and process.is_alive():
+                LOG.debug("Cancelling parse of {}".format(
+                    self._pending[0] if self._pending is not None else 'program'))
+                process.terminate()
+        self._process = None
+        self._pending = None
+
+    def _lookup(self, key, filename):
+        with self._mutex:
+            result = self._memory.get(key)
+            if result is not None:
+                LOG.debug("Using in memory parse result for {}".format(filename))
+                self._memory.move_to_end(key)
+                # the key is the content, not the path, so the same result
+                # may be served for another file, don't touch the cached one
+                result = copy.copy(result)
+                result.filename = filename
+                return result
+
+        cache_file = os.path.join(self.cache_dir, key + '.npz')
+        if os.path.isfile(cache_file):
+            try:
+                result = ParseResult.load(cache_file)
+                result.filename = filename
+                LOG.debug("Using cached parse result for {}".format(filename))
+            except Exception:
+                LOG.warning("Failed to read cached parse result, reparsing", exc_info=True)
+                return None
+
+            self._remember(key, result)
+
+        return result
+
+    def _store(self, key, result):
+        self._remember(key, result)
+
+        try:
+            if not os.path.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir)
+
+            result.save(os.path.join(self.cache_dir, key + '.npz'))
+
+            # prune the oldest entries
+            entries = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                       if name.endswith('.npz')]
+            entries.sort(key=os.path.getmtime)
+            for entry in entries[:-self.max_entries]:
+                os.unlink(entry)
+
+        except OSError:
+            LOG.warning("Failed to store parse result in {}".format(self.cache_dir), exc_info=True)
+
+    def _remember(self, key, result):
+        with self._mutex:
+            self._memory[key] = result
+            while len(self._memory) > 2:
+                self._memory.popitem(last=False)
@@ -1,9 +1,117 @@
+import numpy as np
+
 import vtk.qt
+from vtk.util import numpy_support
+
 from .axes_actor import AxesActor
 from qtpyvcp.utilities import logger
 
 LOG = logger.getLogger(__name__)
 
+# paths with fewer lines than this are always drawn at full detail
+LOD_MIN_LINES = 100000
+# chord tolerance of the first level of detail, relative to the path size
+LOD_BASE_TOLERANCE = 1e-4
+# tolerance multiplier between successive levels of detail
+LOD_FACTOR = 4.0
+LOD_LEVELS = 4
+
+
+def _segment_distance(start, point, end):
+    # distance of each point from the line segment start -> end
+    chord = end - start
+    delta = point - start
+    length_sq = np.einsum('ij,ij->i', chord, chord)
+    t = np.einsum('ij,ij->i', delta, chord) / np.where(length_sq > 0, length_sq, 1.0)
+    np.clip(t, 0.0, 1.0, out=t)
+    delta -= t[:, np.newaxis] * chord
+    return np.sqrt(np.einsum('ij,ij->i', delta, delta))
+
+
+def decimate_lines(points, colors, errors, tolerance, max_passes=16):
+    """Merge consecutive line segments while staying within a chord tolerance.
+
+    Two segments are merged when the end of the first is the start of the
+    second, they have the same color and the merged segment stays within
+    `tolerance` of every point of the original path. Each pass merges every
+    other joint of a run of mergeable joints, so it runs vectorized over the
+    whole path.
+
+    Args:
+        points (ndarray) : (2N, 3) float array, start and end point of each
+            segment, see :meth:`PathActor.set_lines`.
+        colors (ndarray) : (N, 4) uint8 array, one RGBA color per segment.
+        errors (ndarray) : (N,) float array, upper bound of the distance of
+            the original path from each segment, zeros for the original path.
+        tolerance (float) : Max distance of the original path from the
+            decimated one.
+        max_passes (int) : Max number of merge passes.
+
+    Returns:
+        tuple : (points, colors, errors) of the decimated path.
+    """
+    segments = points.reshape(-1, 2, 3).copy()
+    colors = np.ascontiguousarray(colors)
+    errors = errors.copy()
+
+    for _ in range(max_passes):
+        if len(segments) < 2:
+            break
+
+        rgba = colors.view(np.uint32).ravel()
+        joined = (segments[:-1, 1] == segments[1:, 0]).all(axis=1) & (rgba[:-1] == rgba[1:])
+
+        # the first segment is within `distance` of the merged one, and the
+        # original path within `errors` of the first segment
+        distance = _segment_distance(segments[:-1, 0], segments[:-1, 1], segments[1:, 1])
+        merged_errors = np.maximum(errors[:-1], errors[1:]) + distance
+        mergeable = joined & (merged_errors <= tolerance)
+
+        # never merge two neighbouring joints in the same pass
+        index = np.arange(len(mergeable))
+        run_start = np.maximum.accumulate(np.where(mergeable & ~np.r_[False, mergeable[:-1]], index, 0))
+        selected = np.flatnonzero(mergeable & ((index - run_start) % 2 == 0))
+
+        if len(selected) == 0:
+            break
+
+        segments[selected, 1] = segments[selected + 1, 1]
+        errors[selected] = merged_errors[selected]
+
+        keep = np.ones(len(segments), dtype=bool)
+        keep[selected + 1] = False
+
+        segments = segments[keep]
+        colors = colors[keep]
+        errors = errors[keep]
+
+    return segments.reshape(-1, 3), colors, errors
+
+
+def _lines_mapper(points, colors):
+    # a mapper drawing the (2N, 3) points as N independent line segments
+    num_lines = len(colors)
+
+    vtk_points = vtk.vtkPoints()
+    vtk_points.SetData(numpy_support.numpy_to_vtk(np.ascontiguousarray(points)))
+
+    lines = vtk.vtkCellArray()
+    lines.SetData(numpy_support.numpy_to_vtkIdTypeArray(
+                      np.arange(0, 2 * num_lines + 1, 2, dtype=numpy_support.ID_TYPE_CODE)),
+                  numpy_support.numpy_to_vtkIdTypeArray(
+                      np.arange(2 * num_lines, dtype=numpy_support.ID_TYPE_CODE)))
+
+    poly_data = vtk.vtkPolyData()
+    poly_data.SetPoints(vtk_points)
+    poly_data.SetLines(lines)
+    poly_data.GetCellData().SetScalars(
+        numpy_support.numpy_to_vtk(np.ascontiguousarray(colors), array_type=vtk.VTK_UNSIGNED_CHAR))
+
+    mapper = vtk.vtkPolyDataMapper()
+    mapper.SetInputData(poly_data)
+    mapper.Update()
+    return mapper
+
 
 class PathActor(vtk.vtkActor):
     def __init__(self, linuxcncDataSource):
@@ -35,6 +143,164 @@ class PathActor(vtk.vtkActor):
         self.poly_data = vtk.vtkPolyData()
         self.data_mapper = vtk.vtkPolyDataMapper()
 
+        # growable numpy buffers backing the VTK arrays, which are only
+        # shallow views on the part of them that is filled
+        self.num_lines = 0
+        self._point_buffer = np.empty((0, 3), dtype=np.float64)
+        self._color_buffer = np.empty((0, 4), dtype=np.uint8)
+        self._offset_buffer = np.zeros(1, dtype=numpy_support.ID_TYPE_CODE)
+        self._connectivity_buffer = np.empty(0, dtype=numpy_support.ID_TYPE_CODE)
+
+        # decimated levels of detail, (tolerance, mapper) coarsest last
+        self.lod_levels = list()
+
+        # (min, max) XYZ extents of the program, in actor coordinates
+        self.extents = None
+
+    def set_lines(self, points, colors):
+        """Load all the line segments of the path in one shot.
+
+        Args:
+            points (ndarray) : (2N, 3) float array, each consecutive pair of
+                points are the start and end of a line segment.
+            colors (ndarray) : (N, 4) uint8 array, one RGBA color per segment.
+        """
+        self.num_lines = 0
+        self.append_lines(points, colors)
+
+    def append_lines(self, points, colors):
+        """Add line segments to the end of the path.
+
+        Storage grows geometrically, so appending the path in batches
+        costs the same as loading it in one shot.
+
+        Args:
+            points (ndarray) : (2N, 3) float array, see :meth:`set_lines`.
+            colors (ndarray) : (N, 4) uint8 array, see :meth:`set_lines`.
+        """
+        start = self.num_lines
+        end = start + len(colors)
+
+        self.lod_levels = list()
+
+        if end > len(self._color_buffer):
+            self._grow(max(end, 2 * len(self._color_buffer)))
+
+        self._point_buffer[2 * start:2 * end] = points
+        self._color_buffer[start:end] = colors
+        self.num_lines = end
+
+        if end:
+            self.points.SetData(numpy_support.numpy_to_vtk(self._point_buffer[:2 * end]))
+            self.lines.SetData(numpy_support.numpy_to_vtkIdTypeArray(self._offset_buffer[:end + 1]),
+                               numpy_support.numpy_to_vtkIdTypeArray(self._connectivity_buffer[:2 * end]))
+
+            self.colors = numpy_support.numpy_to_vtk(self._color_buffer[:end],
+                                                     array_type=vtk.VTK_UNSIGNED_CHAR)
+        else:
+            self.points.Reset()
+            self.lines.Reset()
+            self.colors = vtk.vtkUnsignedCharArray()
+            self.colors.SetNumberOfComponents(4)
+
+        self.poly_data.SetPoints(self.points)
+        self.poly_data.SetLines(self.lines)
+        self.poly_data.GetCellData().SetScalars(self.colors)
+        self.poly_data.Modified()
+        self.data_mapper.SetInputData(self.poly_data)
+        self.data_mapper.Update()
+        self.SetMapper(self.data_mapper)
+
+    def decimate(self, tolerance=None):
+        """Decimate the path into its levels of detail.
+
+        Each level merges the segments of the previous one within a chord
+        tolerance `LOD_FACTOR` times larger, levels that don't save at
+        least a quarter of the lines are dropped. Nothing is built for
+        paths shorter than `LOD_MIN_LINES`.
+
+        This only uses numpy and doesn't touch VTK, so it can run in a
+        worker thread, the levels are then handed to :meth:`set_lod_levels`
+        in the GUI thread.
+
+        Args:
+            tolerance (float, optional) : Chord tolerance of the first level,
+                defaults to `LOD_BASE_TOLERANCE` times the path diagonal.
+
+        Returns:
+            list : (tolerance, points, colors) of each level, coarsest last.
+        """
+        levels = list()
+
+        num_lines = self.num_lines
+        if num_lines < LOD_MIN_LINES:
+            return levels
+
+        points = self._point_buffer[:2 * num_lines]
+        colors = self._color_buffer[:num_lines]
+        errors = np.zeros(num_lines)
+
+        if tolerance is None:
+            tolerance = LOD_BASE_TOLERANCE * np.linalg.norm(points.max(axis=0) - points.min(axis=0))
+
+        if tolerance <= 0:
+            return levels
+
+        for level in range(LOD_LEVELS):
+            points, colors, errors = decimate_lines(points, colors, errors, tolerance)
+
+            if len(colors) <= 0.75 * num_lines:
+                LOG.debug("Path level of detail %i: %i lines within %g",
+                          len(levels) + 1, len(colors), tolerance)
+                levels.append((tolerance, points, colors))
+                num_lines = len(colors)
+
+            tolerance *= LOD_FACTOR
+
+        return levels
+
+    def set_lod_levels(self, levels):
+        """Use the levels of detail built by :meth:`decimate`."""
+        self.lod_levels = [(tolerance, _lines_mapper(points, colors))
+                           for tolerance, points, colors in levels]
+
+    def set_lod(self, tolerance):
+        """Draw the coarsest level of detail within `tolerance`.
+
+        Args:
+            tolerance (float) : Max distance from the full detail path that
+                is allowed, 0 for full detail.
+        """
+        mapper = self.data_mapper
+        for level_tolerance, level_mapper in self.lod_levels:
+            if level_tolerance > tolerance:
+                break
+            mapper = level_mapper
+
+        if self.GetMapper() is not mapper:
+            self.SetMapper(mapper)
+
+    def _grow(self, capacity):
+        num_points = 2 * self.num_lines
+
+        point_buffer = np.empty((2 * capacity, 3), dtype=np.float64)
+        point_buffer[:num_points] = self._point_buffer[:num_points]
+        self._point_buffer = point_buffer
+
+        color_buffer = np.empty((capacity, 4), dtype=np.uint8)
+        color_buffer[:self.num_lines] = self._color_buffer[:self.num_lines]
+        self._color_buffer = color_buffer
+
+        # every line has its own pair of points, so the cell layout is fixed
+        self._offset_buffer = np.arange(0, 2 * capacity + 1, 2, dtype=numpy_support.ID_TYPE_CODE)
+        self._connectivity_buffer = np.arange(2 * capacity, dtype=numpy_support.ID_TYPE_CODE)
+
+    def set_extents(self, extents):
+        self.extents = extents
+
+    def get_extents(self):
+        return self.extents
+
     def set_origin_index(self, index):
         self.origin_index = index
 
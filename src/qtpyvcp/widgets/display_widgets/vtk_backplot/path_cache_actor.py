@@ -1,22 +1,57 @@
+import math
+
+import numpy as np
+
 import vtk.qt
+from vtk.util import numpy_support
+
 from qtpyvcp.utilities import logger
 from vtk.util.colors import cyan
 
 LOG = logger.getLogger(__name__)
 
 class PathCacheActor(vtk.vtkActor):
-    def __init__(self, current_position):
+    """Live tool path trail.
+
+    The trail is kept as a single poly line in a fixed size point buffer,
+    so memory use does not grow however long the machine runs. Points that
+    are collinear with the previous segment (within `tolerance`) extend that
+    segment instead of adding a new point, and once the buffer is full the
+    older half of the history is thinned out by dropping every other point.
+
+    The error of the points merged into the last segment adds up as the
+    segment is extended, so it is tracked and a segment is only extended
+    while every merged point stays within `tolerance`.
+
+    Args:
+        current_position (list) : The position to start the trail at.
+        max_points (int) : Maximum number of points kept in the trail.
+        tolerance (float) : Max deviation from a straight line for points
+            to be merged, in machine units.
+    """
+
+    MAX_POINTS = 100000
+    # default tolerance for inch machines, VTKBackPlot scales it for metric
+    TOLERANCE = 0.0001
+
+    def __init__(self, current_position, max_points=MAX_POINTS, tolerance=TOLERANCE):
         super(PathCacheActor, self).__init__()
         self.current_position = current_position
-        self.index = 0
-        self.num_points = 2
+        self.max_points = max(int(max_points), 4)
+        self.tolerance = tolerance
 
-        self.points = vtk.vtkPoints()
-        self.points.InsertNextPoint(current_position)
+        self._point_buffer = np.zeros((self.max_points, 3), dtype=np.float64)
+        self._offset_buffer = np.zeros(2, dtype=numpy_support.ID_TYPE_CODE)
+        self._connectivity_buffer = np.arange(self.max_points, dtype=numpy_support.ID_TYPE_CODE)
+
+        self._point_buffer[0] = current_position[:3]
+        self.num_points = 1
 
+        # max distance of the points merged into the last segment from it
+        self._merge_error = 0.0
+
+        self.points = vtk.vtkPoints()
         self.lines = vtk.vtkCellArray()
-        self.lines.InsertNextCell(1)  # number of points
-        self.lines.InsertCellPoint(0)
 
         self.lines_poligon_data = vtk.vtkPolyData()
         self.polygon_mapper = vtk.vtkPolyDataMapper()
@@ -24,7 +59,9 @@ class PathCacheActor(vtk.vtkActor):
         self.GetProperty().SetLineWidth(2.5)
         self.GetProperty().SetOpacity(0.5)
         self.SetMapper(self.polygon_mapper)
-        
+
+        self._update_data()
+
         self.lines_poligon_data.SetPoints(self.points)
         self.lines_poligon_data.SetLines(self.lines)
 
@@ -36,12 +73,78 @@ class PathCacheActor(vtk.vtkActor):
         self.GetProperty().SetBackfaceCulling(1)
 
     def add_line_point(self, point):
-        self.index += 1
+        x, y, z = point[:3]
+        n = self.num_points
+        buf = self._point_buffer
 
-        self.points.InsertNextPoint(point)
-        self.points.Modified()
+        lx, ly, lz = buf[n - 1]
+        if x == lx and y == ly and z == lz:
+            return
 
-        self.lines.InsertNextCell(self.num_points)
-        self.lines.InsertCellPoint(self.index - 1)
-        self.lines.InsertCellPoint(self.index)
+        error = float('inf')
+        if n > 1:
+            error = self._merge_error + self._deviation(buf[n - 2], lx, ly, lz, x, y, z)
+
+        if error <= self.tolerance:
+            # extend the last segment instead of adding a point
+            buf[n - 1] = (x, y, z)
+            self._merge_error = error
+        else:
+            if n == self.max_points:
+                n = self._decimate()
+            buf[n] = (x, y, z)
+            self.num_points = n + 1
+            self._merge_error = 0.0
+
+        self._update_data()
+
+    def _deviation(self, start, bx, by, bz, px, py, pz):
+        # distance of the last point (b) from the line from the point
+        # before it (a) to the new point (p), infinite if the new point
+        # turns back. The points merged earlier are within the merge error
+        # of the segment a-b, which is itself within this distance of the
+        # segment a-p, so the two add up to a bound for all of them.
+        ax, ay, az = start
+        abx, aby, abz = bx - ax, by - ay, bz - az
+        apx, apy, apz = px - ax, py - ay, pz - az
+
+        if abx * (px - bx) + aby * (py - by) + abz * (pz - bz) < 0:
+            return float('inf')
+
+        ap_sq = apx * apx + apy * apy + apz * apz
+        if ap_sq == 0:
+            return float('inf')
+
+        cx = aby * apz - abz * apy
+        cy = abz * apx - abx * apz
+        cz = abx * apy - aby * apx
+
+        return math.sqrt((cx * cx + cy * cy + cz * cz) / ap_sq)
+
+    def _decimate(self):
+        # keep every other point of the older half of the history
+        n = self.num_points
+        half = n // 2
+        old = self._point_buffer[:half:2].copy()
+        new = self._point_buffer[half:n].copy()
+
+        k = len(old)
+        self._point_buffer[:k] = old
+        self._point_buffer[k:k + len(new)] = new
+        self.num_points = k + len(new)
+        self._merge_error = 0.0
+
+        LOG.debug("Decimated path trail from %i to %i points", n, self.num_points)
+        return self.num_points
+
+    def _update_data(self):
+        n = self.num_points
+        self._offset_buffer[1] = n
+
+        self.points.SetData(numpy_support.numpy_to_vtk(self._point_buffer[:n]))
+        self.lines.SetData(numpy_support.numpy_to_vtkIdTypeArray(self._offset_buffer),
+                           numpy_support.numpy_to_vtkIdTypeArray(self._connectivity_buffer[:n]))
+
+        self.points.Modified()
         self.lines.Modified()
+        self.lines_poligon_data.Modified()
@@ -34,16 +34,12 @@ class ProgramBoundsActor(vtk.vtkCubeAxesActor2D):
         
         self.SetNumberOfLabels(3)
         
-        x_min, x_max, y_min, y_max, z_min, z_max = self.path_actor.GetBounds()
-        
-        self.SetBounds(x_min, x_max, y_min, y_max, z_min, z_max)
+        self.updateBounds()
         
         corner_offset = 0.0
         self.SetCornerOffset(corner_offset)
         
         self.SetUseRanges(1)
-        
-        self.SetRanges(0, x_max - x_min, 0, y_max - y_min, 0, z_max - z_min)
 
         self.SetLabelFormat("%6.3f")
         
@@ -71,6 +67,28 @@ class ProgramBoundsActor(vtk.vtkCubeAxesActor2D):
             bounds = getSetting('backplot.show-program-bounds')
             self.showProgramBounds(bounds and bounds.value)
 
+    def updateBounds(self):
+        """Follow the bounds of the path actor.
+
+        The program extents recorded during the parse are put through the
+        path actor transform, so this only transforms the corners of the
+        extents instead of walking the program again. Falls back to the
+        (cached) VTK bounds of the actor if there are no extents.
+        """
+        extents = self.path_actor.get_extents()
+        if extents is None:
+            x_min, x_max, y_min, y_max, z_min, z_max = self.path_actor.GetBounds()
+        else:
+            matrix = self.path_actor.GetMatrix()
+            (x0, y0, z0), (x1, y1, z1) = extents
+            corners = [matrix.MultiplyPoint((x, y, z, 1.0)) for x in (x0, x1)
+                       for y in (y0, y1) for z in (z0, z1)]
+            x_min, y_min, z_min = [min(corner[i] for corner in corners) for i in range(3)]
+            x_max, y_max, z_max = [max(corner[i] for corner in corners) for i in range(3)]
+
+        self.SetBounds(x_min, x_max, y_min, y_max, z_min, z_max)
+        self.SetRanges(0, x_max - x_min, 0, y_max - y_min, 0, z_max - z_min)
+
     def showProgramBounds(self, bounds):
 
         if bounds:
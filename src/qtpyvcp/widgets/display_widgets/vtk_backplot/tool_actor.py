@@ -22,100 +22,136 @@ from qtpyvcp.lib.db_tool.tool_table import ToolTable, Tool, ToolModel
 
 LOG = logger.getLogger(__name__)
 
-class ToolActor(vtk.vtkActor):
-    def __init__(self, linuxcncDataSource):
-        super(ToolActor, self).__init__()
-        self._datasource = linuxcncDataSource
-        self._tool_table = self._datasource.getToolTable()
 
-        self.session = Session()
+class ToolGeometryCache(object):
+    """Tool geometry shared by all the tool actors.
 
-        tool = self._tool_table[0]
-        colors = vtkNamedColors()
+    The tool actors are recreated on every tool change, so the geometry
+    they show is built once and kept here, keyed on what it is built from
+    (the tool number and geometry, or the STL file and its mtime). The
+    STL models of the tools in the tool DB are looked up in one query the
+    first time they are needed, and again after the DB tool table changed.
+    """
 
-        if self._datasource.isMachineMetric():
-            self.height = 25.4 * 2.0
-        else:
-            self.height = 2.0
+    def __init__(self):
+        self._geometry = {}
+        self._models = None
+        self._db_tool_table = None
 
+    def get(self, key, build):
+        """Get the geometry for key, calling build() to make it if needed.
 
+        Args:
+            key (tuple) : Everything the geometry depends on.
+            build (callable) : Returns the vtkPolyData for key.
 
-        if self._datasource.isMachineFoam():
+        Returns:
+            vtkPolyData : The shared geometry, must not be modified.
+        """
+        polydata = self._geometry.get(key)
+        if polydata is None:
+            LOG.debug("Building tool geometry for {}".format(key))
+            polydata = self._geometry[key] = build()
+        return polydata
 
-            transform = vtk.vtkTransform()
+    def model(self, tool_no):
+        """The STL model file of a tool in the tool DB, or None."""
+        if self._models is None:
+            self._loadModels()
+        return self._models.get(tool_no)
 
-            source = vtk.vtkConeSource()
-            source.SetHeight(self.height / 2)
-            #source.SetCenter(-self.height / 4 - tool.zoffset, -tool.yoffset, -tool.xoffset)
-            source.SetCenter(-self.height / 4, 0, 0)
-            source.SetRadius(self.height / 4)
-            source.SetResolution(64)
-            transform.RotateWXYZ(-90, 0, 1, 0)
-            transform_filter = vtk.vtkTransformPolyDataFilter()
-            transform_filter.SetTransform(transform)
-            transform_filter.SetInputConnection(source.GetOutputPort())
-            transform_filter.Update()
+    def stl(self, filename):
+        """The geometry read from an STL file."""
+        try:
+            mtime = os.path.getmtime(filename)
+        except OSError:
+            mtime = None
 
-            # Create a mapper
-            mapper = vtk.vtkPolyDataMapper()
-            mapper.SetInputConnection(transform_filter.GetOutputPort())
+        def build():
+            source = vtk.vtkSTLReader()
+            source.SetFileName(filename)
+            source.Update()
+            return source.GetOutput()
 
-            self.GetProperty().SetColor(colors.GetColor3d('Red'))
+        return self.get(('stl', filename, mtime), build)
 
-        elif self._datasource.isMachineLathe():
-            mapper = vtk.vtkPolyDataMapper()
-        else:
-            if tool.id == 0 or tool.diameter < .05:
-                transform = vtk.vtkTransform()
+    def clearModels(self, *args):
+        self._models = None
 
-                source = vtk.vtkConeSource()
-                source.SetHeight(self.height / 2)
-                #source.SetCenter(-self.height / 4 - tool.zoffset, -tool.yoffset, -tool.xoffset)
-                source.SetCenter(-self.height / 4, 0, 0)
-                source.SetRadius(self.height / 4)
-                source.SetResolution(64)
-                transform.RotateWXYZ(90, 0, 1, 0)
-                transform_filter = vtk.vtkTransformPolyDataFilter()
-                transform_filter.SetTransform(transform)
-                transform_filter.SetInputConnection(source.GetOutputPort())
-                transform_filter.Update()
+    def _loadModels(self):
+        self._models = {}
 
-                # Create a mapper
-                mapper = vtk.vtkPolyDataMapper()
-                mapper.SetInputConnection(transform_filter.GetOutputPort())
-            else:
-                plugins = dict(iterPlugins())
-                tool_table_plugin = plugins["tooltable"]
+        tool_table_plugin = dict(iterPlugins()).get("tooltable")
+        if not isinstance(tool_table_plugin, DBToolTable):
+            return
 
-                transform = vtk.vtkTransform()
-                # Create a mapper
-                mapper = vtk.vtkPolyDataMapper()
+        if self._db_tool_table is None:
+            self._db_tool_table = tool_table_plugin
+            tool_table_plugin.tool_table_changed.connect(self.clearModels)
 
-                if isinstance(tool_table_plugin, DBToolTable):
-                    tool_data = self.session.query(ToolModel).filter(ToolModel.tool_no == tool.id).first()
+        session = Session()
+        try:
+            for tool_model in session.query(ToolModel).all():
+                self._models.setdefault(tool_model.tool_no, tool_model.model)
+        finally:
+            session.close()
 
-                    if tool_data:
 
-                        filename = tool_data.model
+TOOL_GEOMETRY = ToolGeometryCache()
 
-                        source = vtk.vtkSTLReader()
-                        source.SetFileName(filename)
 
-                        # source = vtk.vtkCylinderSource()
-                        # source.SetHeight(self.height / 2)
-                        # #source.SetCenter(-tool.xoffset, self.height / 4 - tool.zoffset, tool.yoffset)
-                        # source.SetCenter(0, self.height / 4, 0)
-                        # source.SetRadius(tool.diameter / 2)
-                        # source.SetResolution(64)
+def _cone(height, angle):
+    source = vtk.vtkConeSource()
+    source.SetHeight(height / 2)
+    source.SetCenter(-height / 4, 0, 0)
+    source.SetRadius(height / 4)
+    source.SetResolution(64)
 
-                        # transform.RotateWXYZ(180, 1, 0, 0)
+    transform = vtk.vtkTransform()
+    transform.RotateWXYZ(angle, 0, 1, 0)
 
-                        transform_filter = vtk.vtkTransformPolyDataFilter()
-                        transform_filter.SetTransform(transform)
-                        transform_filter.SetInputConnection(source.GetOutputPort())
-                        transform_filter.Update()
+    transform_filter = vtk.vtkTransformPolyDataFilter()
+    transform_filter.SetTransform(transform)
+    transform_filter.SetInputConnection(source.GetOutputPort())
+    transform_filter.Update()
+    return transform_filter.GetOutput()
 
-                        mapper.SetInputConnection(transform_filter.GetOutputPort())
+
+class ToolActor(vtk.vtkActor):
+    def __init__(self, linuxcncDataSource):
+        super(ToolActor, self).__init__()
+        self._datasource = linuxcncDataSource
+        self._tool_table = self._datasource.getToolTable()
+
+        tool = self._tool_table[0]
+        colors = vtkNamedColors()
+
+        if self._datasource.isMachineMetric():
+            self.height = 25.4 * 2.0
+        else:
+            self.height = 2.0
+
+        mapper = vtk.vtkPolyDataMapper()
+
+        if self._datasource.isMachineFoam():
+            mapper.SetInputData(TOOL_GEOMETRY.get(('cone', self.height, -90),
+                                                  lambda: _cone(self.height, -90)))
+
+            self.GetProperty().SetColor(colors.GetColor3d('Red'))
+
+        elif self._datasource.isMachineLathe():
+            pass
+
+        else:
+            # the first call loads the models of all the tools, so this
+            # is done at startup even if there is no tool in the spindle
+            filename = TOOL_GEOMETRY.model(tool.id)
+
+            if tool.id == 0 or tool.diameter < .05:
+                mapper.SetInputData(TOOL_GEOMETRY.get(('cone', self.height, 90),
+                                                      lambda: _cone(self.height, 90)))
+            elif filename:
+                mapper.SetInputData(TOOL_GEOMETRY.stl(filename))
 
         self.SetMapper(mapper)
 
@@ -142,390 +178,383 @@ class ToolBitActor(vtk.vtkActor):
         else:
             self.height = 2.0
 
-        # FOAM TOOL
-
-        if self._datasource.isMachineLathe():
-
-            if tool.id == 0 or tool.id == -1:
-                source = vtk.vtkRegularPolygonSource()
-                source.SetNumberOfSides(64)
-                source.SetRadius(0.035)
-                source.SetCenter(0.0, 0.0, 0.0)
-
-                transform = vtk.vtkTransform()
-                transform.RotateWXYZ(90, 1, 0, 0)
+        mapper = vtkPolyDataMapper()
 
-                transform_filter = vtk.vtkTransformPolyDataFilter()
-                transform_filter.SetTransform(transform)
-                transform_filter.SetInputConnection(source.GetOutputPort())
-                transform_filter.Update()
+        # LATHE TOOL
 
-                # mapper = vtk.vtkPolyDataMapper()
-                # mapper.SetInputConnection(transform_filter.GetOutputPort())
-            else:
-                if tool.orientation == 1 and tool.frontangle == 90 and tool.backangle == 90:
-
-                    # Setup four points
-                    points = vtk.vtkPoints()
-                    points.InsertNextPoint((-tool.xoffset, 0.0, -tool.zoffset - 0.05))
-                    points.InsertNextPoint((-tool.xoffset + 0.5, 0.0, -tool.zoffset - 0.05))
-                    points.InsertNextPoint((-tool.xoffset + 0.5, 0.0, -tool.zoffset))
-                    points.InsertNextPoint((-tool.xoffset, 0.0, -tool.zoffset))
-
-                    # Create the polygon
-                    # Create a quad on the four points
-                    quad = vtk.vtkQuad()
-                    quad.GetPointIds().SetId(0, 0)
-                    quad.GetPointIds().SetId(1, 1)
-                    quad.GetPointIds().SetId(2, 2)
-                    quad.GetPointIds().SetId(3, 3)
-
-                    # Add the polygon to a list of polygons
-                    polygons = vtk.vtkCellArray()
-                    polygons.InsertNextCell(quad)
-
-                    # Create a PolyData
-                    polygonPolyData = vtk.vtkPolyData()
-                    polygonPolyData.SetPoints(points)
-                    polygonPolyData.SetPolys(polygons)
-
-                    # Create a mapper and actor
-                    mapper = vtk.vtkPolyDataMapper()
-                    mapper.SetInputData(polygonPolyData)
-
-                elif tool.orientation == 2 and tool.frontangle == 90 and tool.backangle == 90:
-
-                    # Setup four points
-                    points = vtk.vtkPoints()
-                    points.InsertNextPoint((-tool.xoffset + 0.5, 0.0, -tool.zoffset))
-                    points.InsertNextPoint((-tool.xoffset + 0.5, 0.0, -tool.zoffset + 0.05))
-                    points.InsertNextPoint((-tool.xoffset, 0.0, -tool.zoffset + 0.05))
-                    points.InsertNextPoint((-tool.xoffset, 0.0, -tool.zoffset))
-
-                    # Create the polygon
-                    # Create a quad on the four points
-                    quad = vtk.vtkQuad()
-                    quad.GetPointIds().SetId(0, 0)
-                    quad.GetPointIds().SetId(1, 1)
-                    quad.GetPointIds().SetId(2, 2)
-                    quad.GetPointIds().SetId(3, 3)
-
-                    # Add the polygon to a list of polygons
-                    polygons = vtk.vtkCellArray()
-                    polygons.InsertNextCell(quad)
-
-                    # Create a PolyData
-                    polygonPolyData = vtk.vtkPolyData()
-                    polygonPolyData.SetPoints(points)
-                    polygonPolyData.SetPolys(polygons)
-
-                    # Create a mapper and actor
-                    mapper = vtk.vtkPolyDataMapper()
-                    mapper.SetInputData(polygonPolyData)
-
-                elif tool.orientation == 3 and tool.frontangle == 90 and tool.backangle == 90:
-
-                    # Setup four points
-                    points = vtk.vtkPoints()
-                    points.InsertNextPoint((-tool.xoffset, 0.0, -tool.zoffset))
-                    points.InsertNextPoint((-tool.xoffset, 0.0, -tool.zoffset + 0.05))
-                    points.InsertNextPoint((-tool.xoffset - 0.5, 0.0, -tool.zoffset + 0.05))
-                    points.InsertNextPoint((-tool.xoffset - 0.5, 0.0, -tool.zoffset))
-
-                    # Create the polygon
-                    # Create a quad on the four points
-                    quad = vtk.vtkQuad()
-                    quad.GetPointIds().SetId(0, 0)
-                    quad.GetPointIds().SetId(1, 1)
-                    quad.GetPointIds().SetId(2, 2)
-                    quad.GetPointIds().SetId(3, 3)
-
-                    # Add the polygon to a list of polygons
-                    polygons = vtk.vtkCellArray()
-                    polygons.InsertNextCell(quad)
-
-                    # Create a PolyData
-                    polygonPolyData = vtk.vtkPolyData()
-                    polygonPolyData.SetPoints(points)
-                    polygonPolyData.SetPolys(polygons)
-
-                    # Create a mapper and actor
-                    mapper = vtk.vtkPolyDataMapper()
-                    mapper.SetInputData(polygonPolyData)
-
-                elif tool.orientation == 4 and tool.frontangle == 90 and tool.backangle == 90:
-
-                    # Setup four points
-                    points = vtk.vtkPoints()
-                    points.InsertNextPoint((-tool.xoffset - 0.5, 0.0, -tool.zoffset))
-                    points.InsertNextPoint((-tool.xoffset - 0.5, 0.0, -tool.zoffset - 0.05))
-                    points.InsertNextPoint((-tool.xoffset, 0.0, -tool.zoffset - 0.05))
-                    points.InsertNextPoint((-tool.xoffset, 0.0, -tool.zoffset))
-
-                    # Create the polygon
-                    # Create a quad on the four points
-                    quad = vtk.vtkQuad()
-                    quad.GetPointIds().SetId(0, 0)
-                    quad.GetPointIds().SetId(1, 1)
-                    quad.GetPointIds().SetId(2, 2)
-                    quad.GetPointIds().SetId(3, 3)
-
-                    # Add the polygon to a list of polygons
-                    polygons = vtk.vtkCellArray()
-                    polygons.InsertNextCell(quad)
-
-                    # Create a PolyData
-                    polygonPolyData = vtk.vtkPolyData()
-                    polygonPolyData.SetPoints(points)
-                    polygonPolyData.SetPolys(polygons)
-
-                    # Create a mapper and actor
-                    mapper = vtk.vtkPolyDataMapper()
-                    mapper.SetInputData(polygonPolyData)
-
-                elif tool.orientation == 9:
-
-                    radius = tool.diameter / 2
-
-                    # Setup four points
-                    points = vtk.vtkPoints()
-                    points.InsertNextPoint((-tool.xoffset + radius, 0.0, -tool.zoffset))
-                    points.InsertNextPoint((-tool.xoffset + radius, 0.0, -tool.zoffset + 1.0))
-                    points.InsertNextPoint((-tool.xoffset - radius, 0.0, -tool.zoffset + 1.0))
-                    points.InsertNextPoint((-tool.xoffset - radius, 0.0, -tool.zoffset))
-
-                    # Create the polygon
-                    # Create a quad on the four points
-                    quad = vtk.vtkQuad()
-                    quad.GetPointIds().SetId(0, 0)
-                    quad.GetPointIds().SetId(1, 1)
-                    quad.GetPointIds().SetId(2, 2)
-                    quad.GetPointIds().SetId(3, 3)
-
-                    # Add the polygon to a list of polygons
-                    polygons = vtk.vtkCellArray()
-                    polygons.InsertNextCell(quad)
-
-                    # Create a PolyData
-                    polygonPolyData = vtk.vtkPolyData()
-                    polygonPolyData.SetPoints(points)
-                    polygonPolyData.SetPolys(polygons)
-
-                    # Create a mapper and actor
-                    mapper = vtk.vtkPolyDataMapper()
-                    mapper.SetInputData(polygonPolyData)
-                else:
-                    positive = 1
-                    negative = -1
-                    flip = False
+        if self._datasource.isMachineLathe():
+            key = ('lathe', tool.id, tool.orientation, tool.frontangle, tool.backangle,
+                   tool.xoffset, tool.zoffset, tool.diameter)
+            mapper.SetInputData(TOOL_GEOMETRY.get(key, lambda: self._build_lathe_tool(tool)))
 
-                    if tool.orientation == 1:
-                        fa_x_pol = negative
-                        fa_z_pol = negative
+        # FOAM TOOL
 
-                        ba_x_pol = negative
-                        ba_z_pol = negative
-                        flip = True
-
-                    elif tool.orientation == 2:
-                        fa_x_pol = negative
-                        fa_z_pol = positive
-
-                        ba_x_pol = negative
-                        ba_z_pol = positive
+        elif self._datasource.isMachineFoam():
 
-                    elif tool.orientation == 3:
-                        fa_x_pol = positive
-                        fa_z_pol = positive
+            # if self._datasource.isMachineMetric:
+            #       self.foam_z *= 254
+            #       self.foam_w *= 254
+            #
 
-                        ba_x_pol = positive
-                        ba_z_pol = positive
-                        flip = True
+            # the line is moved with the position, so is not shared
+            self.start_point = [tool.xoffset, tool.yoffset, tool.zoffset+self.foam_z]
+            self.end_point = [tool.uoffset, tool.voffset, tool.woffset+self.foam_z]
 
-                    elif tool.orientation == 4:
-                        fa_x_pol = positive
-                        fa_z_pol = negative
+            self.source = vtkLineSource()
+            self.source.SetPoint1(self.start_point)
+            self.source.SetPoint2(self.end_point)
 
-                        ba_x_pol = positive
-                        ba_z_pol = negative
-                        flip = True
+            transform = vtk.vtkTransform()
 
-                    elif tool.orientation == 5:
-                        fa_x_pol = negative
-                        fa_z_pol = negative
+            transform.RotateWXYZ(0, 1, 0, 0)
 
-                        ba_x_pol = positive
-                        ba_z_pol = negative
-                        flip = True
+            transform.RotateX(tool.aoffset)
+            transform.RotateY(tool.boffset)
+            transform.RotateZ(tool.coffset)
 
-                    elif tool.orientation == 6:
-                        fa_x_pol = negative
-                        fa_z_pol = positive
+            transform_filter = vtk.vtkTransformPolyDataFilter()
+            transform_filter.SetTransform(transform)
+            transform_filter.SetInputConnection(self.source.GetOutputPort())
+            transform_filter.Update()
 
-                        ba_x_pol = negative
-                        ba_z_pol = negative
-                        flip = True
+            mapper.SetInputConnection(transform_filter.GetOutputPort())
 
-                    elif tool.orientation == 7:
-                        fa_x_pol = positive
-                        fa_z_pol = positive
+        # CNC TOOL
 
-                        ba_x_pol = negative
-                        ba_z_pol = positive
+        else:
+            key = ('mill', tool.xoffset, tool.yoffset, tool.zoffset, tool.diameter,
+                   tool.aoffset, tool.boffset, tool.coffset)
+            mapper.SetInputData(TOOL_GEOMETRY.get(key, lambda: self._build_mill_tool(tool)))
 
-                    elif tool.orientation == 8:
-                        fa_x_pol = positive
-                        fa_z_pol = positive
+        self.SetMapper(mapper)
 
-                        ba_x_pol = positive
-                        ba_z_pol = negative
-                    else:
-                        fa_x_pol = 0.0
-                        fa_z_pol = 0.0
+        # Avoid visible backfaces on Linux with some video cards like intel
+        # From: https://stackoverflow.com/questions/51357630/vtk-rendering-not-working-as-expected-inside-pyqt?rq=1#comment89720589_51360335
+        self.GetProperty().SetBackfaceCulling(1)
 
-                        ba_x_pol = 0.0
-                        ba_z_pol = 0.0
+    def _build_mill_tool(self, tool):
+        source = vtkCylinderSource()
+        transform = vtk.vtkTransform()
 
-                    A = radians(float(tool.frontangle))
-                    B = radians(float(tool.backangle))
-                    C = 0.35
+        tool_height = tool.zoffset
 
-                    p1_x = abs(C * sin(A))
-                    p1_z = abs(C * cos(A))
+        source.SetHeight(tool_height)
+        source.SetCenter(tool.xoffset, -tool_height/2, tool.yoffset)
+        source.SetRadius(tool.diameter / 2)
+        source.SetResolution(64)
 
-                    p2_x = abs(C * sin(B))
-                    p2_z = abs(C * cos(B))
+        transform.RotateWXYZ(90, 1, 0, 0)
 
-                    p1_x_pos = p1_x * fa_x_pol
-                    p1_z_pos = p1_z * fa_z_pol
+        transform.RotateX(tool.aoffset)
+        transform.RotateY(tool.boffset)
+        transform.RotateZ(tool.coffset)
 
-                    p2_x_pos = p2_x * ba_x_pol
-                    p2_z_pos = p2_z * ba_z_pol
+        transform_filter = vtk.vtkTransformPolyDataFilter()
+        transform_filter.SetTransform(transform)
+        transform_filter.SetInputConnection(source.GetOutputPort())
+        transform_filter.Update()
 
-                    LOG.debug("Drawing Lathe tool id {}".format(tool.id))
+        return transform_filter.GetOutput()
 
-                    LOG.debug("FrontAngle {} Point P1 X = {} P1 Z = {}"
-                              .format(float(tool.frontangle), p1_x_pos, p1_z_pos))
-                    LOG.debug("BackAngle {} Point P2 X = {} P2 Z = {}"
-                              .format(float(tool.backangle), p2_x_pos, p2_z_pos))
+    def _build_lathe_tool(self, tool):
+        if tool.id == 0 or tool.id == -1:
+            source = vtk.vtkRegularPolygonSource()
+            source.SetNumberOfSides(64)
+            source.SetRadius(0.035)
+            source.SetCenter(0.0, 0.0, 0.0)
 
-                    # Setup three points
-                    points = vtk.vtkPoints()
+            transform = vtk.vtkTransform()
+            transform.RotateWXYZ(90, 1, 0, 0)
 
-                    if flip:
-                        points.InsertNextPoint((tool.xoffset + p2_x_pos, 0.0, p2_z_pos - tool.zoffset))
-                        points.InsertNextPoint((tool.xoffset + p1_x_pos, 0.0, p1_z_pos - tool.zoffset))
-                        points.InsertNextPoint((tool.xoffset, 0.0, -tool.zoffset))
-                    else:
-                        points.InsertNextPoint((tool.xoffset, 0.0, -tool.zoffset))
-                        points.InsertNextPoint((tool.xoffset + p1_x_pos, 0.0, p1_z_pos - tool.zoffset))
-                        points.InsertNextPoint((tool.xoffset + p2_x_pos, 0.0, p2_z_pos - tool.zoffset))
+            transform_filter = vtk.vtkTransformPolyDataFilter()
+            transform_filter.SetTransform(transform)
+            transform_filter.SetInputConnection(source.GetOutputPort())
+            transform_filter.Update()
 
-                    # Create the polygon
-                    polygon = vtk.vtkPolygon()
-                    polygon.GetPointIds().SetNumberOfIds(6)  # make a quad
-                    polygon.GetPointIds().SetId(0, 0)
-                    polygon.GetPointIds().SetId(1, 1)
-                    polygon.GetPointIds().SetId(2, 2)
+            # mapper = vtk.vtkPolyDataMapper()
+            # mapper.SetInputConnection(transform_filter.GetOutputPort())
+        else:
+            if tool.orientation == 1 and tool.frontangle == 90 and tool.backangle == 90:
+
+                # Setup four points
+                points = vtk.vtkPoints()
+                points.InsertNextPoint((-tool.xoffset, 0.0, -tool.zoffset - 0.05))
+                points.InsertNextPoint((-tool.xoffset + 0.5, 0.0, -tool.zoffset - 0.05))
+                points.InsertNextPoint((-tool.xoffset + 0.5, 0.0, -tool.zoffset))
+                points.InsertNextPoint((-tool.xoffset, 0.0, -tool.zoffset))
+
+                # Create the polygon
+                # Create a quad on the four points
+                quad = vtk.vtkQuad()
+                quad.GetPointIds().SetId(0, 0)
+                quad.GetPointIds().SetId(1, 1)
+                quad.GetPointIds().SetId(2, 2)
+                quad.GetPointIds().SetId(3, 3)
+
+                # Add the polygon to a list of polygons
+                polygons = vtk.vtkCellArray()
+                polygons.InsertNextCell(quad)
+
+                # Create a PolyData
+                polygonPolyData = vtk.vtkPolyData()
+                polygonPolyData.SetPoints(points)
+                polygonPolyData.SetPolys(polygons)
+
+                return polygonPolyData
+
+            elif tool.orientation == 2 and tool.frontangle == 90 and tool.backangle == 90:
+
+                # Setup four points
+                points = vtk.vtkPoints()
+                points.InsertNextPoint((-tool.xoffset + 0.5, 0.0, -tool.zoffset))
+                points.InsertNextPoint((-tool.xoffset + 0.5, 0.0, -tool.zoffset + 0.05))
+                points.InsertNextPoint((-tool.xoffset, 0.0, -tool.zoffset + 0.05))
+                points.InsertNextPoint((-tool.xoffset, 0.0, -tool.zoffset))
+
+                # Create the polygon
+                # Create a quad on the four points
+                quad = vtk.vtkQuad()
+                quad.GetPointIds().SetId(0, 0)
+                quad.GetPointIds().SetId(1, 1)
+                quad.GetPointIds().SetId(2, 2)
+                quad.GetPointIds().SetId(3, 3)
+
+                # Add the polygon to a list of polygons
+                polygons = vtk.vtkCellArray()
+                polygons.InsertNextCell(quad)
+
+                # Create a PolyData
+                polygonPolyData = vtk.vtkPolyData()
+                polygonPolyData.SetPoints(points)
+                polygonPolyData.SetPolys(polygons)
+
+                return polygonPolyData
+
+            elif tool.orientation == 3 and tool.frontangle == 90 and tool.backangle == 90:
+
+                # Setup four points
+                points = vtk.vtkPoints()
+                points.InsertNextPoint((-tool.xoffset, 0.0, -tool.zoffset))
+                points.InsertNextPoint((-tool.xoffset, 0.0, -tool.zoffset + 0.05))
+                points.InsertNextPoint((-tool.xoffset - 0.5, 0.0, -tool.zoffset + 0.05))
+                points.InsertNextPoint((-tool.xoffset - 0.5, 0.0, -tool.zoffset))
+
+                # Create the polygon
+                # Create a quad on the four points
+                quad = vtk.vtkQuad()
+                quad.GetPointIds().SetId(0, 0)
+                quad.GetPointIds().SetId(1, 1)
+                quad.GetPointIds().SetId(2, 2)
+                quad.GetPointIds().SetId(3, 3)
+
+                # Add the polygon to a list of polygons
+                polygons = vtk.vtkCellArray()
+                polygons.InsertNextCell(quad)
+
+                # Create a PolyData
+                polygonPolyData = vtk.vtkPolyData()
+                polygonPolyData.SetPoints(points)
+                polygonPolyData.SetPolys(polygons)
+
+                return polygonPolyData
+
+            elif tool.orientation == 4 and tool.frontangle == 90 and tool.backangle == 90:
+
+                # Setup four points
+                points = vtk.vtkPoints()
+                points.InsertNextPoint((-tool.xoffset - 0.5, 0.0, -tool.zoffset))
+                points.InsertNextPoint((-tool.xoffset - 0.5, 0.0, -tool.zoffset - 0.05))
+                points.InsertNextPoint((-tool.xoffset, 0.0, -tool.zoffset - 0.05))
+                points.InsertNextPoint((-tool.xoffset, 0.0, -tool.zoffset))
+
+                # Create the polygon
+                # Create a quad on the four points
+                quad = vtk.vtkQuad()
+                quad.GetPointIds().SetId(0, 0)
+                quad.GetPointIds().SetId(1, 1)
+                quad.GetPointIds().SetId(2, 2)
+                quad.GetPointIds().SetId(3, 3)
+
+                # Add the polygon to a list of polygons
+                polygons = vtk.vtkCellArray()
+                polygons.InsertNextCell(quad)
+
+                # Create a PolyData
+                polygonPolyData = vtk.vtkPolyData()
+                polygonPolyData.SetPoints(points)
+                polygonPolyData.SetPolys(polygons)
+
+                return polygonPolyData
+
+            elif tool.orientation == 9:
+
+                radius = tool.diameter / 2
+
+                # Setup four points
+                points = vtk.vtkPoints()
+                points.InsertNextPoint((-tool.xoffset + radius, 0.0, -tool.zoffset))
+                points.InsertNextPoint((-tool.xoffset + radius, 0.0, -tool.zoffset + 1.0))
+                points.InsertNextPoint((-tool.xoffset - radius, 0.0, -tool.zoffset + 1.0))
+                points.InsertNextPoint((-tool.xoffset - radius, 0.0, -tool.zoffset))
+
+                # Create the polygon
+                # Create a quad on the four points
+                quad = vtk.vtkQuad()
+                quad.GetPointIds().SetId(0, 0)
+                quad.GetPointIds().SetId(1, 1)
+                quad.GetPointIds().SetId(2, 2)
+                quad.GetPointIds().SetId(3, 3)
+
+                # Add the polygon to a list of polygons
+                polygons = vtk.vtkCellArray()
+                polygons.InsertNextCell(quad)
+
+                # Create a PolyData
+                polygonPolyData = vtk.vtkPolyData()
+                polygonPolyData.SetPoints(points)
+                polygonPolyData.SetPolys(polygons)
+
+                return polygonPolyData
+            else:
+                positive = 1
+                negative = -1
+                flip = False
 
-                    polygon.GetPointIds().SetId(3, 2)
-                    polygon.GetPointIds().SetId(4, 1)
-                    polygon.GetPointIds().SetId(5, 0)
+                if tool.orientation == 1:
+                    fa_x_pol = negative
+                    fa_z_pol = negative
 
-                    # Add the polygon to a list of polygons
-                    polygons = vtk.vtkCellArray()
-                    polygons.InsertNextCell(polygon)
+                    ba_x_pol = negative
+                    ba_z_pol = negative
+                    flip = True
 
-                    # Create a PolyData
-                    polygon_poly_data = vtk.vtkPolyData()
-                    polygon_poly_data.SetPoints(points)
-                    polygon_poly_data.SetPolys(polygons)
+                elif tool.orientation == 2:
+                    fa_x_pol = negative
+                    fa_z_pol = positive
 
-                    transform = vtk.vtkTransform()
-                    transform.RotateWXYZ(180, 0, 0, 1)
+                    ba_x_pol = negative
+                    ba_z_pol = positive
 
-                    transform_filter = vtk.vtkTransformPolyDataFilter()
-                    transform_filter.SetTransform(transform)
-                    transform_filter.SetInputData(polygon_poly_data)
-                    transform_filter.Update()
+                elif tool.orientation == 3:
+                    fa_x_pol = positive
+                    fa_z_pol = positive
 
-                    # Create a mapper
-                    # mapper = vtk.vtkPolyDataMapper()
-                    # mapper.SetInputConnection(transform_filter.GetOutputPort())
+                    ba_x_pol = positive
+                    ba_z_pol = positive
+                    flip = True
 
-        # LATHE TOOL
+                elif tool.orientation == 4:
+                    fa_x_pol = positive
+                    fa_z_pol = negative
 
-        elif self._datasource.isMachineFoam():
+                    ba_x_pol = positive
+                    ba_z_pol = negative
+                    flip = True
 
-            # if self._datasource.isMachineMetric:
-            #       self.foam_z *= 254
-            #       self.foam_w *= 254
-            #
+                elif tool.orientation == 5:
+                    fa_x_pol = negative
+                    fa_z_pol = negative
 
+                    ba_x_pol = positive
+                    ba_z_pol = negative
+                    flip = True
 
-            self.start_point = [tool.xoffset, tool.yoffset, tool.zoffset+self.foam_z]
-            self.end_point = [tool.uoffset, tool.voffset, tool.woffset+self.foam_z]
+                elif tool.orientation == 6:
+                    fa_x_pol = negative
+                    fa_z_pol = positive
 
-            self.source = vtkLineSource()
-            self.source.SetPoint1(self.start_point)
-            self.source.SetPoint2(self.end_point)
+                    ba_x_pol = negative
+                    ba_z_pol = negative
+                    flip = True
 
-            transform = vtk.vtkTransform()
+                elif tool.orientation == 7:
+                    fa_x_pol = positive
+                    fa_z_pol = positive
 
-            # # source.SetHeight(tool.zoffset)
-            # source.SetHeight(10)
-            # source.SetCenter(tool.xoffset, tool.zoffset - 5, tool.yoffset,)
-            # source.SetRadius(tool.diameter / 2)
-            # source.SetResolution(64)
+                    ba_x_pol = negative
+                    ba_z_pol = positive
 
-            transform.RotateWXYZ(0, 1, 0, 0)
+                elif tool.orientation == 8:
+                    fa_x_pol = positive
+                    fa_z_pol = positive
 
-            transform.RotateX(tool.aoffset)
-            transform.RotateY(tool.boffset)
-            transform.RotateZ(tool.coffset)
+                    ba_x_pol = positive
+                    ba_z_pol = negative
+                else:
+                    fa_x_pol = 0.0
+                    fa_z_pol = 0.0
 
-            transform_filter = vtk.vtkTransformPolyDataFilter()
-            transform_filter.SetTransform(transform)
-            transform_filter.SetInputConnection(self.source.GetOutputPort())
-            transform_filter.Update()
+                    ba_x_pol = 0.0
+                    ba_z_pol = 0.0
 
-        # CNC TOOL
+                A = radians(float(tool.frontangle))
+                B = radians(float(tool.backangle))
+                C = 0.35
 
-        else:
+                p1_x = abs(C * sin(A))
+                p1_z = abs(C * cos(A))
 
-            self.source = vtkCylinderSource()
-            transform = vtk.vtkTransform()
+                p2_x = abs(C * sin(B))
+                p2_z = abs(C * cos(B))
 
-            tool_height = tool.zoffset
+                p1_x_pos = p1_x * fa_x_pol
+                p1_z_pos = p1_z * fa_z_pol
 
-            self.source.SetHeight(tool_height)
-            self.source.SetCenter(tool.xoffset, -tool_height/2, tool.yoffset)
-            self.source.SetRadius(tool.diameter / 2)
-            self.source.SetResolution(64)
+                p2_x_pos = p2_x * ba_x_pol
+                p2_z_pos = p2_z * ba_z_pol
 
-            transform.RotateWXYZ(90, 1, 0, 0)
+                LOG.debug("Drawing Lathe tool id {}".format(tool.id))
 
-            transform.RotateX(tool.aoffset)
-            transform.RotateY(tool.boffset)
-            transform.RotateZ(tool.coffset)
+                LOG.debug("FrontAngle {} Point P1 X = {} P1 Z = {}"
+                          .format(float(tool.frontangle), p1_x_pos, p1_z_pos))
+                LOG.debug("BackAngle {} Point P2 X = {} P2 Z = {}"
+                          .format(float(tool.backangle), p2_x_pos, p2_z_pos))
 
-            transform_filter = vtk.vtkTransformPolyDataFilter()
-            transform_filter.SetTransform(transform)
-            transform_filter.SetInputConnection(self.source.GetOutputPort())
-            transform_filter.Update()
+                # Setup three points
+                points = vtk.vtkPoints()
 
-        # colors = vtkNamedColors()
+                if flip:
+                    points.InsertNextPoint((tool.xoffset + p2_x_pos, 0.0, p2_z_pos - tool.zoffset))
+                    points.InsertNextPoint((tool.xoffset + p1_x_pos, 0.0, p1_z_pos - tool.zoffset))
+                    points.InsertNextPoint((tool.xoffset, 0.0, -tool.zoffset))
+                else:
+                    points.InsertNextPoint((tool.xoffset, 0.0, -tool.zoffset))
+                    points.InsertNextPoint((tool.xoffset + p1_x_pos, 0.0, p1_z_pos - tool.zoffset))
+                    points.InsertNextPoint((tool.xoffset + p2_x_pos, 0.0, p2_z_pos - tool.zoffset))
+
+                # Create the polygon
+                polygon = vtk.vtkPolygon()
+                polygon.GetPointIds().SetNumberOfIds(6)  # make a quad
+                polygon.GetPointIds().SetId(0, 0)
+                polygon.GetPointIds().SetId(1, 1)
+                polygon.GetPointIds().SetId(2, 2)
+
+                polygon.GetPointIds().SetId(3, 2)
+                polygon.GetPointIds().SetId(4, 1)
+                polygon.GetPointIds().SetId(5, 0)
+
+                # Add the polygon to a list of polygons
+                polygons = vtk.vtkCellArray()
+                polygons.InsertNextCell(polygon)
+
+                # Create a PolyData
+                polygon_poly_data = vtk.vtkPolyData()
+                polygon_poly_data.SetPoints(points)
+                polygon_poly_data.SetPolys(polygons)
 
-        # Create a mapper and actor for the arrow
-        mapper = vtkPolyDataMapper()
-        mapper.SetInputConnection(transform_filter.GetOutputPort())
+                transform = vtk.vtkTransform()
+                transform.RotateWXYZ(180, 0, 0, 1)
 
+                transform_filter = vtk.vtkTransformPolyDataFilter()
+                transform_filter.SetTransform(transform)
+                transform_filter.SetInputData(polygon_poly_data)
+                transform_filter.Update()
 
-        self.SetMapper(mapper)
+                # Create a mapper
+                # mapper = vtk.vtkPolyDataMapper()
+                # mapper.SetInputConnection(transform_filter.GetOutputPort())
 
-        # Avoid visible backfaces on Linux with some video cards like intel
-        # From: https://stackoverflow.com/questions/51357630/vtk-rendering-not-working-as-expected-inside-pyqt?rq=1#comment89720589_51360335
-        self.GetProperty().SetBackfaceCulling(1)
+        return transform_filter.GetOutput()
 
     def set_foam_offsets(self, zo, wo):
 
@@ -540,6 +569,3 @@ class ToolBitActor(vtk.vtkActor):
 
         self.source.SetPoint1(x, y ,z+self.foam_z)
         self.source.SetPoint2(u, v, w+self.foam_w)
-
-
-
@@ -4,13 +4,15 @@ import yaml
 
 import linuxcnc
 import os
+import math
 from collections import OrderedDict
 from operator import add
 import time
+import threading
 
 import vtk
 import vtk.qt
-from qtpy.QtCore import Qt, Property, Slot, QObject, QEvent
+from qtpy.QtCore import Qt, Property, Signal, Slot, QObject, QEvent, QTimer
 from qtpy.QtGui import QColor
 
 # Fix poligons not drawing correctly on some GPU
@@ -26,6 +28,7 @@ from qtpyvcp import actions
 from qtpyvcp.widgets import VCPWidget
 from qtpyvcp.utilities import logger
 from qtpyvcp.utilities.settings import connectSetting, getSetting
+from qtpyvcp.utilities.stat_snapshot import StatSnapshot
 from qtpyvcp.plugins import iterPlugins, getPlugin
 
 from .base_backplot import BaseBackPlot
@@ -95,10 +98,42 @@ class InteractorEventFilter(QObject):
         return super().eventFilter(obj, event)
 
 class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
+
+    # default cap on the number of renders per second
+    MAX_FPS = 30
+
+    # allowed deviation of the drawn tool path from the program, in pixels,
+    # while the view is being rotated, panned or zoomed and when it is idle
+    LOD_INTERACTIVE_PIXELS = 2.0
+    LOD_IDLE_PIXELS = 0.0
+
+    # (path actor, levels) decimated in the level of detail thread
+    lodBuilt = Signal(object, object)
+
     def __init__(self, parent=None):
         super(VTKBackPlot, self).__init__(parent)
         LOG.debug("---------using refactored vtk code")
 
+        # renders are scheduled with scheduleRender(), which renders the
+        # scene at most once per frame however often it is called
+        self._max_fps = self.MAX_FPS
+        self._last_render = 0.0
+
+        # live plot point budget, and merge tolerance in machine units,
+        # 0 picks the PathCacheActor default for the machine units
+        self._live_plot_max_points = PathCacheActor.MAX_POINTS
+        self._live_plot_tolerance = 0.0
+        self._render_timer = QTimer(self)
+        self._render_timer.setSingleShot(True)
+        self._render_timer.timeout.connect(self._render)
+
+        # results that were not streamed while parsing, e.g. served from
+        # the parse cache, are drawn a batch per event loop iteration
+        self._draw_batches = None
+        self._draw_timer = QTimer(self)
+        self._draw_timer.setInterval(0)
+        self._draw_timer.timeout.connect(self._draw_next_batch)
+
         event_filter = InteractorEventFilter(self)
 
         self.installEventFilter(event_filter)
@@ -113,6 +148,9 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
         self.pan_mode = False
         self.line = None
         self._last_filename = str()
+        self._load_start_time = 0.0
+        self._last_batch_render = 0.0
+        self._streamed_segments = 0
         self.rotating = 0
         self.panning = 0
         self.zooming = 0
@@ -154,6 +192,14 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
         self.tooltip_position = (0.0, 0.0, 0.0)
         self.joints = self._datasource._status.joint
 
+        # reused for every position update
+        self.tool_transform = vtk.vtkTransform()
+
+        # one transform per coordinate system, shared by the path, axes and
+        # bounds actors of that WCS so an offset change is a matrix update
+        self.wcs_transforms = dict()
+        self.axes_transform = vtk.vtkTransform()
+
         self.foam_offset = [0.0, 0.0]
 
         self.camera = vtk.vtkCamera()
@@ -192,12 +238,11 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
             LOG.debug("---------translate1: {}".format(self.active_wcs_offset[:3]))
             LOG.debug("---------active_wcs_offset: {}".format(self.active_wcs_offset))
 
-            transform = vtk.vtkTransform()
-            transform.Translate(*self.active_wcs_offset[:3])
-            transform.RotateZ(self.active_wcs_offset[9])
-            self.axes_actor.SetUserTransform(transform)
+            self._set_transform(self.axes_transform, self.active_wcs_offset[:3],
+                                self.active_wcs_offset[9])
+            self.axes_actor.SetUserTransform(self.axes_transform)
 
-            self.path_cache_actor = PathCacheActor(self.tooltip_position)
+            self.path_cache_actor = self._new_path_cache_actor()
 
 
             self.table_model = self._datasource._inifile.find("DISPLAY", "TABLE")
@@ -220,6 +265,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
             self.tool_actor = ToolActor(self._datasource)
             self.tool_bit_actor = ToolBitActor(self._datasource)
 
+            self.path_actors = OrderedDict()
             self.offset_axes = OrderedDict()
             self.program_bounds_actors = OrderedDict()
             self.show_program_bounds = bool()
@@ -242,6 +288,9 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
 
             # Add the observers to watch for particular events. These invoke Python functions.
             self._datasource.programLoaded.connect(self.load_program)
+            self.parse_cache.batchParsed.connect(self.parse_batch)
+            self.parse_cache.parseFinished.connect(self.parse_finished)
+            self.lodBuilt.connect(self._set_lod_levels)
             self._datasource.positionChanged.connect(self.update_position)
             self._datasource.motionTypeChanged.connect(self.motion_type)
             self._datasource.g5xOffsetChanged.connect(self.update_g5x_offset)
@@ -276,7 +325,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
 
         if not IN_DESIGNER:
 
-            self.canon = VTKCanon(colors=self.path_colors)
+            self.canon = VTKCanon(colors=self.path_colors, stat=StatSnapshot().stat)
             self.path_actors = self.canon.get_path_actors()
 
             for wcs_index, path_actor in list(self.path_actors.items()):
@@ -286,9 +335,8 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
                 LOG.debug("---------wcs_index: {}".format(wcs_index))
                 LOG.debug("---------current_offsets: {}".format(current_offsets))
 
-                actor_transform = vtk.vtkTransform()
-                actor_transform.Translate(*current_offsets[:3])
-                actor_transform.RotateZ(current_offsets[9])
+                actor_transform = self._wcs_transform(wcs_index)
+                self._set_transform(actor_transform, current_offsets[:3], current_offsets[9])
 
                 path_actor.SetUserTransform(actor_transform)
                 path_actor.SetPosition(*current_offsets[:3])
@@ -298,6 +346,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
                 program_bounds_actor = ProgramBoundsActor(self.camera, path_actor)
 
                 axes = path_actor.get_axes_actor()
+                axes.SetUserTransform(actor_transform)
 
                 self.offset_axes[wcs_index] = axes
                 self.program_bounds_actors[wcs_index] = program_bounds_actor
@@ -322,7 +371,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
             self.renderer.AddActor(self.path_cache_actor)
 
             self.interactor.ReInitialize()
-            self.renderer_window.Render()
+            self.scheduleRender()
 
             # self.setViewP()
             # self.renderer.ResetCamera()
@@ -361,6 +410,9 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
         elif event == "RightButtonReleaseEvent":
             self.zooming = 0
 
+        # switch the path level of detail for the new interaction state
+        self.scheduleRender()
+
     def mouse_scroll_backward(self, obj, event):
         self.zoomOut()
 
@@ -405,7 +457,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
         camera.Elevation(lastY - y)
         camera.OrthogonalizeViewUp()
         camera.SetClippingRange(self.clipping_range_near, self.clipping_range_far)
-        self.renderer_window.Render()
+        self.scheduleRender()
         # self.renderer.ResetCamera()
         self.interactor.ReInitialize()
 
@@ -460,7 +512,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
                            (FPoint1 - RPoint1) / 1.0 + PPoint1,
                            (FPoint2 - RPoint2) / 1.0 + PPoint2)
 
-        self.renderer_window.Render()
+        self.scheduleRender()
 
     # Dolly converts y-motion into a camera dolly commands.
     def dolly(self, renderer, camera, x, y, lastX, lastY, centerX, centerY):
@@ -472,7 +524,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
             camera.Dolly(dollyFactor)
             renderer.ResetCameraClippingRange()
 
-        self.renderer_window.Render()
+        self.scheduleRender()
 
     # Surface sets the representation of all actors to surface or wireframe.
     def _setRepresentation(self, keyPressed):
@@ -487,7 +539,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
                 # sets the representation of all actors to wireframe.
                 actor.GetProperty().SetRepresentationToWireframe()
             actor = actors.GetNextItem()
-        self.renderer_window.Render()
+        self.scheduleRender()
 
     def tlo(self, tlo):
         LOG.debug(tlo)
@@ -501,35 +553,97 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
         LOG.debug("-------load_program")
 
         # Cleanup the scene, remove any previous actors if any
+        self._draw_timer.stop()
+        self._draw_batches = None
+        self._remove_path_actors()
+
+        if fname:
+            # create the object which handles the canonical motion callbacks
+            # (straight_feed, straight_traverse, arc_feed, rigid_tap, etc.)
+            self.canon = VTKCanon(colors=self.path_colors, stat=StatSnapshot().stat)
+            self._load_start_time = time.time()
+            self._last_batch_render = 0.0
+            self._streamed_segments = 0
+            self.load(fname)
+
+    def _remove_path_actors(self):
         for wcs_index, actor in list(self.path_actors.items()):
             LOG.debug("-------load_program wcs_index: {}".format(wcs_index))
             axes_actor = actor.get_axes_actor()
-            program_bounds_actor = self.program_bounds_actors[wcs_index]
+            program_bounds_actor = self.program_bounds_actors.get(wcs_index)
 
             self.renderer.RemoveActor(axes_actor)
             self.renderer.RemoveActor(actor)
-            self.renderer.RemoveActor(program_bounds_actor)
+            if program_bounds_actor is not None:
+                self.renderer.RemoveActor(program_bounds_actor)
 
         self.path_actors.clear()
         self.offset_axes.clear()
         self.program_bounds_actors.clear()
 
-        start_time = time.time()
+    def parse_batch(self, batch):
+        # render the partial tool path while the program is being parsed
+        if not super(VTKBackPlot, self).parse_batch(batch):
+            return
 
-        if fname:
-            # create the object which handles the canonical motion callbacks
-            # (straight_feed, straight_traverse, arc_feed, rigid_tap, etc.)
-            self.canon = VTKCanon(colors=self.path_colors)
-            self.load(fname)
-        else:
+        self._streamed_segments += len(batch)
+
+        for wcs_index, actor in self.canon.add_batch(batch):
+            self._add_path_actor(wcs_index, actor)
+
+        self.path_actors = self.canon.get_path_actors()
+
+        # the path is re-uploaded on every render, so don't do it per batch
+        if time.time() - self._last_batch_render > 0.25:
+            self._last_batch_render = time.time()
+            self.scheduleRender()
+
+    def parse_finished(self, result):
+        if not super(VTKBackPlot, self).parse_finished(result):
             return
 
-        LOG.debug("-------Load time %s seconds ---" % (time.time() - start_time))
+        LOG.debug("-------Load time %s seconds ---" % (time.time() - self._load_start_time))
 
-        self.canon.draw_lines()
+        # the foam heights may be set by a comment after the first batches
+        foam_changed = self._datasource.isMachineFoam() and \
+            tuple(result.foam) != tuple(self.canon.get_foam())
 
-        LOG.debug("-------Draw time %s seconds ---" % (time.time() - start_time))
+        if self._streamed_segments != len(result) or foam_changed:
+            # served from the cache, only part of it was streamed or it
+            # was streamed at the wrong foam heights, draw it again through
+            # the same batches as a streamed parse so no frame is blocked
+            self._remove_path_actors()
+            self._draw_batches = result.batches(self.parse_cache.batch_size)
+            self._draw_timer.start()
+            return
+
+        self._finish_load(result)
+
+    def _draw_next_batch(self):
+        batch = next(self._draw_batches, None)
+        if batch is None:
+            self._draw_timer.stop()
+            self._draw_batches = None
+            self._finish_load(self.parse_result)
+            return
+
+        for wcs_index, actor in self.canon.add_batch(batch):
+            self._add_path_actor(wcs_index, actor)
+
+        self.path_actors = self.canon.get_path_actors()
+        self.scheduleRender()
+
+    def _finish_load(self, result):
         self.path_actors = self.canon.get_path_actors()
+        self.canon.set_extents(result)
+
+        # decimating large paths takes seconds, so it is done off the GUI
+        # thread and the levels are attached when they are ready
+        thread = threading.Thread(target=self._build_lod, args=(list(self.path_actors.values()),))
+        thread.daemon = True
+        thread.start()
+
+        LOG.debug("-------Draw time %s seconds ---" % (time.time() - self._load_start_time))
 
         if self._datasource.isMachineFoam():
 
@@ -541,40 +655,60 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
             self.tool_bit_actor.set_foam_offsets(z, w)
 
         for wcs_index, actor in list(self.path_actors.items()):
-            LOG.debug("---------wcs_offsets: {}".format(self.wcs_offsets))
-            LOG.debug("---------wcs_index: {}".format(wcs_index))
-
-            current_offsets = self.wcs_offsets[wcs_index]
-            LOG.debug("---------current_offsets: {}".format(current_offsets))
-
-            actor_transform = vtk.vtkTransform()
-            actor_transform.Translate(*current_offsets[:3])
-            actor_transform.RotateZ(current_offsets[9])
-
-            actor.SetUserTransform(actor_transform)
-            #actor.SetPosition(path_position[:3])
-
-            LOG.debug("---------current_position: {}".format(*current_offsets[:3]))
-
             program_bounds_actor = ProgramBoundsActor(self.camera, actor)
             program_bounds_actor.showProgramBounds(self.show_program_bounds)
 
-            axes = actor.get_axes_actor()
-
-            self.offset_axes[wcs_index] = axes
             self.program_bounds_actors[wcs_index] = program_bounds_actor
 
-            axes.SetUserTransform(actor_transform) #TODO: not sure if this is needed
-
-            self.renderer.AddActor(axes)
             self.renderer.AddActor(program_bounds_actor)
-            self.renderer.AddActor(actor)
 
         self.renderer.AddActor(self.axes_actor)
-        self.renderer_window.Render()
+        self.scheduleRender()
         if self.program_view_when_loading_program:
             self.setViewProgram(self.program_view_when_loading_program_view)
 
+    def _build_lod(self, path_actors):
+        # runs in a worker thread
+        for path_actor in path_actors:
+            try:
+                levels = path_actor.decimate()
+            except Exception:
+                LOG.exception("Failed to build the tool path levels of detail")
+                continue
+
+            if levels:
+                self.lodBuilt.emit(path_actor, levels)
+
+    def _set_lod_levels(self, path_actor, levels):
+        # the levels of a program that is no longer shown are dropped
+        if any(path_actor is actor for actor in self.path_actors.values()):
+            path_actor.set_lod_levels(levels)
+            self.scheduleRender()
+
+    def _add_path_actor(self, wcs_index, actor):
+        LOG.debug("---------wcs_offsets: {}".format(self.wcs_offsets))
+        LOG.debug("---------wcs_index: {}".format(wcs_index))
+
+        current_offsets = self.wcs_offsets[wcs_index]
+        LOG.debug("---------current_offsets: {}".format(current_offsets))
+
+        actor_transform = self._wcs_transform(wcs_index)
+        self._set_transform(actor_transform, current_offsets[:3], current_offsets[9])
+
+        actor.SetUserTransform(actor_transform)
+        #actor.SetPosition(path_position[:3])
+
+        LOG.debug("---------current_position: {}".format(*current_offsets[:3]))
+
+        axes = actor.get_axes_actor()
+
+        self.offset_axes[wcs_index] = axes
+
+        axes.SetUserTransform(actor_transform)
+
+        self.renderer.AddActor(axes)
+        self.renderer.AddActor(actor)
+
     def motion_type(self, value):
         LOG.debug("-----motion_type is: {}".format(value))
         if value == linuxcnc.MOTION_TYPE_TOOLCHANGE:
@@ -591,13 +725,8 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
             position = tuple(list_pos)
         self.spindle_position = position[:3]
         self.spindle_rotation = position[3:6]
-        
 
-        tool_transform = vtk.vtkTransform()
-        tool_transform.Translate(*self.spindle_position)
-        tool_transform.RotateX(-self.spindle_rotation[0])
-        tool_transform.RotateY(-self.spindle_rotation[1])
-        tool_transform.RotateZ(-self.spindle_rotation[2])
+        tool_transform = self._update_tool_transform()
 
         if self.spindle_model is not None:
             self.spindle_actor.SetUserTransform(tool_transform)
@@ -646,8 +775,57 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
 
         #print(f"Update tool tip position {time.time()}")
         self.path_cache_actor.add_line_point(self.tooltip_position)
+        self.scheduleRender()
+
+
+    def _update_tool_transform(self):
+        tool_transform = self.tool_transform
+        tool_transform.Identity()
+        tool_transform.Translate(*self.spindle_position)
+        tool_transform.RotateX(-self.spindle_rotation[0])
+        tool_transform.RotateY(-self.spindle_rotation[1])
+        tool_transform.RotateZ(-self.spindle_rotation[2])
+        return tool_transform
+
+    def scheduleRender(self):
+        """Schedule a render of the scene.
+
+        The scene is rendered at most once per frame, limited to
+        `maxFps` renders per second, however often this is called.
+        """
+        if self._render_timer.isActive():
+            return
+
+        frame_time = 1.0 / self._max_fps if self._max_fps > 0 else 0.0
+        wait = frame_time - (time.time() - self._last_render)
+        self._render_timer.start(max(int(wait * 1000), 0))
+
+    def _render(self):
+        self._last_render = time.time()
+        if not IN_DESIGNER:
+            self._update_lod()
         self.renderer_window.Render()
 
+    def _update_lod(self):
+        # draw the coarsest path level of detail that looks the same at
+        # the current zoom, full detail once the view is idle
+        if self.rotating or self.panning or self.zooming:
+            pixels = self.LOD_INTERACTIVE_PIXELS
+        else:
+            pixels = self.LOD_IDLE_PIXELS
+
+        if pixels > 0:
+            if self.camera.GetParallelProjection():
+                view_height = 2.0 * self.camera.GetParallelScale()
+            else:
+                view_height = 2.0 * self.camera.GetDistance() * \
+                              math.tan(math.radians(self.camera.GetViewAngle() / 2.0))
+            tolerance = pixels * view_height / max(self.renderer_window.GetSize()[1], 1)
+        else:
+            tolerance = 0.0
+
+        for path_actor in self.path_actors.values():
+            path_actor.set_lod(tolerance)
 
     def update_joints(self, joints):
         self.joints = joints
@@ -656,41 +834,36 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
 
         self.wcs_offsets = table
 
-    def update_g5x_offset(self, offset):
-        LOG.debug("--------update_g5x_offset {}".format(offset))
-
-        transform = vtk.vtkTransform()
-        transform.Translate(*offset[:3])
-        transform.RotateZ(offset[9])
-
-        self.axes_actor.SetUserTransform(transform)
-
-        for wcs_index, path_actor in list(self.path_actors.items()):
+    def _wcs_transform(self, wcs_index):
+        """The transform shared by all the actors of a coordinate system."""
+        transform = self.wcs_transforms.get(wcs_index)
+        if transform is None:
+            transform = self.wcs_transforms[wcs_index] = vtk.vtkTransform()
+        return transform
 
-            old_program_bounds_actor = self.program_bounds_actors[wcs_index]
-            self.renderer.RemoveActor(old_program_bounds_actor)
+    def _set_transform(self, transform, translation, rotation=0.0):
+        transform.Identity()
+        transform.Translate(*translation)
+        transform.RotateZ(rotation)
 
-            axes = path_actor.get_axes_actor()
+    def _update_program_bounds(self, wcs_index):
+        program_bounds_actor = self.program_bounds_actors.get(wcs_index)
+        if program_bounds_actor is not None:
+            program_bounds_actor.updateBounds()
 
-            LOG.debug("--------wcs_index: {}, active_wcs_index: {}".format(wcs_index, self.active_wcs_index))
-
-            if wcs_index == self.active_wcs_index:
-                path_transform = vtk.vtkTransform()
-                path_transform.Translate(*offset[:3])
-                path_transform.RotateZ(offset[9])
+    def update_g5x_offset(self, offset):
+        LOG.debug("--------update_g5x_offset {}".format(offset))
 
-                axes.SetUserTransform(path_transform)
-                path_actor.SetUserTransform(path_transform)
+        self._set_transform(self.axes_transform, offset[:3], offset[9])
 
-            program_bounds_actor = ProgramBoundsActor(self.camera, path_actor)
-            program_bounds_actor.showProgramBounds(self.show_program_bounds)
+        LOG.debug("--------active_wcs_index: {}".format(self.active_wcs_index))
 
-            self.renderer.AddActor(program_bounds_actor)
+        if self.active_wcs_index in self.path_actors:
+            self._set_transform(self._wcs_transform(self.active_wcs_index),
+                                offset[:3], offset[9])
+            self._update_program_bounds(self.active_wcs_index)
 
-            self.program_bounds_actors[wcs_index] = program_bounds_actor
-
-        self.interactor.ReInitialize()
-        self.renderer_window.Render()
+        self.scheduleRender()
 
     def update_active_wcs(self, wcs_index):
         self.active_wcs_index = wcs_index
@@ -700,14 +873,9 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
         position = self.wcs_offsets[wcs_index]
         LOG.debug("--------position: {}".format(position))
 
-        transform = vtk.vtkTransform()
-        transform.Translate(*position[:3])
-        transform.RotateZ(position[9])
-
-        self.axes_actor.SetUserTransform(transform)
+        self._set_transform(self.axes_transform, position[:3], position[9])
 
-        self.interactor.ReInitialize()
-        self.renderer_window.Render()
+        self.scheduleRender()
 
     def update_g92_offset(self, g92_offset):
         LOG.debug("---------update_g92_offset: {}".format(g92_offset))
@@ -717,33 +885,18 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
             path_offset = list(map(add, self.g92_offset, self.original_g92_offset))
             LOG.debug("---------path_offset: {}".format(path_offset))
 
-            for wcs_index, actor in list(self.path_actors.items()):
-
-                old_program_bounds_actor = self.program_bounds_actors[wcs_index]
-                self.renderer.RemoveActor(old_program_bounds_actor)
+            for wcs_index in self.path_actors:
                 # determine change in g92 offset since path was drawn
 
                 new_path_position = list(map(add, self.wcs_offsets[wcs_index][:9], path_offset))
                 LOG.debug("---------new_path_position: {}".format(path_offset))
 
-                axes = actor.get_axes_actor()
-
-                path_transform = vtk.vtkTransform()
-                path_transform.Translate(*new_path_position[:3])
-
-                self.axes_actor.SetUserTransform(path_transform)
-                axes.SetUserTransform(path_transform)
-                actor.SetUserTransform(path_transform)
-
-                program_bounds_actor = ProgramBoundsActor(self.camera, actor)
-                program_bounds_actor.showProgramBounds(self.show_program_bounds)
-
-                self.renderer.AddActor(program_bounds_actor)
+                self._set_transform(self._wcs_transform(wcs_index), new_path_position[:3])
+                self._set_transform(self.axes_transform, new_path_position[:3])
 
-                self.program_bounds_actors[wcs_index] = program_bounds_actor
+                self._update_program_bounds(wcs_index)
 
-            self.interactor.ReInitialize()
-            self.renderer_window.Render()
+            self.scheduleRender()
 
     def update_tool(self):
 
@@ -755,11 +908,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
         self.tool_actor = ToolActor(self._datasource)
         self.tool_bit_actor = ToolBitActor(self._datasource)
 
-        tool_transform = vtk.vtkTransform()
-        tool_transform.Translate(*self.spindle_position)
-        tool_transform.RotateX(-self.spindle_rotation[0])
-        tool_transform.RotateY(-self.spindle_rotation[1])
-        tool_transform.RotateZ(-self.spindle_rotation[2])
+        tool_transform = self._update_tool_transform()
 
         self.tool_actor.SetUserTransform(tool_transform)
 
@@ -773,7 +922,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
         self.renderer.AddActor(self.tool_actor)
         self.renderer.AddActor(self.tool_bit_actor)
 
-        self.renderer_window.Render()
+        self.scheduleRender()
 
     @Slot(bool)
     @Slot(object)
@@ -1008,7 +1157,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
     def __doCommonSetViewWork(self):
         # This is common logic for all setView**** methods.
         self.camera.SetClippingRange(self.clipping_range_near, self.clipping_range_far)
-        self.renderer_window.Render()
+        self.scheduleRender()
         self.interactor.ReInitialize()
 
     @Slot()
@@ -1033,9 +1182,19 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
     def clearLivePlot(self):
         LOG.debug('clear live plot')
         self.renderer.RemoveActor(self.path_cache_actor)
-        self.path_cache_actor = PathCacheActor(self.tooltip_position)
+        self.path_cache_actor = self._new_path_cache_actor()
         self.renderer.AddActor(self.path_cache_actor)
-        self.renderer_window.Render()
+        self.scheduleRender()
+
+    def _new_path_cache_actor(self):
+        tolerance = self._live_plot_tolerance
+        if tolerance <= 0:
+            # the default is in inches
+            tolerance = PathCacheActor.TOLERANCE
+            if self._datasource.isMachineMetric():
+                tolerance *= 25.4
+        return PathCacheActor(self.tooltip_position, max_points=self._live_plot_max_points,
+                              tolerance=tolerance)
 
     @Slot(bool)
     def enable_panning(self, enabled):
@@ -1061,7 +1220,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
             self.camera.Zoom(1.1)
             LOG.debug("---camera clipping range")
 
-        self.renderer_window.Render()
+        self.scheduleRender()
 
     @Slot()
     def zoomOut(self):
@@ -1072,7 +1231,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
             self.renderer.ResetCameraClippingRange()
             self.camera.Zoom(0.9)
 
-        self.renderer_window.Render()
+        self.scheduleRender()
 
     @Slot(bool)
     def alphaBlend(self, alpha):
@@ -1083,7 +1242,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
     def showGrid(self, grid):
         LOG.debug('show grid')
         self.machine_actor.showGridlines(grid)
-        self.renderer_window.Render()
+        self.scheduleRender()
 
     @Slot(bool)
     @Slot(object)
@@ -1093,7 +1252,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
             program_bounds_actor = self.program_bounds_actors[wcs_index]
             if program_bounds_actor is not None:
                 program_bounds_actor.showProgramBounds(self.show_program_bounds)
-                self.renderer_window.Render()
+                self.scheduleRender()
 
     @Slot()
     def toggleProgramBounds(self):
@@ -1136,7 +1295,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
     @Slot(object)
     def showMachineBounds(self, bounds):
         self.machine_actor.showMachineBounds(bounds)
-        self.renderer_window.Render()
+        self.scheduleRender()
 
     @Slot()
     def toggleMachineBounds(self):
@@ -1146,7 +1305,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
     @Slot(object)
     def showMachineTicks(self, ticks):
         self.machine_actor.showMachineTicks(ticks)
-        self.renderer_window.Render()
+        self.scheduleRender()
 
     @Slot()
     def toggleMachineTicks(self):
@@ -1156,7 +1315,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
     @Slot(object)
     def showMachineLabels(self, labels):
         self.machine_actor.showMachineLabels(labels)
-        self.renderer_window.Render()
+        self.scheduleRender()
 
     @Slot()
     def toggleMachineLabels(self):
@@ -1180,14 +1339,14 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
         self._background_color = color
 
         self.renderer.SetBackground(color.getRgbF()[:3])
-        self.renderer_window.Render()
+        self.scheduleRender()
 
     @backgroundColor.reset
     def backgroundColor(self):
         self._background_color = QColor(0, 0, 0)
 
         self.renderer.GradientBackgroundOff()
-        self.renderer_window.Render()
+        self.scheduleRender()
 
 
     @Property(QColor)
@@ -1200,14 +1359,59 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
 
         self.renderer.GradientBackgroundOn()
         self.renderer.SetBackground2(color2.getRgbF()[:3])
-        self.renderer_window.Render()
+        self.scheduleRender()
 
     @backgroundColor2.reset
     def backgroundColor2(self):
         self._background_color2 = QColor(0, 0, 0)
 
         self.renderer.GradientBackgroundOff()
-        self.renderer_window.Render()
+        self.scheduleRender()
+
+    @Property(int)
+    def maxFps(self):
+        return self._max_fps
+
+    @maxFps.setter
+    def maxFps(self, fps):
+        self._max_fps = fps
+
+    @maxFps.reset
+    def maxFps(self):
+        self._max_fps = self.MAX_FPS
+
+    @Property(int)
+    def livePlotMaxPoints(self):
+        return self._live_plot_max_points
+
+    @livePlotMaxPoints.setter
+    def livePlotMaxPoints(self, max_points):
+        self._live_plot_max_points = max_points
+        self._resetLivePlot()
+
+    @livePlotMaxPoints.reset
+    def livePlotMaxPoints(self):
+        self._live_plot_max_points = PathCacheActor.MAX_POINTS
+        self._resetLivePlot()
+
+    @Property(float)
+    def livePlotTolerance(self):
+        return self._live_plot_tolerance
+
+    @livePlotTolerance.setter
+    def livePlotTolerance(self, tolerance):
+        self._live_plot_tolerance = tolerance
+        self._resetLivePlot()
+
+    @livePlotTolerance.reset
+    def livePlotTolerance(self):
+        self._live_plot_tolerance = 0.0
+        self._resetLivePlot()
+
+    def _resetLivePlot(self):
+        # the trail buffer is sized on creation, so start a new one
+        if not IN_DESIGNER and hasattr(self, 'path_cache_actor'):
+            self.clearLivePlot()
 
     @Property(bool)
     def enableProgramTicks(self):
@@ -1,12 +1,13 @@
-import sys
 from collections import OrderedDict
 
+import numpy as np
+
 import vtk
 import vtk.qt
 from .linuxcnc_datasource import LinuxCncDataSource
 from .path_actor import PathActor
 from qtpyvcp.utilities import logger
-from qtpyvcp.widgets.display_widgets.vtk_backplot.base_canon import StatCanon
+from qtpyvcp.widgets.display_widgets.vtk_backplot.parse_cache import RecordingCanon, LINE_TYPES
 
 LOG = logger.getLogger(__name__)
 
@@ -18,143 +19,106 @@ COLOR_MAP = {
     'user': (0, 100, 255, 255),
 }
 
-class VTKCanon(StatCanon):
+class VTKCanon(RecordingCanon):
     def __init__(self, colors=COLOR_MAP, *args, **kwargs):
         super(VTKCanon, self).__init__(*args, **kwargs)
         self._datasource = LinuxCncDataSource()
 
         self.path_colors = colors
         self.path_actors = OrderedDict()
-        self.path_points = OrderedDict()
-
-        self.active_wcs_index = self._datasource.getActiveWcsIndex()
-
-        self.foam_z = 0.0
-        self.foam_w = 0.0
-
-    def comment(self, comment):
-        LOG.debug("G-code Comment: {}".format(comment))
-        items = comment.lower().split(',', 1)
-        if len(items) > 0 and items[0] in ['axis', 'backplot']:
-            cmd = items[1].strip()
-            if cmd == "hide":
-                self.suppress += 1
-            elif cmd == "show":
-                self.suppress -= 1
-            elif cmd == 'stop':
-                LOG.info("Backplot generation aborted.")
-                raise KeyboardInterrupt
-            elif cmd.startswith("xy_z_pos"):
-                self.foam_z = float(cmd.split(',')[1])
-
-            elif cmd.startswith("uv_z_pos"):
-                self.foam_w = float(cmd.split(',')[1])
-
-    def message(self, msg):
-        LOG.debug("G-code Message: {}".format(msg))
-
-    def set_g5x_offset(self, index, x, y, z, a, b, c, u, v, w):
-        new_wcs = index - 1  # this index counts also G53 so we need to do -1
-        LOG.debug("---------received wcs change: {}".format(new_wcs))
-        if new_wcs not in list(self.path_actors.keys()):
-            self.path_actors[new_wcs] = PathActor(self._datasource)
-            self.path_points[new_wcs] = list()
-
-        self.active_wcs_index = new_wcs
-
-    def add_path_point(self, line_type, start_point, end_point):
-        line = [start_point, end_point]
-        self.path_points.get(self.active_wcs_index).append((line_type, line))
-
-    def draw_lines(self):
-        # Used to draw the lines of the loaded program
-        LOG.debug("---------path points size: {}".format(sys.getsizeof(self.path_points)))
-        LOG.debug("---------path points length: {}".format(len(self.path_points)))
-
-        # TODO: for some reason, we need to multiply for metric, find out why!
-        multiplication_factor = 25.4 if self._datasource.isMachineMetric() else 1
-
-        for wcs_index, data in list(self.path_points.items()):
-            index = 0
-
-            path_actor = self.path_actors.get(wcs_index)
-            if path_actor is not None:
-                for line_type, line_data in data:
-                    start_point = line_data[0]
-                    end_point = line_data[1]
 
-                    if self._datasource.isMachineFoam():
+    def draw_lines(self, result=None):
+        # Used to draw the lines of the loaded program, either from a shared
+        # parse result or from what was recorded by this canon
+        if result is None:
+            result = self.get_result()
 
-                        path_actor.points.InsertNextPoint(start_point[0] * multiplication_factor,
-                                                          start_point[1] * multiplication_factor,
-                                                          (start_point[8]+(self.foam_z/25.4)) * multiplication_factor)
+        LOG.debug("---------path segments: {}".format(len(result)))
 
-                        path_actor.points.InsertNextPoint(end_point[0] * multiplication_factor,
-                                                          end_point[1] * multiplication_factor,
-                                                          (start_point[8]+(self.foam_z/25.4)) * multiplication_factor)
+        self.path_actors.clear()
 
+        for wcs_index in result.wcs_order:
+            self.path_actors[wcs_index] = PathActor(self._datasource)
 
-                        path_actor.colors.InsertNextTypedTuple(self.path_colors.get(line_type).getRgb()[:4])
+        self.add_batch(result)
 
-                        line = vtk.vtkLine()
-                        line.GetPointIds().SetId(0, index)
-                        line.GetPointIds().SetId(1, index + 1)
+    def add_batch(self, batch):
+        """Append a batch of parsed segments to the path actors.
 
-                        path_actor.lines.InsertNextCell(line)
-
-
-                        index += 2
+        Returns:
+            list : the (wcs_index, path_actor) pairs created for this batch.
+        """
+        self.foam_z, self.foam_w = batch.foam
 
+        # TODO: for some reason, we need to multiply for metric, find out why!
+        multiplication_factor = 25.4 if self._datasource.isMachineMetric() else 1
 
-                        path_actor.points.InsertNextPoint(start_point[6] * multiplication_factor,
-                                                          start_point[7] * multiplication_factor,
-                                                          (start_point[8]+(self.foam_w/25.4)) * multiplication_factor)
+        palette = np.array([self.path_colors.get(line_type).getRgb()[:4] for line_type in LINE_TYPES],
+                           dtype=np.uint8)
 
-                        path_actor.points.InsertNextPoint(end_point[6] * multiplication_factor,
-                                                          end_point[7] * multiplication_factor,
-                                                          (start_point[8]+(self.foam_w/25.4)) * multiplication_factor)
+        new_actors = list()
 
-                        path_actor.colors.InsertNextTypedTuple(self.path_colors.get(line_type).getRgb()[:4])
+        for wcs_index in batch.wcs_order:
+            path_actor = self.path_actors.get(wcs_index)
+            if path_actor is None:
+                path_actor = PathActor(self._datasource)
+                self.path_actors[wcs_index] = path_actor
+                new_actors.append((wcs_index, path_actor))
 
-                        line2 = vtk.vtkLine()
-                        line2.GetPointIds().SetId(0, index)
-                        line2.GetPointIds().SetId(1, index + 1)
+            selected = batch.wcs == wcs_index
+            num_lines = int(selected.sum())
+            if num_lines == 0:
+                if path_actor.num_lines == 0:
+                    path_actor.set_lines(np.empty((0, 3)), np.empty((0, 4), dtype=np.uint8))
+                continue
 
-                        path_actor.lines.InsertNextCell(line2)
+            # contiguous buffers, shape (N, 2, 9)
+            segments = batch.segments[selected]
+            colors = palette[batch.types[selected]]
 
-                        index += 2
+            if self._datasource.isMachineFoam():
+                # two lines per segment, XY at foam_z and UV at foam_w,
+                # both at the Z height of the segment start point
+                points = np.empty((num_lines, 2, 2, 3), dtype=np.float64)
+                z_height = segments[:, 0, 8][:, np.newaxis]
 
-                    else:
+                points[:, 0, :, 0:2] = segments[:, :, 0:2]
+                points[:, 0, :, 2] = z_height + self.foam_z / 25.4
+                points[:, 1, :, 0:2] = segments[:, :, 6:8]
+                points[:, 1, :, 2] = z_height + self.foam_w / 25.4
 
-                        path_actor.points.InsertNextPoint(start_point[0] * multiplication_factor,
-                                                          start_point[1] * multiplication_factor,
-                                                          start_point[2] * multiplication_factor)
+                points = points.reshape(-1, 3)
+                colors = np.repeat(colors, 2, axis=0)
+            else:
+                points = segments[:, :, 0:3].reshape(-1, 3)
 
-                        path_actor.points.InsertNextPoint(end_point[0] * multiplication_factor,
-                                                          end_point[1] * multiplication_factor,
-                                                          end_point[2] * multiplication_factor)
+            del segments
 
+            points *= multiplication_factor
 
-                        path_actor.colors.InsertNextTypedTuple(self.path_colors.get(line_type).getRgb()[:4])
+            path_actor.append_lines(points, colors)
 
-                        line = vtk.vtkLine()
-                        line.GetPointIds().SetId(0, index)
-                        line.GetPointIds().SetId(1, index + 1)
+        return new_actors
 
-                        path_actor.lines.InsertNextCell(line)
+    def set_extents(self, result):
+        """Give the path actors the program extents recorded during the parse.
 
+        Foam paths are drawn at the foam heights rather than the program
+        Z, so their actors keep using the bounds of the drawn lines.
+        """
+        if self._datasource.isMachineFoam():
+            return
 
-                        index += 2
+        multiplication_factor = 25.4 if self._datasource.isMachineMetric() else 1
 
-                # free up memory, lots of it for big files
-                self.path_points[wcs_index] = list()
+        for wcs_index, path_actor in list(self.path_actors.items()):
+            min_extents, max_extents = result.get_extents(wcs=[wcs_index])
+            if min_extents[0] > max_extents[0]:
+                path_actor.set_extents(None)
+                continue
 
-                path_actor.poly_data.SetPoints(path_actor.points)
-                path_actor.poly_data.SetLines(path_actor.lines)
-                path_actor.poly_data.GetCellData().SetScalars(path_actor.colors)
-                path_actor.data_mapper.SetInputData(path_actor.poly_data)
-                path_actor.data_mapper.Update()
-                path_actor.SetMapper(path_actor.data_mapper)
+            path_actor.set_extents(([v * multiplication_factor for v in min_extents],
+                                    [v * multiplication_factor for v in max_extents]))
 
     def get_path_actors(self):
         return self.path_actors
@@ -20,6 +20,7 @@ import linuxcnc  # For commanding linuxcnc
 from qtpy import uic, QtWidgets
 
 from qtpyvcp.utilities.info import Info
+from qtpyvcp.utilities.stat_snapshot import StatSnapshot
 from qtpyvcp.plugins import getPlugin
 
 NOTIFICATIONS = getPlugin('notifications')
@@ -31,7 +32,8 @@ INFO = Info()
 SUBROUTINE_PATH = INFO.getSubroutinePath()
 
 CMD = linuxcnc.command()
-STAT = linuxcnc.stat()
+SNAPSHOT = StatSnapshot()
+STAT = SNAPSHOT.stat
 
 
 class SubCaller(QtWidgets.QWidget):
@@ -84,7 +86,7 @@ class SubCaller(QtWidgets.QWidget):
         CMD.mdi(cmd_str)
         CMD.wait_complete(10000)
         print('Done')
-        STAT.poll()
+        SNAPSHOT.poll()
         if STAT.probe_tripped:
             # self.status_label.setStyleSheet("QStatusBar{color:green}")
             # self.status_label.setText("Probing finished successfully")
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+
+"""Plasma Preprocessor Golden Outputs - regression check for the preprocessor
+
+    Runs every fixture program in fixtures/ through the plasma gcode
+    preprocessor with flag_holes (with and without HiDef hole data) and
+    with flag_pierce, and diffs the dump_parsed output against the
+    expected outputs in expected/.
+
+    The HAL pins and the plasma process DB are replaced by fixed values
+    so the outputs only depend on the preprocessor code. LinuxCNC does
+    not need to be running.
+
+    The random fixtures are made by --generate from fixed seeds. After an
+    intended change of the output, rewrite the expected outputs with
+    --update and review the diff before committing it.
+
+Usage:
+  golden.py [--update] [fixture ...]
+  golden.py --generate
+"""
+
+import io
+import os
+import sys
+import types
+import random
+import difflib
+import argparse
+import tempfile
+import contextlib
+import importlib.util
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(HERE, 'fixtures')
+EXPECTED_DIR = os.path.join(HERE, 'expected')
+SRC_DIR = os.path.join(HERE, '..', '..', 'src')
+PREPROCESSOR = os.path.join(SRC_DIR, 'qtpyvcp', 'tools', 'plasma_gcode_preprocessor.py')
+
+MODES = ('holes', 'holes-hidef', 'pierce')
+
+GENERATED_SEEDS = (3, 11, 42)
+
+HAL_VALUES = {
+    'qtpyvcp.plasma-hole-thickness-ratio.out': 2.5,
+    'qtpyvcp.plasma-max-hole-size.out': 20,
+    'qtpyvcp.plasma-arc1-percent.out': 100,
+    'qtpyvcp.plasma-arc2-distance.out': 2,
+    'qtpyvcp.plasma-arc2-percent.out': 60,
+    'qtpyvcp.plasma-arc3-distance.out': 3,
+    'qtpyvcp.plasma-arc3-percent.out': 50,
+    'qtpyvcp.plasma-leadin-percent.out': 50,
+    'qtpyvcp.plasma-leadin-radius.out': 0,
+    'qtpyvcp.param-kirfwidth.out': 1.5,
+    'qtpyvcp.plasma-torch-off-distance.out': 1,
+    'qtpyvcp.plasma-small-hole-detect.checked': True,
+    'qtpyvcp.plasma-small-hole-threshold.out': 3,
+    'qtpyvcp.spot-threshold.out': 50,
+    'qtpyvcp.spot-delay.out': 0.1,
+}
+
+
+class FakePlasmaDB(object):
+    """Plasma process DB with one cut chart per tool number."""
+
+    def __init__(self, hidef=False):
+        self.hidef = hidef
+
+    def tool_id(self, tool):
+        thickness = types.SimpleNamespace(thickness=4)
+        return [types.SimpleNamespace(cut_speed=1000 + tool, thickness=thickness,
+                                      machineid=1, thicknessid=2, materialid=3)]
+
+    def hidef_holes(self, machineid, materialid, thicknessid):
+        if not self.hidef:
+            return []
+        return [types.SimpleNamespace(hole_size=size, leadin_radius=1, kerf=1.2,
+                                      cut_height=3, speed1=900, speed2=600,
+                                      speed2_distance=2, plasma_off_distance=1,
+                                      over_cut=2, amps=45)
+                for size in (0, 5, 10, 15)]
+
+    def terminate(self):
+        pass
+
+
+def install_fakes(log_dir):
+    """Stand in for the machine side modules the preprocessor imports."""
+    os.environ['INI_FILE_NAME'] = 'golden.ini'
+    os.environ['CONFIG_DIR'] = log_dir
+    sys.path.insert(0, SRC_DIR)
+
+    hal = types.ModuleType('hal')
+    hal.component = lambda name: None
+    hal.get_value = HAL_VALUES.__getitem__
+    hal.set_p = lambda name, value: None
+    sys.modules['hal'] = hal
+
+    linuxcnc = types.ModuleType('linuxcnc')
+    linuxcnc.ini = lambda path: types.SimpleNamespace(find=lambda section, option: 'mm')
+    sys.modules['linuxcnc'] = linuxcnc
+
+    plasma_processes = types.ModuleType('qtpyvcp.plugins.plasma_processes')
+    plasma_processes.PlasmaProcesses = FakePlasmaDB
+    sys.modules['qtpyvcp.plugins.plasma_processes'] = plasma_processes
+
+
+def load_preprocessor():
+    # load a fresh copy each run, G20 in a program changes module globals
+    spec = importlib.util.spec_from_file_location('plasma_gcode_preprocessor', PREPROCESSOR)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run(fixture, mode):
+    module = load_preprocessor()
+    module.PLASMADB = FakePlasmaDB(hidef=(mode == 'holes-hidef'))
+
+    processor = module.PreProcessor(os.path.join(FIXTURES_DIR, fixture + '.ngc'))
+    processor.parse()
+    if mode == 'pierce':
+        processor.flag_pierce()
+    else:
+        processor.flag_holes()
+
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        processor.dump_parsed()
+    return out.getvalue()
+
+
+def generate_program(seed, count=25):
+    """Random mix of holes, plain cuts and odd lines, like CAM output."""
+    r = random.Random(seed)
+    lines = ['G21', 'G90', 'G40', 'T2 M6', 'F#<_hal[plasmac.cut-feed-rate]>']
+    for _ in range(count):
+        kind = r.random()
+        x = r.uniform(0, 500)
+        y = r.uniform(0, 500)
+        if kind < 0.5:
+            radius = r.choice([1, 2, 4, 6, 8, 12, 18, 25, 40]) / 2.0
+            lines.append('G0 X%.3f Y%.3f' % (x, y))
+            if r.random() < 0.5:
+                lines.append('G0 Z1')
+            lines += ['M3 $0', 'G1 X%.3f Y%.3f' % (x + radius * 0.5, y)]
+            if r.random() < 0.8:
+                lines.append('G3 X%.3f Y%.3f I%.3f J0' % (x + radius * 0.5, y, -radius * 0.5))
+            else:
+                lines.append('G3 I%.3f J0' % (-radius * 0.5))
+            if r.random() < 0.3:
+                lines.append('G1 X%.3f' % (x + 1))
+            lines.append(r.choice(['M5 $-1', 'M5', 'M52 P1\nM5']))
+        elif kind < 0.8:
+            lines += ['G0 X%.3f Y%.3f' % (x, y), 'M3 $0', 'G1 X%.3f' % (x + 10),
+                      'G2 X%.3f Y%.3f I5 J0' % (x + 10, y), 'G1 Y%.3f' % (y + 10), 'M5 $-1']
+        else:
+            lines.append(r.choice(['(comment)', 'G4 P1', 'M3 $1', 'G91', 'G90', 'G1 X1 Y2',
+                                   'G0 X5', 'Y7', 'M5', 'G91.1', 'G1 X%.3f Y%.3f' % (x, y)]))
+    lines.append('M2')
+    return '\n'.join(lines) + '\n'
+
+
+def generate():
+    for seed in GENERATED_SEEDS:
+        path = os.path.join(FIXTURES_DIR, 'random_%d.ngc' % seed)
+        with open(path, 'w') as fh:
+            fh.write(generate_program(seed))
+        print('wrote %s' % os.path.relpath(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the plasma preprocessor golden outputs.')
+    parser.add_argument('--update', action='store_true', help='rewrite the expected outputs')
+    parser.add_argument('--generate', action='store_true', help='rewrite the random fixtures')
+    parser.add_argument('fixture', nargs='*', help='fixture names, default all')
+    args = parser.parse_args()
+
+    if args.generate:
+        generate()
+        return 0
+
+    fixtures = args.fixture or sorted(os.path.splitext(name)[0] for name in os.listdir(FIXTURES_DIR)
+                                      if name.endswith('.ngc'))
+
+    failed = 0
+    with tempfile.TemporaryDirectory() as log_dir:
+        install_fakes(log_dir)
+        for fixture in fixtures:
+            for mode in MODES:
+                name = '%s.%s.ngc' % (fixture, mode)
+                path = os.path.join(EXPECTED_DIR, name)
+                actual = run(fixture, mode)
+
+                if args.update:
+                    with open(path, 'w') as fh:
+                        fh.write(actual)
+                    print('wrote expected/%s' % name)
+                    continue
+
+                try:
+                    with open(path) as fh:
+                        expected = fh.read()
+                except IOError:
+                    expected = ''
+
+                if actual == expected:
+                    print('ok      %s' % name)
+                else:
+                    failed += 1
+                    print('FAILED  %s' % name)
+                    sys.stdout.writelines(difflib.unified_diff(
+                        expected.splitlines(True), actual.splitlines(True),
+                        'expected/' + name, 'actual/' + name))
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
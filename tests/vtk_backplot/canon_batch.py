@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+
+"""Canon Batch Equivalence - check the buffered canon moves against the scalar path
+
+    RecordingCanon transforms the buffered straight moves a block at a time
+    with BaseCanon.rotate_and_translate_points. This checks that it gives
+    bitwise the same values as the scalar BaseCanon.rotate_and_translate:
+
+    - on random blocks of points with random G92/G5x offsets, XY rotations
+      and inch or metric machine units
+    - on random programs of feeds, traverses, arcs, offset and rotation
+      changes, tool changes, dwells and comments, comparing every recorded
+      array of the results and batches with the scalar canon
+
+    LinuxCNC does not need to be running, but the gcode and linuxcnc python
+    modules must be importable (source rip-environment for a RIP build).
+
+Usage:
+  canon_batch.py [--seeds=<n>]
+"""
+
+import sys
+import types
+import random
+import argparse
+
+import numpy as np
+
+from qtpyvcp.widgets.display_widgets.vtk_backplot.base_canon import BaseCanon
+from qtpyvcp.widgets.display_widgets.vtk_backplot.parse_cache import RecordingCanon
+
+RESULT_ARRAYS = ('types', 'wcs', 'tools', 'lines', 'feedrates', 'segments', 'dwells')
+
+TOOLS = 5
+
+
+class ScalarCanon(RecordingCanon):
+    """RecordingCanon that records each straight move through the scalar path."""
+
+    def straight_traverse(self, *pos):
+        BaseCanon.straight_traverse(self, *pos)
+
+    def straight_feed(self, *pos):
+        BaseCanon.straight_feed(self, *pos)
+
+    straight_probe = straight_feed
+
+
+class Sequence(object):
+    def __init__(self, sequence_number):
+        self.sequence_number = sequence_number
+
+
+def make_stat(units):
+    tool_table = [(tool,) + (0.0,) * 12 + (0,) for tool in range(TOOLS)]
+    return types.SimpleNamespace(tool_table=tool_table, g5x_index=1, tool_in_spindle=0,
+                                 linear_units=units, angular_units=1.0)
+
+
+def random_units(r):
+    # machine units per mm and the matching size of the coordinates
+    return r.choice([(1.0, 250.0), (1 / 25.4, 10.0)])
+
+
+def random_pos(r, scale):
+    return tuple(r.uniform(-scale, scale) for _ in range(9))
+
+
+def check_points(seed):
+    """rotate_and_translate_points against rotate_and_translate."""
+    r = random.Random(seed)
+    units, scale = random_units(r)
+
+    canon = RecordingCanon(stat=make_stat(units))
+    # RecordingCanon only tracks the WCS index, set the offsets themselves
+    BaseCanon.set_g5x_offset(canon, 1, *random_pos(r, scale))
+    canon.set_g92_offset(*random_pos(r, scale))
+    canon.set_xy_rotation(r.choice([0.0, 90.0, r.uniform(-360, 360)]))
+
+    points = np.array([random_pos(r, scale) for _ in range(r.randint(1, 500))])
+    expected = np.array([canon.rotate_and_translate(*point) for point in points.tolist()])
+    actual = canon.rotate_and_translate_points(points)
+
+    return np.array_equal(expected, actual)
+
+
+def random_program(seed, count=2000):
+    r = random.Random(seed)
+    units, scale = random_units(r)
+
+    ops = []
+    for line in range(count):
+        kind = r.random()
+        pos = random_pos(r, scale)
+        if kind < 0.35:
+            ops.append(('straight_feed', pos))
+        elif kind < 0.6:
+            ops.append(('straight_traverse', pos))
+        elif kind < 0.7:
+            x, y = pos[:2]
+            cx = x + r.uniform(-scale, scale) / 10
+            cy = y + r.uniform(-scale, scale) / 10
+            ops.append(('arc_feed', (x, y, cx, cy, r.choice([-1, 1]), pos[2]) + pos[3:]))
+        elif kind < 0.74:
+            ops.append(('set_g92_offset', pos))
+        elif kind < 0.77:
+            ops.append(('set_g5x_offset', (r.randint(1, 9),) + pos))
+        elif kind < 0.81:
+            ops.append(('set_xy_rotation', (r.uniform(-180, 180),)))
+        elif kind < 0.84:
+            ops.append(('tool_offset', pos))
+        elif kind < 0.87:
+            ops.append(('dwell', (r.random(),)))
+        elif kind < 0.89:
+            ops.append(('change_tool', (r.randrange(TOOLS),)))
+        elif kind < 0.91:
+            ops.append(('rigid_tap', pos[:3]))
+        elif kind < 0.94:
+            ops.append(('comment', (r.choice(['AXIS,hide', 'AXIS,show']),)))
+        else:
+            ops.append(('next_line', (Sequence(line),)))
+
+    return units, r.choice([0, 0, 7, 1000]), ops
+
+
+def record(canon_class, units, batch_size, ops):
+    batches = []
+    canon = canon_class(stat=make_stat(units), batch_size=batch_size, on_batch=batches.append)
+    for name, args in ops:
+        getattr(canon, name)(*args)
+    return batches + [canon.get_result()]
+
+
+def check_program(seed):
+    """Buffered RecordingCanon against the scalar canon on a random program."""
+    units, batch_size, ops = random_program(seed)
+    expected = record(ScalarCanon, units, batch_size, ops)
+    actual = record(RecordingCanon, units, batch_size, ops)
+
+    if len(expected) != len(actual):
+        return False
+
+    return all(np.array_equal(getattr(a, name), getattr(b, name))
+               for a, b in zip(expected, actual) for name in RESULT_ARRAYS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the batched canon transforms.')
+    parser.add_argument('--seeds', type=int, default=200, help='number of random cases per check')
+    args = parser.parse_args()
+
+    failed = 0
+    for check in (check_points, check_program):
+        failures = [seed for seed in range(args.seeds) if not check(seed)]
+        failed += len(failures)
+        if failures:
+            print('FAILED  %s, seeds %s' % (check.__name__, ' '.join(map(str, failures))))
+        else:
+            print('ok      %s, %d seeds' % (check.__name__, args.seeds))
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())